@@ -63,6 +63,9 @@ struct SearchItemConfig: Codable {
     let animation: AnimationType?
     let positions: [Position]?
     let zPosition: CGFloat?
+    let placedBy: String?  // Set by scripts/place_items.py when it wrote `positions`
+    
+    static let placedByTool = "place_items"
     
     struct Position: Codable {
         let x: CGFloat
@@ -133,7 +136,9 @@ class LevelLoader {
     }
     
     static func load(levelId: String) throws -> Level {
-        guard let url = Bundle.main.url(forResource: levelId, withExtension: "json", subdirectory: "Levels") else {
+        // Levels/ is a group, not a folder reference, so its files are copied to the bundle root.
+        guard let url = Bundle.main.url(forResource: levelId, withExtension: "json", subdirectory: "Levels")
+                ?? Bundle.main.url(forResource: levelId, withExtension: "json") else {
             throw LevelError.fileNotFound
         }
         
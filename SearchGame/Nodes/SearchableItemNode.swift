@@ -13,6 +13,13 @@ class SearchableItemNode: SKSpriteNode {
     private(set) var isFound: Bool = false
     weak var delegate: SearchableItemDelegate?
     
+    /// Precomputed mask of the generated sprite; nil for other textures (tap anywhere in the frame).
+    let hitShape: HitShape?
+    private let baseSize: CGSize
+    
+    /// Extra tap radius around opaque pixels, in points.
+    private static let tapSlop: CGFloat = 4
+    
     // MARK: - Initialization
     
     init(type: String, animation: AnimationType = .bobbing, texture: SKTexture? = nil) {
@@ -20,11 +27,16 @@ class SearchableItemNode: SKSpriteNode {
         self.animationType = animation
         
         // Prefer generated/real art if present in bundle, fallback to procedural placeholder.
+        let generated = texture == nil ? AssetLoader.generatedTexture(named: type) : nil
         let nodeTexture =
             texture
-            ?? AssetLoader.texture(named: type)
+            ?? generated
+            ?? AssetLoader.catalogTexture(named: type)
             ?? SearchableItemNode.createPlaceholderTexture(for: type)
-        let size = CGSize(width: 48, height: 48)  // Smaller size to blend in
+        // Smaller size to blend in; generated sprites keep their aspect ratio (scripts/place_items.py assumes it).
+        let size = generated.map { SearchableItemNode.aspectFit($0.size(), in: 48) } ?? CGSize(width: 48, height: 48)
+        self.hitShape = generated != nil ? AssetLoader.hitShape(named: type) : nil
+        self.baseSize = size
         
         super.init(texture: nodeTexture, color: .clear, size: size)
         
@@ -39,6 +51,12 @@ class SearchableItemNode: SKSpriteNode {
         fatalError("init(coder:) has not been implemented")
     }
     
+    private static func aspectFit(_ size: CGSize, in side: CGFloat) -> CGSize {
+        guard size.width > 0, size.height > 0 else { return CGSize(width: side, height: side) }
+        let scale = side / max(size.width, size.height)
+        return CGSize(width: size.width * scale, height: size.height * scale)
+    }
+    
     // MARK: - Animation
     
     private func startAnimation() {
@@ -365,6 +383,19 @@ class SearchableItemNode: SKSpriteNode {
     
     // MARK: - Interaction
     
+    /// Whether a point in `node`'s coordinates lands on the sprite rather than its transparent margin.
+    func isHit(at point: CGPoint, in node: SKNode) -> Bool {
+        let local = convert(point, from: node)
+        let u = local.x / baseSize.width + anchorPoint.x
+        let v = local.y / baseSize.height + anchorPoint.y
+        guard let hitShape = hitShape else {
+            return (0...1).contains(u) && (0...1).contains(v)
+        }
+        let cellWidth = baseSize.width / CGFloat(hitShape.cols)
+        let slop = Int((SearchableItemNode.tapSlop / cellWidth).rounded(.up))
+        return hitShape.contains(u: u, v: v, slop: slop)
+    }
+    
     func handleTap() {
         guard !isFound else { return }
         
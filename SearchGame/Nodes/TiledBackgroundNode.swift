@@ -0,0 +1,115 @@
+import SpriteKit
+
+/// Background drawn from a `TiledImage`: the smallest level is always shown, and tiles of the
+/// level matching the current zoom are loaded only while they are near the visible rect.
+class TiledBackgroundNode: SKNode {
+
+    private let image: TiledImage
+    /// On-screen size of the whole image in scene points.
+    let displaySize: CGSize
+
+    private let baseNode: SKSpriteNode
+    private var tiles: [TileKey: SKSpriteNode] = [:]
+
+    private struct TileKey: Hashable {
+        let level: Int
+        let col: Int
+        let row: Int
+    }
+
+    /// Centered on the node's position, like an `SKSpriteNode` with the default anchor point.
+    init(image: TiledImage, displaySize: CGSize) {
+        self.image = image
+        self.displaySize = displaySize
+
+        let coarsest = image.levels.count - 1
+        let info = image.levels[coarsest]
+        baseNode = SKSpriteNode(color: .clear, size: displaySize)
+        super.init()
+
+        // The coarsest level always fits in one tile.
+        if info.cols == 1, info.rows == 1, let texture = image.texture(level: coarsest, col: 0, row: 0) {
+            baseNode.texture = texture
+            baseNode.color = .white
+        }
+        baseNode.zPosition = 0
+        addChild(baseNode)
+    }
+
+    required init?(coder aDecoder: NSCoder) {
+        fatalError("init(coder:) has not been implemented")
+    }
+
+    // MARK: - Streaming
+
+    /// Show the tiles covering `visibleRect` (scene coordinates) at `pointScale` pixels per scene point,
+    /// plus a one-tile margin so panning doesn't reveal the base level; drop the rest.
+    func update(visibleRect: CGRect, pointScale: CGFloat) {
+        let level = levelIndex(pointScale: pointScale)
+        var wanted = Set<TileKey>()
+
+        if level < image.levels.count - 1 {
+            let info = image.levels[level]
+            // Image pixels of this level per scene point.
+            let sx = CGFloat(info.width) / displaySize.width
+            let sy = CGFloat(info.height) / displaySize.height
+            let tile = CGFloat(image.tileSize)
+            // Visible rect in level pixels, top-left origin.
+            let local = CGRect(
+                x: (visibleRect.minX - position.x + displaySize.width / 2) * sx,
+                y: (position.y + displaySize.height / 2 - visibleRect.maxY) * sy,
+                width: visibleRect.width * sx,
+                height: visibleRect.height * sy
+            )
+            let minCol = max(0, Int(floor(local.minX / tile)) - 1)
+            let maxCol = min(info.cols - 1, Int(floor(local.maxX / tile)) + 1)
+            let minRow = max(0, Int(floor(local.minY / tile)) - 1)
+            let maxRow = min(info.rows - 1, Int(floor(local.maxY / tile)) + 1)
+            if minCol <= maxCol, minRow <= maxRow {
+                for row in minRow...maxRow {
+                    for col in minCol...maxCol {
+                        wanted.insert(TileKey(level: level, col: col, row: row))
+                    }
+                }
+            }
+        }
+
+        for (key, node) in tiles where !wanted.contains(key) {
+            node.removeFromParent()
+            tiles[key] = nil
+        }
+        for key in wanted where tiles[key] == nil {
+            if let node = makeTile(key) {
+                addChild(node)
+                tiles[key] = node
+            }
+        }
+    }
+
+    /// Coarsest level that still has at least `pointScale` pixels per scene point.
+    private func levelIndex(pointScale: CGFloat) -> Int {
+        for index in stride(from: image.levels.count - 1, through: 0, by: -1) {
+            if CGFloat(image.levels[index].width) / displaySize.width >= pointScale {
+                return index
+            }
+        }
+        return 0
+    }
+
+    private func makeTile(_ key: TileKey) -> SKSpriteNode? {
+        guard let texture = image.texture(level: key.level, col: key.col, row: key.row) else {
+            return nil
+        }
+        let info = image.levels[key.level]
+        let rect = image.tileRect(level: key.level, col: key.col, row: key.row)
+        let sx = displaySize.width / CGFloat(info.width)
+        let sy = displaySize.height / CGFloat(info.height)
+
+        let node = SKSpriteNode(texture: texture, size: CGSize(width: rect.width * sx, height: rect.height * sy))
+        node.anchorPoint = CGPoint(x: 0, y: 1)
+        node.position = CGPoint(x: rect.minX * sx - displaySize.width / 2, y: displaySize.height / 2 - rect.minY * sy)
+        // Finer levels draw above coarser ones.
+        node.zPosition = 1 + CGFloat(image.levels.count - key.level)
+        return node
+    }
+}
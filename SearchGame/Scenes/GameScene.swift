@@ -9,6 +9,7 @@ class GameScene: SKScene {
     private var itemCounters: [String: (icon: SKNode, label: SKLabelNode, found: Int, total: Int)] = [:]
     
     private var worldBuilder: WorldBuilder?
+    private let levelId = "level1"
     private var worldSize = CGSize(width: 2400, height: 1400)  // Scrollable world
     
     private var searchableItems: [SearchableItemNode] = []
@@ -41,7 +42,7 @@ class GameScene: SKScene {
     
     private func buildWorld() {
         // Create procedural animated world
-        worldBuilder = WorldBuilder(scene: self, worldSize: worldSize)
+        worldBuilder = WorldBuilder(scene: self, worldSize: worldSize, levelId: levelId)
         worldBuilder?.buildWorld()
         
         // Get searchable items from world builder
@@ -226,6 +227,21 @@ class GameScene: SKScene {
     override func update(_ currentTime: TimeInterval) {
         super.update(currentTime)
         updateTimer()
+        updateBackground()
+    }
+    
+    private func updateBackground() {
+        guard let cameraNode = cameraNode else { return }
+        // .resizeFill: one scene point per view point, scaled by the camera.
+        let visibleSize = CGSize(width: size.width * cameraNode.xScale, height: size.height * cameraNode.yScale)
+        let visibleRect = CGRect(
+            x: cameraNode.position.x - visibleSize.width / 2,
+            y: cameraNode.position.y - visibleSize.height / 2,
+            width: visibleSize.width,
+            height: visibleSize.height
+        )
+        let pointScale = (view?.contentScaleFactor ?? 1) / max(cameraNode.xScale, 0.01)
+        worldBuilder?.updateVisibleRect(visibleRect, pointScale: pointScale)
     }
     
     private func updateTimer() {
@@ -297,10 +313,10 @@ class GameScene: SKScene {
             }
         }
         
-        // Check searchable items
+        // Check searchable items; frames include transparent margins, so confirm with the hit mask.
         let touchedNodes = nodes(at: locationInScene)
         for node in touchedNodes {
-            if let searchable = node as? SearchableItemNode {
+            if let searchable = node as? SearchableItemNode, searchable.isHit(at: locationInScene, in: self) {
                 searchable.handleTap()
                 break
             }
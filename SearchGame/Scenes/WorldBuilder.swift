@@ -5,6 +5,8 @@ class WorldBuilder {
     
     private weak var scene: SKScene?
     private var worldSize: CGSize
+    private let levelId: String
+    private lazy var level: Level? = try? LevelLoader.load(levelId: levelId)
     
     // World layers
     private var groundLayer: SKNode!
@@ -17,9 +19,13 @@ class WorldBuilder {
     private(set) var animatedNodes: [SKNode] = []
     private(set) var searchableNodes: [SearchableItemNode] = []
     
-    init(scene: SKScene, worldSize: CGSize) {
+    // Streamed background, when the level's background was exported as tiles
+    private var tiledBackground: TiledBackgroundNode?
+    
+    init(scene: SKScene, worldSize: CGSize, levelId: String) {
         self.scene = scene
         self.worldSize = worldSize
+        self.levelId = levelId
         setupLayers()
     }
     
@@ -47,6 +53,8 @@ class WorldBuilder {
     
     // MARK: - Build World
     
+    /// Decorations come from `AssetLoader.spriteNode(named:size:)`: with Generated/assetinfo.json
+    /// they are placed at once as flat-color placeholders and get their textures when decoded.
     func buildWorld() {
         buildGround()
         buildSky()
@@ -62,6 +70,20 @@ class WorldBuilder {
     // MARK: - Ground & Sky
     
     private func buildGround() {
+        // Tiled background from scripts/tile_backgrounds.py, aspect-filled over the world
+        if let name = level?.background, let image = AssetLoader.tiledImage(named: name) {
+            let fill = max(worldSize.width / image.size.width, worldSize.height / image.size.height)
+            let background = TiledBackgroundNode(
+                image: image,
+                displaySize: CGSize(width: image.size.width * fill, height: image.size.height * fill)
+            )
+            background.position = CGPoint(x: worldSize.width / 2, y: worldSize.height / 2)
+            background.zPosition = -110
+            scene?.addChild(background)
+            tiledBackground = background
+            return
+        }
+        
         // Sky gradient (top half)
         let skyNode = SKSpriteNode(color: SKColor(red: 0.85, green: 0.92, blue: 0.98, alpha: 1.0), size: CGSize(width: worldSize.width, height: worldSize.height * 0.6))
         skyNode.position = CGPoint(x: worldSize.width / 2, y: worldSize.height * 0.7)
@@ -77,9 +99,7 @@ class WorldBuilder {
     
     private func buildSky() {
         // Sun
-        if let sunTexture = AssetLoader.texture(named: "sun") {
-            let sun = SKSpriteNode(texture: sunTexture)
-            sun.size = CGSize(width: 80, height: 80)
+        if let sun = AssetLoader.spriteNode(named: "sun", size: CGSize(width: 80, height: 80)) {
             sun.position = CGPoint(x: worldSize.width * 0.85, y: worldSize.height * 0.9)
             skyLayer.addChild(sun)
             
@@ -93,9 +113,8 @@ class WorldBuilder {
         
         // Clouds - moving across screen
         for idx in 0..<5 {
-            if let cloudTexture = AssetLoader.texture(named: "cloud") {
-                let cloud = SKSpriteNode(texture: cloudTexture)
-                cloud.size = CGSize(width: CGFloat.random(in: 80...120), height: CGFloat.random(in: 40...60))
+            let cloudSize = CGSize(width: CGFloat.random(in: 80...120), height: CGFloat.random(in: 40...60))
+            if let cloud = AssetLoader.spriteNode(named: "cloud", size: cloudSize) {
                 let startX = CGFloat(idx) * (worldSize.width / 4) + CGFloat.random(in: -50...50)
                 cloud.position = CGPoint(x: startX, y: worldSize.height * CGFloat.random(in: 0.8...0.95))
                 cloud.alpha = 0.9
@@ -123,9 +142,7 @@ class WorldBuilder {
         
         for (idx, pos) in treePositions.enumerated() {
             let treeType = treeTypes[idx % treeTypes.count]
-            if let texture = AssetLoader.texture(named: treeType) {
-                let tree = SKSpriteNode(texture: texture)
-                tree.size = CGSize(width: 100 * pos.scale, height: 120 * pos.scale)
+            if let tree = AssetLoader.spriteNode(named: treeType, size: CGSize(width: 100 * pos.scale, height: 120 * pos.scale)) {
                 tree.position = CGPoint(x: worldSize.width * pos.xRatio, y: worldSize.height * pos.yRatio)
                 backLayer.addChild(tree)
                 
@@ -149,9 +166,7 @@ class WorldBuilder {
         
         for (idx, pos) in housePositions.enumerated() {
             let houseType = houseTypes[idx % houseTypes.count]
-            if let texture = AssetLoader.texture(named: houseType) {
-                let house = SKSpriteNode(texture: texture)
-                house.size = CGSize(width: 110, height: 100)
+            if let house = AssetLoader.spriteNode(named: houseType, size: CGSize(width: 110, height: 100)) {
                 house.position = CGPoint(x: worldSize.width * pos.xRatio, y: worldSize.height * pos.yRatio)
                 backLayer.addChild(house)
             }
@@ -159,46 +174,40 @@ class WorldBuilder {
     }
     
     private func buildFences() {
-        if let fenceTexture = AssetLoader.texture(named: "fence") {
-            // Row of fences at bottom
-            let fenceWidth: CGFloat = 100
-            let fenceY = worldSize.height * 0.18
-            var xPos: CGFloat = fenceWidth / 2
-            
-            while xPos < worldSize.width {
-                let fence = SKSpriteNode(texture: fenceTexture)
-                fence.size = CGSize(width: fenceWidth, height: 40)
-                fence.position = CGPoint(x: xPos, y: fenceY)
-                midLayer.addChild(fence)
-                xPos += fenceWidth * 0.9  // Slight overlap
-            }
+        // Row of fences at bottom
+        let fenceWidth: CGFloat = 100
+        let fenceY = worldSize.height * 0.18
+        var xPos: CGFloat = fenceWidth / 2
+        
+        while xPos < worldSize.width,
+              let fence = AssetLoader.spriteNode(named: "fence", size: CGSize(width: fenceWidth, height: 40)) {
+            fence.position = CGPoint(x: xPos, y: fenceY)
+            midLayer.addChild(fence)
+            xPos += fenceWidth * 0.9  // Slight overlap
         }
     }
     
     private func buildBushes() {
-        if let bushTexture = AssetLoader.texture(named: "bush") {
-            let bushPositions: [CGPoint] = [
-                CGPoint(x: worldSize.width * 0.08, y: worldSize.height * 0.25),
-                CGPoint(x: worldSize.width * 0.22, y: worldSize.height * 0.22),
-                CGPoint(x: worldSize.width * 0.45, y: worldSize.height * 0.24),
-                CGPoint(x: worldSize.width * 0.68, y: worldSize.height * 0.23),
-                CGPoint(x: worldSize.width * 0.88, y: worldSize.height * 0.25)
-            ]
+        let bushPositions: [CGPoint] = [
+            CGPoint(x: worldSize.width * 0.08, y: worldSize.height * 0.25),
+            CGPoint(x: worldSize.width * 0.22, y: worldSize.height * 0.22),
+            CGPoint(x: worldSize.width * 0.45, y: worldSize.height * 0.24),
+            CGPoint(x: worldSize.width * 0.68, y: worldSize.height * 0.23),
+            CGPoint(x: worldSize.width * 0.88, y: worldSize.height * 0.25)
+        ]
+        
+        for pos in bushPositions {
+            guard let bush = AssetLoader.spriteNode(named: "bush", size: CGSize(width: 50, height: 35)) else { break }
+            bush.position = pos
+            midLayer.addChild(bush)
             
-            for pos in bushPositions {
-                let bush = SKSpriteNode(texture: bushTexture)
-                bush.size = CGSize(width: 50, height: 35)
-                bush.position = pos
-                midLayer.addChild(bush)
-                
-                // Gentle sway
-                let sway = SKAction.sequence([
-                    SKAction.rotate(byAngle: 0.01, duration: 1.5),
-                    SKAction.rotate(byAngle: -0.02, duration: 3),
-                    SKAction.rotate(byAngle: 0.01, duration: 1.5)
-                ])
-                bush.run(SKAction.repeatForever(sway))
-            }
+            // Gentle sway
+            let sway = SKAction.sequence([
+                SKAction.rotate(byAngle: 0.01, duration: 1.5),
+                SKAction.rotate(byAngle: -0.02, duration: 3),
+                SKAction.rotate(byAngle: 0.01, duration: 1.5)
+            ])
+            bush.run(SKAction.repeatForever(sway))
         }
     }
     
@@ -208,9 +217,7 @@ class WorldBuilder {
         // Scatter flowers on ground
         for _ in 0..<20 {
             let flowerType = flowerTypes.randomElement()!
-            if let texture = AssetLoader.texture(named: flowerType) {
-                let flower = SKSpriteNode(texture: texture)
-                flower.size = CGSize(width: 20, height: 25)
+            if let flower = AssetLoader.spriteNode(named: flowerType, size: CGSize(width: 20, height: 25)) {
                 flower.position = CGPoint(
                     x: CGFloat.random(in: 50...(worldSize.width - 50)),
                     y: CGFloat.random(in: worldSize.height * 0.08...worldSize.height * 0.2)
@@ -242,9 +249,7 @@ class WorldBuilder {
         
         for (idx, pos) in catPositions.enumerated() {
             let catType = catTypes[idx % catTypes.count]
-            if let texture = AssetLoader.texture(named: catType) {
-                let cat = SKSpriteNode(texture: texture)
-                cat.size = CGSize(width: 40, height: 35)
+            if let cat = AssetLoader.spriteNode(named: catType, size: CGSize(width: 40, height: 35)) {
                 cat.position = CGPoint(x: pos.x, y: pos.y)
                 cat.name = "decoration_cat"
                 frontLayer.addChild(cat)
@@ -264,9 +269,7 @@ class WorldBuilder {
         }
         
         // Walking person
-        if let personTexture = AssetLoader.texture(named: "person") {
-            let person = SKSpriteNode(texture: personTexture)
-            person.size = CGSize(width: 35, height: 50)
+        if let person = AssetLoader.spriteNode(named: "person", size: CGSize(width: 35, height: 50)) {
             person.position = CGPoint(x: worldSize.width * 0.3, y: worldSize.height * 0.32)
             person.name = "decoration_person"
             frontLayer.addChild(person)
@@ -284,27 +287,24 @@ class WorldBuilder {
         }
         
         // Pandas sitting and bobbing
-        if let pandaTexture = AssetLoader.texture(named: "panda") {
-            let pandaPositions = [
-                CGPoint(x: worldSize.width * 0.18, y: worldSize.height * 0.35),
-                CGPoint(x: worldSize.width * 0.65, y: worldSize.height * 0.33)
-            ]
+        let pandaPositions = [
+            CGPoint(x: worldSize.width * 0.18, y: worldSize.height * 0.35),
+            CGPoint(x: worldSize.width * 0.65, y: worldSize.height * 0.33)
+        ]
+        
+        for pos in pandaPositions {
+            guard let panda = AssetLoader.spriteNode(named: "panda", size: CGSize(width: 45, height: 50)) else { break }
+            panda.position = pos
+            panda.name = "decoration_panda"
+            frontLayer.addChild(panda)
             
-            for pos in pandaPositions {
-                let panda = SKSpriteNode(texture: pandaTexture)
-                panda.size = CGSize(width: 45, height: 50)
-                panda.position = pos
-                panda.name = "decoration_panda"
-                frontLayer.addChild(panda)
-                
-                // Gentle bobbing
-                let bob = SKAction.sequence([
-                    SKAction.moveBy(x: 0, y: 5, duration: 1.5),
-                    SKAction.moveBy(x: 0, y: -5, duration: 1.5)
-                ])
-                panda.run(SKAction.repeatForever(bob))
-                animatedNodes.append(panda)
-            }
+            // Gentle bobbing
+            let bob = SKAction.sequence([
+                SKAction.moveBy(x: 0, y: 5, duration: 1.5),
+                SKAction.moveBy(x: 0, y: -5, duration: 1.5)
+            ])
+            panda.run(SKAction.repeatForever(bob))
+            animatedNodes.append(panda)
         }
     }
     
@@ -323,16 +323,30 @@ class WorldBuilder {
         ]
         
         for config in searchableConfigs {
-            let positions = generateSearchablePositions(count: config.count)
-            
-            for pos in positions {
-                let item = SearchableItemNode(type: config.type, animation: config.animation)
-                item.position = pos
-                item.delegate = scene
-                item.zPosition = frontLayer.zPosition + 10
-                scene.addChild(item)
-                searchableNodes.append(item)
-            }
+            let positions = placedPositions(type: config.type, count: config.count)
+                ?? generateSearchablePositions(count: config.count)
+            addSearchableItems(type: config.type, animation: config.animation, at: positions, in: scene)
+        }
+    }
+    
+    /// Positions scripts/place_items.py laid out for `type` in the level file; nil means place randomly.
+    private func placedPositions(type: String, count: Int) -> [CGPoint]? {
+        guard let config = level?.searchItems.first(where: { $0.type == type }),
+              config.placedBy == SearchItemConfig.placedByTool,
+              let positions = config.positions, positions.count >= count else {
+            return nil
+        }
+        return positions.prefix(count).map { $0.cgPoint }
+    }
+    
+    private func addSearchableItems(type: String, animation: AnimationType, at positions: [CGPoint], in scene: GameScene) {
+        for pos in positions {
+            let item = SearchableItemNode(type: type, animation: animation)
+            item.position = pos
+            item.delegate = scene
+            item.zPosition = frontLayer.zPosition + 10
+            scene.addChild(item)
+            searchableNodes.append(item)
         }
     }
     
@@ -350,9 +364,18 @@ class WorldBuilder {
         return positions
     }
     
+    // MARK: - Background Streaming
+    
+    /// Load background tiles for the part of the world on screen; call when the camera moves.
+    func updateVisibleRect(_ rect: CGRect, pointScale: CGFloat) {
+        tiledBackground?.update(visibleRect: rect, pointScale: pointScale)
+    }
+    
     // MARK: - Cleanup
     
     func cleanup() {
+        tiledBackground?.removeFromParent()
+        tiledBackground = nil
         groundLayer?.removeFromParent()
         backLayer?.removeFromParent()
         midLayer?.removeFromParent()
@@ -3,9 +3,50 @@ import UIKit
 import SpriteKit
 
 enum AssetLoader {
+    /// Screen scale used to pick @1x/@2x/@3x variants.
+    private static let deviceScale = max(1, min(3, Int(UIScreen.main.scale.rounded())))
+
+    /// Sprite atlases packed by `scripts/pack_atlas.py`, if bundled: downscaled frames for this
+    /// screen scale (`sprites@2x.json`) and full-size frames (`sprites.json`).
+    private static let scaledAtlas = PackedAtlas.load(named: "sprites@\(deviceScale)x", subdirectory: "Generated/atlas")
+    private static let atlas = PackedAtlas.load(named: "sprites", subdirectory: "Generated/atlas")
+
+    /// Tap masks and outlines precomputed by `scripts/hit_shapes.py` (Generated/hitshapes.json).
+    private static let hitShapes: [String: HitShape] = {
+        guard let url = Bundle.main.url(forResource: "hitshapes", withExtension: "json", subdirectory: "Generated"),
+              let data = try? Data(contentsOf: url),
+              let manifest = try? JSONDecoder().decode(HitShape.Manifest.self, from: data) else {
+            return [:]
+        }
+        return manifest.sprites.compactMapValues(HitShape.init)
+    }()
+
+    /// Size, trim, anchor, average color and content hash of every generated asset,
+    /// written by `scripts/asset_info.py` (Generated/assetinfo.json).
+    private static let assetInfos: [String: AssetInfo] = {
+        guard let url = Bundle.main.url(forResource: "assetinfo", withExtension: "json", subdirectory: "Generated"),
+              let data = try? Data(contentsOf: url),
+              let manifest = try? JSONDecoder().decode(AssetInfo.Manifest.self, from: data) else {
+            return [:]
+        }
+        return manifest.assets.compactMapValues(AssetInfo.init)
+    }()
+
+    /// Textures decoded by `spriteNode(named:size:)`, with the content hash they were decoded from.
+    /// Main thread only.
+    private static var decodedTextures: [String: (hash: String, texture: SKTexture)] = [:]
+    /// Nodes waiting for a texture that is being decoded. Main thread only.
+    private static var pendingNodes: [String: [SKSpriteNode]] = [:]
+    private static let decodeQueue = DispatchQueue(label: "AssetLoader.decode", qos: .userInitiated)
+
     /// Load a PNG from `SearchGame/Resources/Generated/` (bundled as resources).
     /// Example: name="duck" -> Generated/duck.png
+    /// Variants sized for on-screen use (`Generated/scaled/duck@2x.png`) are preferred,
+    /// then atlas frames, which share one texture per page.
     static func generatedTexture(named name: String) -> SKTexture? {
+        if let texture = scaledAtlas?.texture(named: name) ?? scaledTexture(named: name) ?? atlas?.texture(named: name) {
+            return texture
+        }
         if let url = Bundle.main.url(forResource: name, withExtension: "png", subdirectory: "Generated"),
            let img = UIImage(contentsOfFile: url.path) {
             return SKTexture(image: img)
@@ -13,6 +54,15 @@ enum AssetLoader {
         return nil
     }
 
+    /// Downscaled variant for this screen: Generated/scaled/<name>@<scale>x.png.
+    private static func scaledTexture(named name: String) -> SKTexture? {
+        guard let url = Bundle.main.url(forResource: "\(name)@\(deviceScale)x", withExtension: "png", subdirectory: "Generated/scaled"),
+              let img = UIImage(contentsOfFile: url.path) else {
+            return nil
+        }
+        return SKTexture(image: img)
+    }
+
     /// Load an image from Asset Catalog (or main bundle by name).
     static func catalogTexture(named name: String) -> SKTexture? {
         if let img = UIImage(named: name) {
@@ -25,4 +75,324 @@ enum AssetLoader {
     static func texture(named name: String) -> SKTexture? {
         generatedTexture(named: name) ?? catalogTexture(named: name)
     }
+
+    /// Precomputed hit data for a generated sprite, if the pipeline wrote one.
+    static func hitShape(named name: String) -> HitShape? {
+        hitShapes[name]
+    }
+
+    /// Metadata of a generated asset, available without decoding its image.
+    static func assetInfo(named name: String) -> AssetInfo? {
+        assetInfos[name]
+    }
+
+    /// A node of `size` for a generated asset that can be placed right away: it shows the asset's
+    /// average color until the texture has been decoded in the background. Decoded textures are
+    /// reused by later calls (e.g. when the world is rebuilt) as long as the asset's content hash
+    /// is unchanged. Assets without metadata load synchronously, like `texture(named:)`.
+    /// Call on the main thread.
+    static func spriteNode(named name: String, size: CGSize) -> SKSpriteNode? {
+        guard let info = assetInfos[name] else {
+            return texture(named: name).map { SKSpriteNode(texture: $0, size: size) }
+        }
+        if let cached = decodedTextures[name], cached.hash == info.hash {
+            return SKSpriteNode(texture: cached.texture, size: size)
+        }
+
+        let node = SKSpriteNode(color: info.color.withAlphaComponent(CGFloat(info.coverage)), size: size)
+        if pendingNodes[name] != nil {
+            pendingNodes[name]?.append(node)
+            return node
+        }
+        pendingNodes[name] = [node]
+        decodeQueue.async {
+            let texture = generatedTexture(named: name)
+            let finish = {
+                DispatchQueue.main.async {
+                    let nodes = pendingNodes.removeValue(forKey: name) ?? []
+                    guard let texture = texture else { return }
+                    decodedTextures[name] = (info.hash, texture)
+                    for node in nodes {
+                        node.texture = texture
+                        node.color = .white
+                    }
+                }
+            }
+            if let texture = texture {
+                texture.preload(completionHandler: finish)
+            } else {
+                finish()
+            }
+        }
+        return node
+    }
+
+    /// Tiles and mip levels of a background, written by `scripts/tile_backgrounds.py`
+    /// (Generated/tiles/<name>/tiles.json), if bundled.
+    static func tiledImage(named name: String) -> TiledImage? {
+        TiledImage.load(named: name, subdirectory: "Generated/tiles/\(name)")
+    }
+}
+
+// MARK: - Asset Info
+
+/// Per-asset metadata from Generated/assetinfo.json.
+struct AssetInfo {
+    fileprivate struct Manifest: Decodable {
+        struct Asset: Decodable {
+            let w: Int
+            let h: Int
+            let trim: [Int]
+            let coverage: Double
+            let anchor: [CGFloat]
+            let color: String
+            let hash: String
+        }
+
+        let assets: [String: Asset]
+    }
+
+    /// Image size in pixels.
+    let size: CGSize
+    /// Where the image was cropped from the raw generated image, top-left origin.
+    let trimRect: CGRect
+    /// Size of the raw generated image before the crop.
+    let untrimmedSize: CGSize
+    /// Share of opaque pixels.
+    let coverage: Double
+    /// Suggested anchor point: bottom-center of what the sprite stands on.
+    let anchorPoint: CGPoint
+    /// Average color of the opaque pixels.
+    let color: SKColor
+    /// Changes whenever the image file changes.
+    let hash: String
+
+    fileprivate init?(_ asset: Manifest.Asset) {
+        guard asset.w > 0, asset.h > 0, asset.trim.count == 4, asset.anchor.count == 2,
+              asset.color.hasPrefix("#"), let rgb = UInt32(asset.color.dropFirst(), radix: 16) else {
+            return nil
+        }
+        size = CGSize(width: asset.w, height: asset.h)
+        trimRect = CGRect(x: asset.trim[0], y: asset.trim[1], width: asset.w, height: asset.h)
+        untrimmedSize = CGSize(width: asset.trim[2], height: asset.trim[3])
+        coverage = asset.coverage
+        anchorPoint = CGPoint(x: asset.anchor[0], y: asset.anchor[1])
+        color = SKColor(
+            red: CGFloat((rgb >> 16) & 0xFF) / 255,
+            green: CGFloat((rgb >> 8) & 0xFF) / 255,
+            blue: CGFloat(rgb & 0xFF) / 255,
+            alpha: 1
+        )
+        hash = asset.hash
+    }
+}
+
+// MARK: - Tiled Images
+
+/// A large image split into fixed-size tiles, with a chain of half-size levels.
+/// Level 0 is full size; tile (0, 0) of every level is its top-left corner.
+struct TiledImage {
+    struct Level: Decodable {
+        let width: Int
+        let height: Int
+        let cols: Int
+        let rows: Int
+    }
+
+    private struct Manifest: Decodable {
+        let width: Int
+        let height: Int
+        let tile: Int
+        let levels: [Level]
+    }
+
+    /// Full-size image in pixels.
+    let size: CGSize
+    /// Tile edge in pixels; edge tiles may be smaller.
+    let tileSize: Int
+    let levels: [Level]
+    private let directory: URL
+
+    static func load(named name: String, subdirectory: String) -> TiledImage? {
+        guard let url = Bundle.main.url(forResource: "tiles", withExtension: "json", subdirectory: subdirectory),
+              let data = try? Data(contentsOf: url),
+              let manifest = try? JSONDecoder().decode(Manifest.self, from: data),
+              manifest.tile > 0, !manifest.levels.isEmpty else {
+            return nil
+        }
+        return TiledImage(
+            size: CGSize(width: manifest.width, height: manifest.height),
+            tileSize: manifest.tile,
+            levels: manifest.levels,
+            directory: url.deletingLastPathComponent()
+        )
+    }
+
+    /// Pixel rect of a tile within its level, top-left origin.
+    func tileRect(level: Int, col: Int, row: Int) -> CGRect {
+        let info = levels[level]
+        let x = col * tileSize
+        let y = row * tileSize
+        return CGRect(x: x, y: y, width: min(tileSize, info.width - x), height: min(tileSize, info.height - y))
+    }
+
+    /// Reads one tile from disk; callers cache what they keep on screen.
+    func texture(level: Int, col: Int, row: Int) -> SKTexture? {
+        let url = directory.appendingPathComponent("\(level)/\(col)_\(row).png")
+        guard let img = UIImage(contentsOfFile: url.path) else {
+            return nil
+        }
+        return SKTexture(image: img)
+    }
+}
+
+// MARK: - Hit Shapes
+
+/// Downsampled alpha mask and convex outline of a generated sprite.
+/// Both are in texture space, so they apply to any node size.
+struct HitShape {
+    fileprivate struct Manifest: Decodable {
+        struct Sprite: Decodable {
+            let cols: Int
+            let rows: Int
+            let mask: String
+            let polygon: [[CGFloat]]
+        }
+
+        let sprites: [String: Sprite]
+    }
+
+    let cols: Int
+    let rows: Int
+    /// Row-major bits, top row first, most significant bit first.
+    private let bits: [UInt8]
+    /// Outline in unit texture coordinates, bottom-left origin, counterclockwise.
+    let polygon: [CGPoint]
+
+    fileprivate init?(_ sprite: Manifest.Sprite) {
+        guard sprite.cols > 0, sprite.rows > 0,
+              let data = Data(base64Encoded: sprite.mask),
+              data.count * 8 >= sprite.cols * sprite.rows else {
+            return nil
+        }
+        cols = sprite.cols
+        rows = sprite.rows
+        bits = [UInt8](data)
+        polygon = sprite.polygon.compactMap { $0.count == 2 ? CGPoint(x: $0[0], y: $0[1]) : nil }
+    }
+
+    /// Whether unit texture coordinates (`u` right, `v` up) hit an opaque cell,
+    /// accepting cells up to `slop` cells away.
+    func contains(u: CGFloat, v: CGFloat, slop: Int = 0) -> Bool {
+        guard (0...1).contains(u), (0...1).contains(v) else { return false }
+        let col = min(cols - 1, Int(u * CGFloat(cols)))
+        let row = min(rows - 1, Int((1 - v) * CGFloat(rows)))
+        for r in max(0, row - slop)...min(rows - 1, row + slop) {
+            for c in max(0, col - slop)...min(cols - 1, col + slop) where isSet(row: r, col: c) {
+                return true
+            }
+        }
+        return false
+    }
+
+    /// The outline scaled to a sprite of `size` and `anchorPoint`, e.g. for `SKPhysicsBody(polygonFrom:)`.
+    func outlinePath(size: CGSize, anchorPoint: CGPoint = CGPoint(x: 0.5, y: 0.5)) -> CGPath? {
+        guard polygon.count >= 3 else { return nil }
+        let path = CGMutablePath()
+        path.addLines(between: polygon.map {
+            CGPoint(x: ($0.x - anchorPoint.x) * size.width, y: ($0.y - anchorPoint.y) * size.height)
+        })
+        path.closeSubpath()
+        return path
+    }
+
+    private func isSet(row: Int, col: Int) -> Bool {
+        let index = row * cols + col
+        return bits[index >> 3] & (0x80 >> UInt8(index & 7)) != 0
+    }
+}
+
+// MARK: - Packed Atlas
+
+/// Atlas pages plus a frame table, as written by `scripts/pack_atlas.py`.
+/// Frame coordinates are in page pixels with a top-left origin.
+private final class PackedAtlas {
+    private struct Manifest: Decodable {
+        struct Page: Decodable {
+            let file: String
+            let width: Int
+            let height: Int
+        }
+
+        struct Frame: Decodable {
+            let page: Int
+            let x: Int
+            let y: Int
+            let w: Int
+            let h: Int
+        }
+
+        let pages: [Page]
+        let frames: [String: Frame]
+    }
+
+    private let manifest: Manifest
+    private let directory: URL
+    private var pageTextures: [Int: SKTexture] = [:]
+    private var frameTextures: [String: SKTexture] = [:]
+    /// Guards the caches: frames are looked up from the main thread and AssetLoader's decode queue.
+    private let lock = NSLock()
+
+    private init(manifest: Manifest, directory: URL) {
+        self.manifest = manifest
+        self.directory = directory
+    }
+
+    static func load(named name: String, subdirectory: String) -> PackedAtlas? {
+        guard let url = Bundle.main.url(forResource: name, withExtension: "json", subdirectory: subdirectory),
+              let data = try? Data(contentsOf: url),
+              let manifest = try? JSONDecoder().decode(Manifest.self, from: data) else {
+            return nil
+        }
+        return PackedAtlas(manifest: manifest, directory: url.deletingLastPathComponent())
+    }
+
+    func texture(named name: String) -> SKTexture? {
+        lock.lock()
+        defer { lock.unlock() }
+        if let cached = frameTextures[name] {
+            return cached
+        }
+        guard let frame = manifest.frames[name],
+              frame.page < manifest.pages.count,
+              let pageTexture = page(frame.page) else {
+            return nil
+        }
+        let page = manifest.pages[frame.page]
+        let pageWidth = CGFloat(page.width)
+        let pageHeight = CGFloat(page.height)
+        // SKTexture(rect:in:) uses unit coordinates with a bottom-left origin.
+        let rect = CGRect(
+            x: CGFloat(frame.x) / pageWidth,
+            y: 1 - CGFloat(frame.y + frame.h) / pageHeight,
+            width: CGFloat(frame.w) / pageWidth,
+            height: CGFloat(frame.h) / pageHeight
+        )
+        let texture = SKTexture(rect: rect, in: pageTexture)
+        frameTextures[name] = texture
+        return texture
+    }
+
+    private func page(_ index: Int) -> SKTexture? {
+        if let cached = pageTextures[index] {
+            return cached
+        }
+        let url = directory.appendingPathComponent(manifest.pages[index].file)
+        guard let img = UIImage(contentsOfFile: url.path) else {
+            return nil
+        }
+        let texture = SKTexture(image: img)
+        pageTextures[index] = texture
+        return texture
+    }
 }
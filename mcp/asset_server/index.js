@@ -1,16 +1,115 @@
 import { Server } from "@modelcontextprotocol/sdk/server/index.js";
 import { StdioServerTransport } from "@modelcontextprotocol/sdk/server/stdio.js";
 import { z } from "@modelcontextprotocol/sdk/shared/zod.js";
-import { execFile } from "node:child_process";
-import { promisify } from "node:util";
+import { spawn } from "node:child_process";
+import readline from "node:readline";
 import path from "node:path";
 
-const execFileAsync = promisify(execFile);
+const repoRoot = path.resolve(new URL("../..", import.meta.url).pathname);
+
+// One long-lived scripts/asset_worker.py: imports, HTTP session and raw image cache stay warm
+// between tool calls. It speaks JSON lines on stdio (see the worker's docstring).
+class AssetWorker {
+  constructor() {
+    this.proc = null;
+    this.nextId = 1;
+    this.pending = new Map(); // request id -> { resolve, reject }
+    this.watchers = new Map(); // job id -> Set of (event) => void
+  }
+
+  ensureStarted() {
+    if (this.proc) return;
+    const script = path.join(repoRoot, "scripts", "asset_worker.py");
+    const proc = spawn("python3", [script], {
+      cwd: repoRoot,
+      env: process.env,
+      stdio: ["pipe", "pipe", "pipe"],
+    });
+    this.proc = proc;
+
+    readline.createInterface({ input: proc.stdout }).on("line", (line) => this.onLine(line));
+    // Worker diagnostics (argparse errors, tracebacks) go to our stderr, not the MCP stream.
+    proc.stderr.on("data", (chunk) => process.stderr.write(chunk));
+    proc.on("exit", (code, signal) => {
+      this.proc = null;
+      const err = new Error(`asset worker exited (${signal ?? code})`);
+      for (const { reject } of this.pending.values()) reject(err);
+      this.pending.clear();
+      for (const [job, watchers] of this.watchers) {
+        for (const watch of watchers) watch({ event: "job", job: { job, state: "failed", error: err.message } });
+      }
+      this.watchers.clear();
+    });
+  }
+
+  onLine(line) {
+    let msg;
+    try {
+      msg = JSON.parse(line);
+    } catch {
+      process.stderr.write(`asset worker: ${line}\n`);
+      return;
+    }
+    if (msg.id !== undefined && this.pending.has(msg.id)) {
+      const { resolve, reject } = this.pending.get(msg.id);
+      this.pending.delete(msg.id);
+      if (msg.error) reject(new Error(msg.error));
+      else resolve(msg.result);
+      return;
+    }
+    const jobId = msg.event === "job" ? msg.job?.job : msg.job;
+    for (const watch of this.watchers.get(jobId) ?? []) watch(msg);
+  }
+
+  request(method, params = {}) {
+    this.ensureStarted();
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      this.proc.stdin.write(JSON.stringify({ id, method, params }) + "\n");
+    });
+  }
+
+  watch(jobId, fn) {
+    if (!this.watchers.has(jobId)) this.watchers.set(jobId, new Set());
+    this.watchers.get(jobId).add(fn);
+    return () => this.watchers.get(jobId)?.delete(fn);
+  }
+
+  // Resolves with the final job state, or with the latest one after `timeoutMs` (the job keeps running).
+  waitForJob(jobId, onProgress, timeoutMs) {
+    const finished = (job) => ["done", "failed", "cancelled"].includes(job.state);
+    return new Promise((resolve) => {
+      let timer = null;
+      const finish = (job) => {
+        clearTimeout(timer);
+        unwatch();
+        resolve(job);
+      };
+      const unwatch = this.watch(jobId, (msg) => {
+        if (msg.event === "progress") onProgress(msg);
+        if (msg.event === "job" && finished(msg.job)) finish(msg.job);
+      });
+      // The job may have finished (e.g. everything up to date) before we started watching.
+      this.request("status", { job: jobId })
+        .then((job) => finished(job) && finish(job))
+        .catch(() => {});
+      if (timeoutMs > 0) {
+        timer = setTimeout(async () => {
+          unwatch();
+          resolve(await this.request("status", { job: jobId }).catch(() => ({ job: jobId, state: "unknown" })));
+        }, timeoutMs);
+      }
+    });
+  }
+}
+
+const worker = new AssetWorker();
 
 const server = new Server(
   {
     name: "searchgame-assets",
-    version: "0.1.0",
+    version: "0.2.0",
   },
   {
     capabilities: {
@@ -19,47 +118,118 @@ const server = new Server(
   }
 );
 
+function summarize(job) {
+  const lines = [`Job ${job.job}: ${job.state} (${job.done ?? 0}/${job.total ?? 0} assets)`];
+  for (const [name, status] of Object.entries(job.assets ?? {})) {
+    lines.push(`  ${name}: ${status}`);
+  }
+  if (job.error) lines.push(`Error: ${job.error}`);
+  if (job.log?.length) lines.push("", ...job.log);
+  return lines.join("\n");
+}
+
+function textResult(text, isError = false) {
+  return { content: [{ type: "text", text }], ...(isError ? { isError: true } : {}) };
+}
+
 const GenerateAssetsInput = z.object({
-  background: z.boolean().default(true).describe("Generate background image(s)"),
-  duck: z.boolean().default(true).describe("Generate duck sprite"),
+  assets: z
+    .array(z.string())
+    .optional()
+    .describe("Catalog asset names or globs (e.g. [\"panda\", \"bg_*\"]). Omit for the whole catalog."),
+  background: z.boolean().optional().describe("Shorthand for the background assets (bg_*)"),
+  force: z.boolean().default(false).describe("Rebuild even if the build manifest says the assets are up to date"),
+  candidates: z.number().int().min(1).optional().describe("Sprites: images per attempt, best one kept"),
+  webp: z.boolean().optional().describe("Also write lossless WebP files"),
+  atlas: z.boolean().optional().describe("Repack the sprite atlas afterwards"),
+  wait: z.boolean().default(true).describe("Wait for the job to finish; false returns the job id at once"),
+  timeoutSeconds: z
+    .number()
+    .min(0)
+    .default(600)
+    .describe("With wait: stop waiting after this long (the job keeps running; 0 = no limit)"),
 });
 
 server.tool(
   "generate_assets",
-  "Generate (or regenerate) game assets into SearchGame/Resources/Generated using scripts/generate_assets.py",
+  "Generate (or regenerate) game assets into SearchGame/Resources/Generated. Only the selected assets are built; up-to-date ones are skipped unless force is set.",
   GenerateAssetsInput,
-  async (_args) => {
-    // For now, scripts/generate_assets.py always generates bg_farm_day + duck.
-    // We keep args for future extension.
-    const repoRoot = path.resolve(new URL("../..", import.meta.url).pathname);
-    const script = path.join(repoRoot, "scripts", "generate_assets.py");
+  async (args, extra) => {
+    let assets = args.assets ?? [];
+    if (args.background) assets = [...assets, "bg_*"];
+
+    const params = { assets, force: args.force };
+    for (const key of ["candidates", "webp", "atlas"]) {
+      if (args[key] !== undefined) params[key] = args[key];
+    }
 
     try {
-      const { stdout, stderr } = await execFileAsync("python3", [script], {
-        cwd: repoRoot,
-        env: process.env,
-        timeout: 10 * 60 * 1000,
-        maxBuffer: 10 * 1024 * 1024,
-      });
+      const job = await worker.request("submit", params);
+      if (!args.wait) {
+        return textResult(`${summarize(job)}\n\nCheck progress with asset_job_status, stop it with cancel_asset_job.`);
+      }
 
-      const text = [stdout, stderr].filter(Boolean).join("\n").trim();
-
-      return {
-        content: [
-          {
-            type: "text",
-            text:
-              (text ? text + "\n\n" : "") +
-              "Generated files should be in SearchGame/Resources/Generated (e.g., bg_farm_day.png, duck.png).",
-          },
-        ],
+      const progressToken = extra?._meta?.progressToken;
+      const onProgress = (msg) => {
+        if (progressToken === undefined) return;
+        extra
+          .sendNotification({
+            method: "notifications/progress",
+            params: {
+              progressToken,
+              progress: msg.done,
+              total: msg.total,
+              message: `${msg.asset}: ${msg.status}${msg.detail ? ` (${msg.detail})` : ""}`,
+            },
+          })
+          .catch(() => {});
       };
+      const final = await worker.waitForJob(job.job, onProgress, args.timeoutSeconds * 1000);
+      const status = await worker.request("status", { job: job.job }).catch(() => final);
+      const text = summarize(status);
+      return textResult(
+        status.state === "done" || status.state === "running" || status.state === "queued"
+          ? text
+          : `Generation ${status.state}.\n${text}`,
+        status.state === "failed"
+      );
     } catch (e) {
       const msg = e?.message ?? String(e);
-      return {
-        content: [{ type: "text", text: `Generation failed: ${msg}` }],
-        isError: true,
-      };
+      return textResult(`Generation failed: ${msg}`, true);
+    }
+  }
+);
+
+server.tool(
+  "asset_job_status",
+  "Status of an asset generation job (per-asset results and recent log lines), or of all jobs.",
+  z.object({
+    job: z.string().optional().describe("Job id returned by generate_assets; omit to list all jobs"),
+  }),
+  async (args) => {
+    try {
+      if (!args.job) {
+        const { jobs } = await worker.request("status");
+        return textResult(jobs.length ? jobs.map(summarize).join("\n\n") : "No jobs yet.");
+      }
+      return textResult(summarize(await worker.request("status", { job: args.job })));
+    } catch (e) {
+      return textResult(e?.message ?? String(e), true);
+    }
+  }
+);
+
+server.tool(
+  "cancel_asset_job",
+  "Cancel an asset generation job. Queued jobs are dropped; running ones stop after the assets in progress.",
+  z.object({
+    job: z.string().describe("Job id returned by generate_assets"),
+  }),
+  async (args) => {
+    try {
+      return textResult(summarize(await worker.request("cancel", { job: args.job })));
+    } catch (e) {
+      return textResult(e?.message ?? String(e), true);
     }
   }
 );
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Per-asset metadata the game can read without decoding any PNG.
+
+Output: SearchGame/Resources/Generated/assetinfo.json, loaded by AssetLoader.assetInfo(named:).
+  {
+    "version": 1,
+    "assets": {
+      "<name>": {
+        "w": 412, "h": 388,              # pixels of <name>.png
+        "trim": [x, y, w, h],            # where the PNG sits in the raw API image, and that image's size
+        "coverage": 0.61,                # share of pixels with alpha >= OPAQUE_ALPHA
+        "anchor": [0.5, 0.01],           # suggested anchor point, unit coordinates, bottom-left origin
+        "color": "#a8c890",              # average color of the opaque pixels (placeholders)
+        "hash": "<16 hex>"               # SHA-256 prefix of the PNG file
+      }
+    }
+  }
+
+generate_assets.py updates entries as assets are written; to rebuild from existing files:
+  python scripts/asset_info.py
+
+Notes:
+- The trim offset is not recoverable from the pixels: background removal stores it in the
+  PNG as a "trim" text chunk ("x,y,w,h"), which is read back here. Assets that were never
+  trimmed (backgrounds) get [0, 0, w, h].
+- The anchor is the bottom-center of what the sprite stands on: the mean x of the opaque
+  pixels in the lowest FOOT_SHARE of its rows, at the lowest opaque row. Fully opaque
+  images get (0.5, 0.5).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+
+ROOT = Path(__file__).resolve().parents[1]
+GENERATED_DIR = ROOT / "SearchGame" / "Resources" / "Generated"
+ASSET_INFO_NAME = "assetinfo.json"
+FORMAT_VERSION = 1
+TRIM_KEY = "trim"
+OPAQUE_ALPHA = 128
+# Lowest share of the opaque rows averaged for the anchor's x.
+FOOT_SHARE = 0.1
+HASH_CHARS = 16
+
+_lock = threading.Lock()
+
+
+def trim_text(x: int, y: int, w: int, h: int) -> str:
+    """Value of the "trim" PNG text chunk: the crop offset and the size of the uncropped image."""
+    return f"{x},{y},{w},{h}"
+
+
+def parse_trim(value: Any, size: tuple[int, int]) -> list[int]:
+    """[x, y, w, h] from a "trim" text chunk; an untrimmed `size` image if it is missing or malformed."""
+    try:
+        x, y, w, h = (int(v) for v in str(value).split(","))
+    except ValueError:
+        return [0, 0, size[0], size[1]]
+    return [x, y, w, h]
+
+
+def suggested_anchor(alpha: np.ndarray) -> tuple[float, float]:
+    """Bottom-center of the opaque pixels in unit coordinates (bottom-left origin)."""
+    h, w = alpha.shape
+    opaque = alpha >= OPAQUE_ALPHA
+    rows = np.flatnonzero(opaque.any(axis=1))
+    if len(rows) == 0 or opaque.all():
+        return 0.5, 0.5
+    top, bottom = int(rows[0]), int(rows[-1])
+    foot_top = bottom - max(1, round((bottom - top + 1) * FOOT_SHARE)) + 1
+    _, xs = np.nonzero(opaque[foot_top : bottom + 1])
+    x = (float(xs.mean()) + 0.5) / w
+    return round(x, 4), round(1 - (bottom + 1) / h, 4)
+
+
+def asset_info(path: Path) -> dict[str, Any]:
+    """Metadata entry for one PNG."""
+    data = path.read_bytes()
+    with Image.open(path) as im:
+        trim = parse_trim(im.info.get(TRIM_KEY), im.size)
+        rgba = np.asarray(im.convert("RGBA"))
+    alpha = rgba[..., 3]
+    opaque = alpha >= OPAQUE_ALPHA
+    h, w = alpha.shape
+    if opaque.any():
+        r, g, b = (int(round(v)) for v in rgba[..., :3][opaque].mean(axis=0))
+    else:
+        r = g = b = 0
+    return {
+        "w": w,
+        "h": h,
+        "trim": trim,
+        "coverage": round(float(opaque.mean()), 4),
+        "anchor": list(suggested_anchor(alpha)),
+        "color": f"#{r:02x}{g:02x}{b:02x}",
+        "hash": hashlib.sha256(data).hexdigest()[:HASH_CHARS],
+    }
+
+
+def update_asset_info(out_dir: Path, assets: dict[str, Path]) -> None:
+    """Recompute entries for `assets` (name -> PNG) in <out_dir>/assetinfo.json, keeping the others."""
+    infos = {name: asset_info(path) for name, path in assets.items()}
+    if not infos:
+        return
+    path = out_dir / ASSET_INFO_NAME
+    with _lock:
+        data: dict[str, Any] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text())
+            except ValueError:
+                data = {}
+        if data.get("version") != FORMAT_VERSION:
+            data = {"version": FORMAT_VERSION, "assets": {}}
+        data["assets"].update(infos)
+        data["assets"] = dict(sorted(data["assets"].items()))
+        tmp = path.with_suffix(".json.tmp")
+        # One line per asset: small enough to read at launch, still diffable.
+        lines = [f"  {json.dumps(name)}: {json.dumps(info, separators=(',', ':'))}" for name, info in data["assets"].items()]
+        tmp.write_text(f'{{"version": {FORMAT_VERSION}, "assets": {{\n' + ",\n".join(lines) + "\n}}\n")
+        tmp.replace(path)
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Rebuild assetinfo.json from existing assets.")
+    p.add_argument("--src", type=Path, default=GENERATED_DIR, help="Directory with the generated PNGs.")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    assets = {p.stem: p for p in sorted(args.src.glob("*.png"))}
+    update_asset_info(args.src, assets)
+    print(f"Wrote {args.src / ASSET_INFO_NAME} ({len(assets)} asset(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Long-lived asset generation worker with a job queue, driven over stdio (used by the MCP server).
+
+Imports (Pillow, NumPy, requests), the HTTP keep-alive session and the raw image cache stay
+warm between jobs, so regenerating one sprite costs the API call and post-processing only.
+
+Protocol: one JSON object per line on stdin; replies and events are JSON lines on stdout.
+  -> {"id": 1, "method": "submit", "params": {"assets": ["panda", "bg_*"], "force": true}}
+  <- {"id": 1, "result": {"job": "j1", "state": "queued", ...}}
+  <- {"event": "progress", "job": "j1", "asset": "panda", "status": "ok", "done": 1, "total": 3}
+  <- {"event": "job", "job": {"job": "j1", "state": "done", ...}}
+
+Methods:
+  submit   {"assets": [name or glob, ...], <option>: value, ...} -> job; empty assets = whole catalog
+  status   {"job": id} -> job (with the last log lines); without "job", every job
+  cancel   {"job": id} -> job; queued jobs are dropped, running ones stop after the assets in flight
+  catalog  {"catalog": path} -> asset names; without "catalog", scripts/asset_catalog.json
+  shutdown {} -> cancels everything and exits once the running job stops
+Closing stdin (the MCP server went away) is a shutdown too.
+
+Options map onto generate_assets.py flags (see JOB_OPTIONS); jobs run one at a time because
+they share the build manifest and hitshapes.json. Assets a job never reached end up "cancelled"
+when it was cancelled and "not run" when it failed first.
+
+Usage:
+  python scripts/asset_worker.py [--base-url http://127.0.0.1:8089/v1]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import io
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Optional, TextIO
+
+from dotenv import load_dotenv
+
+import generate_assets as ga
+from build_manifest import BuildManifest
+from generate_assets import CATALOG_PATH, ROOT, ImageSpec, load_catalog
+from image_cache import RawImageCache
+
+
+# Job option -> (generate_assets.py flag, type); booleans become bare flags.
+JOB_OPTIONS: dict[str, tuple[str, type]] = {
+    "force": ("--force", bool),
+    "candidates": ("--candidates", int),
+    "max_retries": ("--max-retries", int),
+    "engine": ("--engine", str),
+    "jobs": ("--jobs", int),
+    "pipeline": ("--pipeline", bool),
+    "cpu_workers": ("--cpu-workers", int),
+    "queue_depth": ("--queue-depth", int),
+    "webp": ("--webp", bool),
+    "tile_size": ("--tile-size", int),
+    "atlas": ("--atlas", bool),
+    "no_cache": ("--no-cache", bool),
+    "no_optimize": ("--no-optimize", bool),
+    "out_dir": ("--out-dir", str),
+    "catalog": ("--catalog", str),
+}
+LOG_TAIL = 200
+FINISHED = ("done", "failed", "cancelled")
+
+
+class JobError(ValueError):
+    """A request the worker can't accept (unknown method, option or asset)."""
+
+
+class Job:
+    def __init__(self, job_id: str, assets: list[str], argv: list[str]) -> None:
+        self.id = job_id
+        self.argv = argv
+        self.state = "queued"
+        self.assets: dict[str, str] = {name: "queued" for name in assets}
+        self.log: deque[str] = deque(maxlen=LOG_TAIL)
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.cancel = threading.Event()
+
+    @property
+    def done(self) -> int:
+        return sum(status != "queued" for status in self.assets.values())
+
+    def to_dict(self, log: bool = False) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "job": self.id,
+            "state": self.state,
+            "done": self.done,
+            "total": len(self.assets),
+            "assets": dict(self.assets),
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if log:
+            data["log"] = list(self.log)
+        return data
+
+
+class _JobOutput(io.TextIOBase):
+    """sys.stdout while the worker runs: lines go to the running job's log, never to the protocol stream."""
+
+    def __init__(self, worker: Worker) -> None:
+        self.worker = worker
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            *lines, self._partial = (self._partial + text).split("\n")
+            job = self.worker.current
+            for line in lines:
+                if job is not None:
+                    job.log.append(line)
+                else:
+                    print(line, file=sys.stderr)
+        return len(text)
+
+
+class Worker:
+    def __init__(self, out: TextIO) -> None:
+        self._out = out
+        self._out_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.jobs: dict[str, Job] = {}
+        self._queue: queue.Queue[Optional[Job]] = queue.Queue()
+        self._caches: dict[tuple[str, int], RawImageCache] = {}
+        self.current: Optional[Job] = None
+        self._runner = threading.Thread(target=self._run_jobs, name="asset-jobs", daemon=True)
+
+    def start(self) -> None:
+        self._runner.start()
+
+    def send(self, message: dict[str, Any]) -> None:
+        with self._out_lock:
+            self._out.write(json.dumps(message) + "\n")
+            self._out.flush()
+
+    # MARK: requests
+
+    def handle(self, request: dict[str, Any]) -> Optional[dict[str, Any]]:
+        method = request.get("method")
+        params = request.get("params") or {}
+        if not isinstance(params, dict):
+            raise JobError("params must be a JSON object")
+        if method == "submit":
+            return self.submit(params).to_dict()
+        if method == "status":
+            if "job" not in params:
+                return {"jobs": [job.to_dict() for job in self.jobs.values()]}
+            return self._job(params).to_dict(log=True)
+        if method == "cancel":
+            return self.cancel(self._job(params)).to_dict()
+        if method == "catalog":
+            # Same catalog option as submit, so names listed here are the ones a job resolves.
+            path = params.get("catalog")
+            return {"assets": [spec.name for spec in load_catalog(Path(path) if path else CATALOG_PATH)]}
+        if method == "shutdown":
+            self.shutdown()
+            return {}
+        raise JobError(f"unknown method {method!r}")
+
+    def _job(self, params: dict[str, Any]) -> Job:
+        job = self.jobs.get(str(params.get("job")))
+        if job is None:
+            raise JobError(f"no such job {params.get('job')!r}")
+        return job
+
+    def submit(self, params: dict[str, Any]) -> Job:
+        argv: list[str] = []
+        for key, value in params.items():
+            if key == "assets":
+                continue
+            if key not in JOB_OPTIONS:
+                raise JobError(f"unknown option {key!r} (expected one of {', '.join(JOB_OPTIONS)})")
+            flag, kind = JOB_OPTIONS[key]
+            if kind is bool:
+                if value:
+                    argv.append(flag)
+            elif value is not None:
+                try:
+                    argv += [flag, str(kind(value))]
+                except (TypeError, ValueError):
+                    raise JobError(f"option {key!r} expects {kind.__name__}, got {value!r}") from None
+
+        patterns = params.get("assets") or []
+        if not isinstance(patterns, list) or not all(isinstance(p, str) for p in patterns):
+            raise JobError("assets must be a list of names or globs")
+        catalog = load_catalog(ga._parse_args(argv).catalog)
+        names = _resolve_assets(catalog, patterns)
+        argv += ["--only", ",".join(names)]
+        with self._lock:
+            job = Job(f"j{next(self._ids)}", names, argv)
+            self.jobs[job.id] = job
+        self._queue.put(job)
+        return job
+
+    def cancel(self, job: Job) -> Job:
+        job.cancel.set()
+        with self._lock:
+            if job.state == "queued":
+                self._finish(job, "cancelled")
+        return job
+
+    def shutdown(self) -> None:
+        for job in list(self.jobs.values()):
+            if job.state not in FINISHED:
+                self.cancel(job)
+        self._queue.put(None)
+
+    def join(self) -> None:
+        self._runner.join()
+
+    # MARK: jobs
+
+    def _finish(self, job: Job, state: str, error: Optional[str] = None) -> None:
+        job.state = state
+        job.error = error
+        job.finished = time.time()
+        # A failed job stops at its first failure (sequential mode): the rest were never attempted.
+        leftover = "cancelled" if state == "cancelled" else "not run"
+        for name, status in job.assets.items():
+            if status == "queued":
+                job.assets[name] = leftover
+        self.send({"event": "job", "job": job.to_dict()})
+
+    def _progress(self, job: Job, spec: ImageSpec, status: str, detail: Optional[str] = None) -> None:
+        job.assets[spec.name] = status
+        self.send(
+            {
+                "event": "progress",
+                "job": job.id,
+                "asset": spec.name,
+                "status": status,
+                "detail": detail,
+                "done": job.done,
+                "total": len(job.assets),
+            }
+        )
+
+    def _cache(self, args: argparse.Namespace) -> Optional[RawImageCache]:
+        """One cache per directory for the worker's lifetime, so its index is loaded once."""
+        if args.no_cache:
+            return None
+        key = (str(args.cache_dir.resolve()), int(args.cache_max_mb * 1024 * 1024))
+        if key not in self._caches:
+            self._caches[key] = RawImageCache(args.cache_dir, key[1])
+        return self._caches[key]
+
+    def _run_jobs(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if job.state != "queued":
+                    continue
+                job.state = "running"
+                job.started = time.time()
+                self.current = job
+            self.send({"event": "job", "job": job.to_dict()})
+            try:
+                self._run(job)
+            except SystemExit as e:
+                # generate_assets reports failures the CLI way.
+                self._finish(job, "cancelled" if job.cancel.is_set() else "failed", str(e.code))
+            except Exception as e:
+                self._finish(job, "failed", f"{type(e).__name__}: {e}")
+            else:
+                self._finish(job, "cancelled" if job.cancel.is_set() else "done")
+            finally:
+                self.current = None
+
+    def _run(self, job: Job) -> None:
+        args = ga._parse_args(job.argv)
+        selected = ga._select_specs(args)
+        manifest = BuildManifest(args.manifest or ga._default_manifest(args.out_dir), args.out_dir)
+        cache = self._cache(args)
+        todo = ga._plan_builds(
+            selected,
+            args,
+            manifest,
+            on_skip=lambda spec, reason: self._progress(job, spec, "skipped", reason),
+            cache=cache,
+        )
+
+        def on_done(spec: ImageSpec, err: Optional[Exception]) -> None:
+            self._progress(job, spec, "ok" if err is None else "failed", None if err is None else str(err))
+
+        try:
+            ga._generate_all(todo, args, cache, None, manifest, on_done, job.cancel)
+        finally:
+            if cache is not None:
+                cache.flush()
+            # An existing atlas is refreshed even for cancelled or failed jobs, so its frames
+            # never shadow sprites this job rewrote.
+            if ga.atlas_exists(args.out_dir):
+                ga._build_atlases(args)
+        if args.atlas and not job.cancel.is_set() and not ga.atlas_exists(args.out_dir):
+            ga._build_atlases(args)
+
+
+def _resolve_assets(catalog: list[ImageSpec], patterns: list[str]) -> list[str]:
+    """Catalog names matching `patterns` (exact names or fnmatch globs), in catalog order."""
+    names = [spec.name for spec in catalog]
+    if not patterns:
+        return names
+    unmatched = [p for p in patterns if not fnmatch.filter(names, p)]
+    if unmatched:
+        raise JobError(f"no catalog asset matches {', '.join(unmatched)} (known: {', '.join(names)})")
+    return [name for name in names if any(fnmatch.fnmatchcase(name, p) for p in patterns)]
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Asset generation worker speaking JSON lines on stdio.")
+    p.add_argument("--base-url", default=None, help="Images API root, as in generate_assets.py --base-url.")
+    return p.parse_args()
+
+
+def main() -> None:
+    load_dotenv(ROOT / ".env")
+    args = _parse_args()
+    if args.base_url:
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+
+    worker = Worker(sys.stdout)
+    # Pipeline output is printed; keep it off the protocol stream.
+    sys.stdout = _JobOutput(worker)
+    worker.start()
+    worker.send({"event": "ready", "pid": os.getpid()})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request: dict[str, Any] = {}
+        request_id = None
+        try:
+            message = json.loads(line)
+            if not isinstance(message, dict):
+                raise JobError("a request must be a JSON object")
+            request = message
+            request_id = request.get("id")
+            result = worker.handle(request)
+            worker.send({"id": request_id, "result": result})
+        except (JobError, ValueError, OSError) as e:
+            worker.send({"id": request_id, "error": str(e)})
+        except SystemExit as e:
+            # e.g. argparse rejecting an option value, or a broken catalog
+            worker.send({"id": request_id, "error": f"rejected ({e.code}); see the worker's stderr"})
+        except Exception as e:
+            # One bad request must not take down the worker and every pending call with it.
+            worker.send({"id": request_id, "error": f"{type(e).__name__}: {e}"})
+        if request.get("method") == "shutdown":
+            break
+    else:
+        # stdin closed: the MCP server went away.
+        worker.shutdown()
+    worker.join()
+
+
+if __name__ == "__main__":
+    main()
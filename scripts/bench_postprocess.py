@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Benchmark and golden-check the sprite post-processing in generate_assets.py.
+
+Synthetic, deterministic sprite-like inputs are built offline (no API calls):
+- plain    outlined shape with white interior details on a white background
+- grid     same, with gray grid lines over the background
+- checker  same, on a light checkerboard ("transparent preview" artifact)
+- blobs    same, plus small disconnected noise blobs
+- base     same, standing on a wide shadow/ground base (must be rejected)
+- blank    background only (nothing is left opaque)
+
+Usage:
+  python scripts/bench_postprocess.py                        # time all stages, print a table
+  python scripts/bench_postprocess.py --out bench.json       # also store results as JSON
+  python scripts/bench_postprocess.py --baseline bench.json  # compare against a saved run
+  python scripts/bench_postprocess.py --sizes 256,512 --check-only
+  python scripts/bench_postprocess.py --calibrate [--raw-dir .cache/raw_images]
+
+Golden checks: every engine must produce the same alpha mask (or the same rejection) and the
+same trim metadata as the reference per-pixel engine, with and without the coarse pre-check,
+and the masks must match the hashes in bench_golden.json.
+
+Calibration (--calibrate) runs the coarse pre-check and the full-resolution pass over "base"
+sprites with a sweep of base widths (plus every image under --raw-dir) and reports how often
+their decisions agree. It fails if the pre-check rejects anything the full pass keeps, and
+prints the lowest PRECHECK_REJECT_COVERAGE that would be safe on these inputs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+import generate_assets as ga
+
+
+CASES = ("plain", "grid", "checker", "blobs", "base", "blank")
+# Base widths (in 1/256 of the sprite size) swept by --calibrate; the "base" case uses 216.
+CALIBRATION_BASE_WIDTHS = tuple(range(60, 224, 4))
+DEFAULT_SIZES = (256, 512, 1024, 2048, 4096)
+ENGINES = ("python", "numpy")
+GOLDEN_PATH = Path(__file__).resolve().with_name("bench_golden.json")
+
+
+def make_sprite(case: str, size: int, seed: int = 0, base_width: float = 216) -> Image.Image:
+    """Deterministic sprite-like RGB image of `size`x`size` for a benchmark case."""
+    rng = np.random.default_rng(seed)
+    im = Image.new("RGB", (size, size), (254, 254, 253))
+    if case == "blank":
+        return im
+    d = ImageDraw.Draw(im)
+    u = size / 256.0
+
+    if case == "grid":
+        step = max(4, int(16 * u))
+        for x in range(0, size, step):
+            d.line([(x, 0), (x, size)], fill=(205, 205, 205), width=max(1, int(u)))
+        for y in range(0, size, step):
+            d.line([(0, y), (size, y)], fill=(205, 205, 205), width=max(1, int(u)))
+    elif case == "checker":
+        cell = max(2, int(8 * u))
+        for y in range(0, size, cell):
+            for x in range((y // cell) % 2 * cell, size, cell * 2):
+                d.rectangle([x, y, x + cell - 1, y + cell - 1], fill=(232, 232, 232))
+
+    outline = max(2, int(4 * u))
+    # Body, head and a white belly patch (interior white must survive the flood fill).
+    d.ellipse([60 * u, 90 * u, 196 * u, 200 * u], fill=(250, 190, 200), outline=(20, 20, 20), width=outline)
+    d.ellipse([90 * u, 40 * u, 166 * u, 110 * u], fill=(250, 190, 200), outline=(20, 20, 20), width=outline)
+    d.ellipse([100 * u, 130 * u, 156 * u, 180 * u], fill=(255, 255, 255), outline=(20, 20, 20), width=outline)
+    d.ellipse([110 * u, 65 * u, 118 * u, 73 * u], fill=(20, 20, 20))
+    d.ellipse([138 * u, 65 * u, 146 * u, 73 * u], fill=(20, 20, 20))
+
+    if case == "blobs":
+        for _ in range(12):
+            x, y = rng.uniform(5, 250, 2) * u
+            r = rng.uniform(1.5, 5) * u
+            d.ellipse([x - r, y - r, x + r, y + r], fill=(90, 150, 80))
+    elif case == "base":
+        x0 = 128 - base_width / 2
+        d.ellipse([x0 * u, 190 * u, (x0 + base_width) * u, 252 * u], fill=(110, 160, 110), outline=(20, 20, 20), width=outline)
+        d.ellipse([60 * u, 90 * u, 196 * u, 200 * u], fill=(250, 190, 200), outline=(20, 20, 20), width=outline)
+    return im
+
+
+def _alpha_digest(result: Any) -> str:
+    if isinstance(result, Exception):
+        return f"rejected: {result}"
+    alpha = np.asarray(result.convert("RGBA"))[..., 3]
+    return f"{result.size[0]}x{result.size[1]}:" + hashlib.sha256((alpha > 0).tobytes()).hexdigest()[:16]
+
+
+def _trim_of(result: Any) -> Optional[str]:
+    return None if isinstance(result, Exception) else result.info.get(ga.TRIM_KEY)
+
+
+def _run(fn: Callable[[], Any]) -> Any:
+    try:
+        return fn()
+    except RuntimeError as e:
+        return e
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _run(fn)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def bench_case(case: str, size: int, engines: list[str], repeat: int) -> dict[str, float]:
+    """Median seconds per stage for one input."""
+    src = make_sprite(case, size).convert("RGBA")
+    timings: dict[str, float] = {}
+    timings["corner_patch"] = _time(lambda: ga._corner_patch_rgb(src, patch=16), repeat)
+    samples = ga._corner_patch_rgb(src, patch=16)
+    bg = ga._median_rgb(samples)
+    timings["median_rgb"] = _time(lambda: ga._median_rgb(samples), repeat)
+    timings["solid_white"] = _time(lambda: ga._background_looks_solid_white(src), repeat)
+
+    for engine in engines:
+        if engine == "python":
+            filled = src.copy()
+            ga._clear_edge_background_python(filled, bg)
+            timings["flood_fill/python"] = _time(lambda: ga._clear_edge_background_python(src.copy(), bg), repeat)
+            timings["components/python"] = _time(lambda: ga._keep_largest_alpha_component_python(filled.copy()), repeat)
+        else:
+            # NumPy stages work in place on the shared buffers, so each run reloads its input first.
+            buf = ga.SpriteBuffers.load(src)
+            ga._clear_edge_background_numpy(buf, bg)
+            filled = buf.rgba.copy()
+            timings["flood_fill/numpy"] = _time(
+                lambda: ga._clear_edge_background_numpy(ga.SpriteBuffers.load(src), bg), repeat
+            )
+            timings["components/numpy"] = _time(
+                lambda: (np.copyto(buf.rgba, filled), ga._keep_largest_alpha_component_numpy(buf)), repeat
+            )
+            timings["large_base"] = _time(lambda: ga._has_large_base_numpy(buf), repeat)
+        timings[f"total/{engine}"] = _time(lambda: ga._remove_background_from_edges(src, engine=engine), repeat)
+    return timings
+
+
+def check_golden(sizes: list[int], engines: list[str], golden: dict[str, str]) -> tuple[list[str], dict[str, str]]:
+    """Compare every engine against the reference and the stored golden digests.
+
+Returns (problems, digests) where digests are the reference results for this run.
+"""
+    problems: list[str] = []
+    digests: dict[str, str] = {}
+    for size in sizes:
+        for case in CASES:
+            src = make_sprite(case, size)
+            outputs = {e: _run(lambda: ga._remove_background_from_edges(src, engine=e)) for e in engines}
+            for e in engines:
+                outputs[f"{e} (no precheck)"] = _run(lambda: ga._remove_background_from_edges(src, engine=e, precheck=False))
+            results = {e: _alpha_digest(out) for e, out in outputs.items()}
+            key = f"{case}/{size}"
+            reference = results.get("python", results[engines[0]])
+            reference_trim = _trim_of(outputs.get("python", outputs[engines[0]]))
+            digests[key] = reference
+            for engine, digest in results.items():
+                if digest != reference:
+                    problems.append(f"{key}: {engine} engine differs from reference ({digest} != {reference})")
+                elif _trim_of(outputs[engine]) != reference_trim:
+                    problems.append(
+                        f"{key}: {engine} engine trim metadata differs ({_trim_of(outputs[engine])} != {reference_trim})"
+                    )
+            if key in golden and golden[key] != reference:
+                problems.append(f"{key}: differs from golden ({reference} != {golden[key]})")
+    return problems, digests
+
+
+def calibrate(sizes: list[int], raw_dir: Optional[Path]) -> bool:
+    """Compare pre-check and full-resolution decisions; print a report and return whether they agree."""
+    inputs: list[tuple[str, Image.Image]] = [
+        (f"base{width}/{size}", make_sprite("base", size, base_width=width))
+        for size in sizes
+        if size >= ga.PRECHECK_MIN_SIZE
+        for width in CALIBRATION_BASE_WIDTHS
+    ]
+    if raw_dir is not None:
+        for path in sorted(raw_dir.rglob("*")):
+            if path.is_file():
+                try:
+                    with Image.open(path) as im:
+                        inputs.append((path.name, im.convert("RGBA")))
+                except OSError:
+                    continue
+
+    rows: list[tuple[str, Optional[float], bool, bool]] = []
+    coarse_ms: list[float] = []
+    full_ms: list[float] = []
+    for label, im in inputs:
+        im = im.convert("RGBA")
+        t0 = time.perf_counter()
+        early = ga._precheck_rejects(im)
+        coarse_ms.append((time.perf_counter() - t0) * 1000)
+        coverage = ga._coarse_bottom_coverage(im)
+        t0 = time.perf_counter()
+        rejected = isinstance(_run(lambda: ga._remove_background_from_edges(im, precheck=False)), Exception)
+        full_ms.append((time.perf_counter() - t0) * 1000)
+        rows.append((label, coverage, early, rejected))
+
+    false_rejects = [label for label, _, early, rejected in rows if early and not rejected]
+    kept = [c for _, c, _, rejected in rows if c is not None and not rejected]
+    full_rejects = sum(rejected for *_, rejected in rows)
+    caught = sum(early for *_, early, _ in rows)
+    undecided = sum(c is None for _, c, _, _ in rows)
+    print(f"Calibration: {len(rows)} input(s), factor {ga.PRECHECK_FACTOR}, reject at {ga.PRECHECK_REJECT_COVERAGE}")
+    print(f"  full pass rejects {full_rejects}; pre-check rejects {caught} of them early")
+    print(f"  pre-check undecided (background not solid white): {undecided}")
+    print(f"  false rejects: {len(false_rejects)}" + (f" ({', '.join(false_rejects)})" if false_rejects else ""))
+    if kept:
+        print(f"  highest coarse coverage among kept sprites: {max(kept):.3f} (threshold must stay above it)")
+    if coarse_ms:
+        print(f"  median time: pre-check {statistics.median(coarse_ms):.1f} ms, full pass {statistics.median(full_ms):.1f} ms")
+    return not false_rejects
+
+
+def _compare(current: dict[str, float], baseline: dict[str, float], tolerance: float) -> list[str]:
+    lines = []
+    for key in sorted(current):
+        if key not in baseline or baseline[key] <= 0:
+            continue
+        ratio = current[key] / baseline[key]
+        if ratio > 1 + tolerance:
+            lines.append(f"  REGRESSION {key}: {baseline[key]*1000:.2f} ms -> {current[key]*1000:.2f} ms (x{ratio:.2f})")
+        elif ratio < 1 - tolerance:
+            lines.append(f"  faster     {key}: {baseline[key]*1000:.2f} ms -> {current[key]*1000:.2f} ms (x{ratio:.2f})")
+    return lines
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark sprite post-processing stages.")
+    p.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Comma-separated square sizes.")
+    p.add_argument("--cases", default=",".join(CASES), help="Comma-separated cases.")
+    p.add_argument("--engines", default=",".join(ENGINES), help="Comma-separated engines.")
+    p.add_argument("--python-max-size", type=int, default=1024, help="Skip the per-pixel engine above this size.")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per stage (median is reported).")
+    p.add_argument("--out", type=Path, default=None, help="Write results JSON here.")
+    p.add_argument("--baseline", type=Path, default=None, help="Compare against a previous --out file.")
+    p.add_argument("--tolerance", type=float, default=0.25, help="Relative change reported as regression/speedup.")
+    p.add_argument("--check-only", action="store_true", help="Only run golden checks.")
+    p.add_argument("--update-golden", action="store_true", help="Rewrite bench_golden.json from the reference engine.")
+    p.add_argument("--calibrate", action="store_true", help="Only check pre-check/full-resolution agreement.")
+    p.add_argument("--raw-dir", type=Path, default=None, help="With --calibrate: also use every image under DIR.")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+
+    def engines_for(size: int) -> list[str]:
+        return [e for e in engines if e != "python" or size <= args.python_max_size]
+
+    if args.calibrate:
+        raise SystemExit(0 if calibrate(sizes, args.raw_dir) else 1)
+
+    golden: dict[str, str] = json.loads(GOLDEN_PATH.read_text()) if GOLDEN_PATH.exists() else {}
+    problems: list[str] = []
+    new_golden = dict(golden)
+    for size in sizes:
+        found, digests = check_golden([size], engines_for(size), {} if args.update_golden else golden)
+        problems += found
+        if "python" in engines_for(size):
+            new_golden.update(digests)
+    if args.update_golden:
+        GOLDEN_PATH.write_text(json.dumps(new_golden, indent=2, sort_keys=True) + "\n")
+        print(f"Updated {GOLDEN_PATH.name} ({len(new_golden)} entries)")
+    print("Golden checks: " + ("OK" if not problems else f"{len(problems)} problem(s)"))
+    for line in problems:
+        print(f"  {line}")
+    if args.check_only:
+        raise SystemExit(1 if problems else 0)
+
+    results: dict[str, float] = {}
+    for size in sizes:
+        for case in cases:
+            timings = bench_case(case, size, engines_for(size), args.repeat)
+            for stage, sec in timings.items():
+                results[f"{case}/{size}/{stage}"] = sec
+            row = "  ".join(f"{stage}={sec*1000:.1f}ms" for stage, sec in timings.items())
+            print(f"{case:>8} {size:>5}  {row}", flush=True)
+
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.out is not None:
+        args.out.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"Wrote {args.out}")
+
+    regressions: Optional[list[str]] = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = _compare(results, baseline, args.tolerance)
+        print(f"Compared with {args.baseline}:")
+        for line in regressions or ["  no significant changes"]:
+            print(line)
+
+    failed = bool(problems) or any("REGRESSION" in line for line in regressions or [])
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
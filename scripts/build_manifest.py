@@ -0,0 +1,115 @@
+"""Incremental build manifest for scripts/generate_assets.py.
+
+For every asset it records what the outputs were built from:
+- request     hash of everything that needs a new API image (model, prompt, size, candidates)
+- processing  hash of the post-processing code and the spec/CLI settings it depends on
+- outputs     SHA-256 of every file written for the asset (full PNG, @Nx variants, WebP),
+              keyed by path relative to the output directory
+
+On the next run each asset is classified by `plan()`:
+- "skip"       nothing changed and the outputs on disk are the recorded ones
+- "reprocess"  only processing changed (or outputs were edited/deleted): rerun post-processing
+               on the cached raw images, without calling the API
+- "generate"   new asset, or its request changed: call the API
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+FORMAT_VERSION = 1
+
+
+def hash_json(value: Any) -> str:
+    raw = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """JSON manifest of built assets. Safe to share between threads; saved after every record."""
+
+    def __init__(self, path: Path, root: Path) -> None:
+        self.path = path
+        self.root = root
+        self._lock = threading.Lock()
+        self._assets: dict[str, dict[str, Any]] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text())
+            except ValueError:
+                data = {}
+            if data.get("version") == FORMAT_VERSION:
+                self._assets = data.get("assets", {})
+
+    def _rel(self, path: Path) -> str:
+        try:
+            return str(path.relative_to(self.root))
+        except ValueError:
+            return str(path)
+
+    def plan(self, name: str, request: str, processing: str, outputs: list[Path]) -> tuple[str, str]:
+        """("skip" | "reprocess" | "generate", reason) for one asset."""
+        entry = self._assets.get(name)
+        if entry is None:
+            return "generate", "not built yet"
+        if entry["request"] != request:
+            return "generate", "prompt/size/model changed"
+        if entry["processing"] != processing:
+            return "reprocess", "post-processing changed"
+        recorded = entry["outputs"]
+        if set(recorded) != {self._rel(p) for p in outputs}:
+            return "reprocess", "output set changed"
+        for p in outputs:
+            if not p.exists():
+                return "reprocess", f"{p.name} missing"
+            if file_sha256(p) != recorded[self._rel(p)]:
+                return "reprocess", f"{p.name} modified"
+        return "skip", "up to date"
+
+    def entries(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return json.loads(json.dumps(self._assets))
+
+    def set_entry(self, name: str, entry: dict[str, Any]) -> None:
+        """Store an entry taken from another manifest (see scripts/merge_shards.py)."""
+        with self._lock:
+            self._assets[name] = entry
+            self._save()
+
+    def record(self, name: str, request: str, processing: str, outputs: list[Path]) -> None:
+        entry = {
+            "request": request,
+            "processing": processing,
+            "outputs": {self._rel(p): file_sha256(p) for p in outputs if p.exists()},
+        }
+        with self._lock:
+            self._assets[name] = entry
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": FORMAT_VERSION, "assets": dict(sorted(self._assets.items()))}
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+        tmp.replace(self.path)
+
+
+def source_fingerprint(*parts: str) -> str:
+    """Hash of source texts, e.g. the post-processing functions, so code edits invalidate outputs."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
@@ -20,22 +20,51 @@ Notes:
 
 from __future__ import annotations
 
-import base64
 import argparse
+import binascii
+import functools
+import hashlib
+import inspect
+import io
+import itertools
 import json
+import multiprocessing
 import os
-from dataclasses import dataclass
+import queue
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import astuple, dataclass, field
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, BinaryIO, Callable, Iterator, Optional, Union
 
+import numpy as np
 import requests
 from dotenv import load_dotenv
-from PIL import Image
+from PIL import Image, features
+
+from asset_info import TRIM_KEY, trim_text, update_asset_info
+from build_manifest import BuildManifest, hash_json, source_fingerprint
+from hit_shapes import update_hit_shapes
+from image_cache import RawImageCache, request_key
+from pack_atlas import atlas_exists, build_atlas
+from pipeline_metrics import AssetMetrics, RunMetrics, bind, count_bytes, note_retry, recording, stage
+from png_optimize import DEFAULT_MAX_ERROR, optimize_png, png_text, save_webp_lossless
+from recolor import DEFAULT_KEEP, RGB, ColorMap, parse_color, parse_color_map, recolor
+from tile_backgrounds import MANIFEST_NAME as TILES_MANIFEST_NAME, export_tiles, tile_paths, tiles_dir
 
 
 ROOT = Path(__file__).resolve().parents[1]
 OUT_DIR = ROOT / "SearchGame" / "Resources" / "Generated"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
+MANIFEST_PATH = ROOT / "scripts" / "generated_assets.lock.json"
+CATALOG_PATH = ROOT / "scripts" / "asset_catalog.json"
+DISPLAY_SCALES = (1, 2, 3)
 
 
 @dataclass
@@ -45,6 +74,131 @@ class ImageSpec:
     prompt: str
     size: str
     transparent: bool = False
+    # Perceptual error budget (mean delta-E) for palette quantization of the final image.
+    max_quant_error: float = DEFAULT_MAX_ERROR
+    # Largest on-screen size in points (w, h); enables @1x/@2x/@3x exports in Generated/scaled.
+    display_size: Optional[tuple[int, int]] = None
+    # Color variant: derived from `base`'s final image by `recolor` instead of an API call.
+    base: Optional[ImageSpec] = None
+    recolor: tuple[ColorMap, ...] = ()
+    keep: tuple[RGB, ...] = DEFAULT_KEEP
+
+
+_ENV_REF = re.compile(r"\$\{(\w+)(?::-([^}]*))?\}")
+_SPEC_FIELDS = {"name", "filename", "prompt", "size", "transparent", "max_quant_error", "display_size"}
+_VARIANT_FIELDS = {"name", "filename", "variant_of", "recolor", "keep", "max_quant_error", "display_size"}
+
+
+def _expand_env(value: str) -> str:
+    """Expand ${VAR} / ${VAR:-default} from the environment."""
+    return _ENV_REF.sub(lambda m: os.getenv(m.group(1)) or (m.group(2) or ""), value)
+
+
+def load_catalog(path: Path) -> list[ImageSpec]:
+    """Read asset specs from a JSON or TOML catalog (see scripts/asset_catalog.json).
+
+Each entry needs "name", "prompt" and "size"; "filename" defaults to <name>.png. String
+sizes may reference the environment, e.g. "${OPENAI_IMAGE_SIZE:-1792x1024}".
+
+Color variants name their base instead ("variant_of", "recolor", optional "keep"; see
+scripts/recolor.py) and take its prompt, size and transparency.
+"""
+    if path.suffix == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib  # type: ignore[no-redef]
+        data = tomllib.loads(path.read_text())
+    else:
+        data = json.loads(path.read_text())
+
+    specs: list[ImageSpec] = []
+    variants: list[tuple[int, dict[str, Any]]] = []
+    seen: set[str] = set()
+    for i, entry in enumerate(data.get("assets", [])):
+        is_variant = "variant_of" in entry
+        unknown = set(entry) - (_VARIANT_FIELDS if is_variant else _SPEC_FIELDS)
+        missing = ({"name", "variant_of", "recolor"} if is_variant else {"name", "prompt", "size"}) - set(entry)
+        if unknown or missing:
+            raise SystemExit(f"{path}: asset #{i + 1}: unknown fields {sorted(unknown)}, missing {sorted(missing)}")
+        if entry["name"] in seen:
+            raise SystemExit(f"{path}: duplicate asset name {entry['name']!r}")
+        seen.add(entry["name"])
+        if is_variant:
+            variants.append((len(specs), entry))
+            specs.append(None)  # type: ignore[arg-type]  # filled in once every base is known
+            continue
+        display = entry.get("display_size")
+        specs.append(
+            ImageSpec(
+                name=entry["name"],
+                filename=entry.get("filename", f"{entry['name']}.png"),
+                prompt=entry["prompt"],
+                size=_expand_env(entry["size"]),
+                transparent=bool(entry.get("transparent", False)),
+                max_quant_error=float(entry.get("max_quant_error", DEFAULT_MAX_ERROR)),
+                display_size=(int(display[0]), int(display[1])) if display else None,
+            )
+        )
+
+    bases = {spec.name: spec for spec in specs if spec is not None}
+    for index, entry in variants:
+        base = bases.get(entry["variant_of"])
+        if base is None:
+            raise SystemExit(
+                f"{path}: {entry['name']}: variant_of {entry['variant_of']!r} is not a generated asset "
+                "(variants of variants aren't supported)"
+            )
+        maps = entry["recolor"] if isinstance(entry["recolor"], list) else [entry["recolor"]]
+        display = entry.get("display_size", base.display_size)
+        try:
+            recolor_maps = tuple(parse_color_map(m) for m in maps)
+            keep = tuple(parse_color(c) for c in entry["keep"]) if "keep" in entry else DEFAULT_KEEP
+        except (TypeError, ValueError) as e:
+            raise SystemExit(f"{path}: {entry['name']}: {e}") from None
+        specs[index] = ImageSpec(
+            name=entry["name"],
+            filename=entry.get("filename", f"{entry['name']}.png"),
+            prompt=base.prompt,
+            size=base.size,
+            transparent=base.transparent,
+            max_quant_error=float(entry.get("max_quant_error", base.max_quant_error)),
+            display_size=(int(display[0]), int(display[1])) if display else None,
+            base=base,
+            recolor=recolor_maps,
+            keep=keep,
+        )
+    return specs
+
+
+def _parse_shard(value: str) -> tuple[int, int]:
+    """"i/N" (1-based) -> (i - 1, N)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected i/N, e.g. 2/4") from None
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {value} out of range")
+    return index - 1, count
+
+
+def _shard_of(name: str, count: int) -> int:
+    """Stable shard for an asset: depends only on its name, so adding assets doesn't move others."""
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big") % count
+
+
+def _image_model() -> str:
+    return os.getenv("OPENAI_IMAGE_MODEL", "dall-e-3")
+
+
+def _http_retries() -> int:
+    """OPENAI_HTTP_RETRIES, read at call time so a .env loaded by main() applies."""
+    return int(_env("OPENAI_HTTP_RETRIES", str(DEFAULT_HTTP_RETRIES)))
+
+
+def _api_base_url() -> str:
+    """API root; point OPENAI_BASE_URL at scripts/mock_images_api.py for offline runs."""
+    return os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
 
 
 def _env(name: str, default: Optional[str] = None) -> str:
@@ -56,16 +210,315 @@ def _env(name: str, default: Optional[str] = None) -> str:
     return v
 
 
-def openai_images_generate(prompt: str, size: str, transparent: bool) -> bytes:
-    """Call OpenAI Images API (REST) and return PNG bytes.
+class _TokenBucket:
+    def __init__(self, per_minute: float, capacity: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they already are).
+
+A request larger than the bucket only waits for a full bucket; `take` then charges all of it.
+"""
+        if self.rate <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount: float) -> None:
+        # Tokens may go negative: the next callers wait off what an oversized request overdrew.
+        if self.rate > 0:
+            self.tokens -= amount
+
+
+class RateLimiter:
+    """Token-bucket limiter for requests/minute and images/minute, shared by all jobs.
+
+A limit of 0 disables that bucket. `burst` caps how many tokens can pile up while idle;
+a call for more images than that is let through on a full bucket and paid back afterwards,
+so the average rate holds for any number of candidates per request.
+"""
+
+    def __init__(self, requests_per_minute: float, images_per_minute: float, burst: float = 1) -> None:
+        self._requests = _TokenBucket(requests_per_minute, burst)
+        self._images = _TokenBucket(images_per_minute, burst)
+        self._lock = threading.Lock()
+
+    def acquire(self, images: int = 1) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._requests.refill(now)
+                self._images.refill(now)
+                wait = max(self._requests.wait_for(1), self._images.wait_for(images))
+                if wait <= 0:
+                    self._requests.take(1)
+                    self._images.take(images)
+                    return
+            time.sleep(wait)
+
+
+class ImagesAPIError(RuntimeError):
+    """The Images API failed after the HTTP layer already retried transient errors."""
+
+
+class RawNotCachedError(ImagesAPIError):
+    """An asset planned for reprocessing needs a raw image that is no longer cached."""
+
+
+# Statuses worth retrying at the HTTP layer (rate limits, timeouts, server-side failures).
+_RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+_BACKOFF_BASE_S = 1.0
+_BACKOFF_CAP_S = 60.0
+DEFAULT_HTTP_RETRIES = 5
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _http_session() -> requests.Session:
+    """Process-wide keep-alive session, so every call reuses pooled TLS connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            from requests.adapters import HTTPAdapter
+
+            sess = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+            sess.mount("https://", adapter)
+            sess.mount("http://", adapter)
+            _session = sess
+        return _session
+
+
+def _retry_after_seconds(resp: requests.Response) -> Optional[float]:
+    """Parse a `Retry-After` header given either as seconds or as an HTTP date."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(_BACKOFF_CAP_S, _BACKOFF_BASE_S * (2**attempt)))
+
+
+def _request_with_backoff(
+    method: str,
+    url: str,
+    *,
+    retries: int,
+    limiter: Optional[RateLimiter] = None,
+    images: int = 0,
+    log: Callable[[str], None] = print,
+    **kwargs: Any,
+) -> requests.Response:
+    """Send a request on the shared session, retrying transient failures.
+
+Connection errors and statuses in _RETRY_STATUSES are retried up to `retries` times.
+The delay is exponential backoff with jitter, but never shorter than the server's
+`Retry-After`. The final response is returned as-is, so callers decide what an error means.
+"""
+    sess = _http_session()
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            with stage("rate_limit_wait"):
+                limiter.acquire(images=images)
+        try:
+            with stage("api"):
+                r = sess.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= retries:
+                raise ImagesAPIError(f"{method} {url} failed after {attempt + 1} tries: {e}") from e
+            delay = _backoff_delay(attempt)
+            log(f"  Network error ({type(e).__name__}), retrying in {delay:.1f}s")
+            note_retry("http", type(e).__name__, delay)
+        else:
+            if r.status_code not in _RETRY_STATUSES or attempt >= retries:
+                return r
+            retry_after = _retry_after_seconds(r)
+            delay = max(retry_after or 0.0, _backoff_delay(attempt))
+            log(f"  HTTP {r.status_code}, retrying in {delay:.1f}s")
+            note_retry("http", f"HTTP {r.status_code}" + (" (Retry-After)" if retry_after else ""), delay)
+            r.close()
+        with stage("backoff_wait"):
+            time.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+# Spool files stay in memory up to this size, then spill to disk.
+_SPOOL_MAX_MEMORY = 1 << 20
+_COPY_CHUNK = 1 << 16
+_B64_KEY = b'"b64_json"'
+
+ImageSource = Union[bytes, BinaryIO, Image.Image]
+
+
+def _new_spool() -> BinaryIO:
+    return tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY, mode="w+b")
+
+
+def _open_image(src: ImageSource) -> Image.Image:
+    if isinstance(src, Image.Image):
+        return src
+    if isinstance(src, (bytes, bytearray)):
+        from io import BytesIO
+
+        return Image.open(BytesIO(src))
+    src.seek(0)
+    return Image.open(src)
+
+
+def _iter_body(resp: requests.Response) -> Iterator[bytes]:
+    """Response body in chunks, counted as "http_in" bytes for --metrics."""
+    for chunk in resp.iter_content(_COPY_CHUNK):
+        count_bytes("http_in", len(chunk))
+        yield chunk
+
+
+def _spool_b64_json(resp: requests.Response, limit: int = 1) -> tuple[list[BinaryIO], Optional[bytes]]:
+    """Decode up to `limit` "b64_json" strings of a streamed JSON response into spool files.
+
+Only the JSON around the payloads and one chunk of base64 are buffered at a time.
+Returns (spools rewound to 0, None) when images were decoded, or ([], body) with the whole
+(small) body when the response has no non-empty "b64_json" string, e.g. the URL form
+(where "b64_json" may be null) or an error object, for the caller to parse.
+"""
+    chunks = _iter_body(resp)
+    # Everything read before the first payload, returned when there is none.
+    body: Optional[bytearray] = bytearray()
+
+    def read() -> bytes:
+        chunk = next(chunks, b"")
+        if body is not None:
+            body.extend(chunk)
+        return chunk
+
+    outs: list[BinaryIO] = []
+    head = bytearray(read())
+    while len(outs) < limit:
+        pos = head.find(_B64_KEY)
+        while pos < 0:
+            chunk = read()
+            if not chunk:
+                break
+            head += chunk
+            pos = head.find(_B64_KEY)
+        if pos < 0:
+            if outs or body is None:
+                break
+            return [], bytes(body)
+
+        # Skip `"b64_json"`, the colon and whitespace up to the value.
+        rest = bytes(head[pos + len(_B64_KEY) :])
+        while True:
+            stripped = rest.lstrip(b" \t\r\n:")
+            if stripped:
+                rest = stripped
+                break
+            rest = read()
+            if not rest:
+                raise RuntimeError("Truncated API response")
+        while rest == b'"':
+            chunk = read()
+            if not chunk:
+                raise RuntimeError("Truncated API response")
+            rest += chunk
+        if not rest.startswith(b'"') or rest.startswith(b'""'):
+            # null (or an empty string) next to a "url": not a payload, keep scanning.
+            head = bytearray(rest)
+            continue
+        rest = rest[1:]
+        # From here on the body holds base64 and is not kept.
+        body = None
+
+        out = _new_spool()
+        pending = b""
+        while True:
+            end = rest.find(b'"')
+            # JSON may escape "/" as "\/"; base64 itself never contains backslashes.
+            pending += (rest if end < 0 else rest[:end]).replace(b"\\", b"")
+            keep = len(pending) - len(pending) % 4
+            out.write(binascii.a2b_base64(pending[:keep]))
+            pending = pending[keep:]
+            if end >= 0:
+                break
+            rest = read()
+            if not rest:
+                raise RuntimeError("Truncated API response")
+        if pending:
+            raise RuntimeError("Malformed b64_json payload in API response")
+        count_bytes("image_in", out.tell())
+        out.seek(0)
+        outs.append(out)
+        head = bytearray(rest[end + 1 :])
+    # Drain the remainder so the pooled connection can be reused.
+    for _ in chunks:
+        pass
+    return outs, None
+
+
+# Models that only accept n=1 per request; candidates for them are requested in parallel calls.
+_SINGLE_IMAGE_MODELS = ("dall-e-3",)
+
+
+def _supports_n(model: str) -> bool:
+    return not model.startswith(_SINGLE_IMAGE_MODELS)
+
+
+def openai_images_generate(
+    prompt: str,
+    size: str,
+    transparent: bool,
+    limiter: Optional[RateLimiter] = None,
+    retries: Optional[int] = None,
+    log: Callable[[str], None] = print,
+) -> BinaryIO:
+    """Call OpenAI Images API (REST) and return the PNG as a binary file rewound to 0.
 
 This is intentionally REST-based to avoid SDK churn.
+Transient HTTP failures are retried here (see _request_with_backoff); anything that still
+fails raises ImagesAPIError.
+The response is streamed: base64 payloads are decoded chunk by chunk and URL downloads are
+copied as they arrive, both into a spool file, so the full body is never held in memory.
 """
+    return openai_images_generate_many(prompt, size, transparent, 1, limiter, retries, log)[0]
+
+
+def openai_images_generate_many(
+    prompt: str,
+    size: str,
+    transparent: bool,
+    n: int,
+    limiter: Optional[RateLimiter] = None,
+    retries: Optional[int] = None,
+    log: Callable[[str], None] = print,
+) -> list[BinaryIO]:
+    """Like openai_images_generate, but asks for `n` images in one request (`n` must be supported by the model)."""
+    if retries is None:
+        retries = _http_retries()
 
     api_key = _env("OPENAI_API_KEY")
-    model = os.getenv("OPENAI_IMAGE_MODEL", "dall-e-3")
+    model = _image_model()
 
-    url = "https://api.openai.com/v1/images/generations"
+    url = f"{_api_base_url()}/images/generations"
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
@@ -75,35 +528,63 @@ This is intentionally REST-based to avoid SDK churn.
         "model": model,
         "prompt": prompt,
         "size": size,
-        "n": 1,
+        "n": n,
     }
 
     # DALL-E 3 doesn't support transparent backgrounds natively
     # We'll post-process with remove_near_white_background instead
 
-    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=120)
-    if r.status_code >= 400:
-        raise RuntimeError(f"OpenAI Images API error {r.status_code}: {r.text}")
+    body_out = json.dumps(payload)
+    count_bytes("http_out", len(body_out))
+    r = _request_with_backoff(
+        "POST",
+        url,
+        retries=retries,
+        limiter=limiter,
+        images=payload["n"],
+        log=log,
+        headers=headers,
+        data=body_out,
+        timeout=120,
+        stream=True,
+    )
+    with r, stage("download"):
+        if r.status_code >= 400:
+            raise ImagesAPIError(f"OpenAI Images API error {r.status_code}: {r.text}")
+
+        outs, body = _spool_b64_json(r, limit=n)
+        if body is None:
+            return outs
 
-    data = r.json()
-    item = (data.get("data") or [None])[0]
-    if not item:
+    data = json.loads(body)
+    items = data.get("data") or []
+    if not items:
         raise RuntimeError(f"Unexpected response: {data}")
 
-    if "b64_json" in item and item["b64_json"]:
-        return base64.b64decode(item["b64_json"])
+    for item in items[:n]:
+        if not item.get("url"):
+            raise RuntimeError(f"Unexpected response item: {item}")
+        out = _new_spool()
+        with _request_with_backoff("GET", item["url"], retries=retries, log=log, timeout=120, stream=True) as img:
+            if img.status_code >= 400:
+                raise ImagesAPIError(f"Image download error {img.status_code} for {item['url']}")
+            with stage("download"):
+                for chunk in _iter_body(img):
+                    out.write(chunk)
+        count_bytes("image_in", out.tell())
+        out.seek(0)
+        outs.append(out)
+    return outs
 
-    if "url" in item and item["url"]:
-        img = requests.get(item["url"], timeout=120)
-        img.raise_for_status()
-        return img.content
 
-    raise RuntimeError(f"Unexpected response item: {item}")
+def _as_rgba(im: Image.Image) -> Image.Image:
+    """`im` itself if it is already RGBA, otherwise an RGBA copy."""
+    return im if im.mode == "RGBA" else im.convert("RGBA")
 
 
 def _corner_patch_rgb(im: Image.Image, patch: int = 12) -> list[tuple[int, int, int]]:
     """Collect RGB samples from 4 corner patches."""
-    im = im.convert("RGBA")
+    im = _as_rgba(im)
     w, h = im.size
     px = im.load()
     coords = [
@@ -137,6 +618,7 @@ def _median_rgb(samples: list[tuple[int, int, int]]) -> tuple[int, int, int]:
 
 def _background_looks_solid_white(im: Image.Image) -> bool:
     """Heuristic: corners must be near pure-white and consistent (reject grid/preview)."""
+    im = _as_rgba(im)
     samples = _corner_patch_rgb(im, patch=14)
     bg = _median_rgb(samples)
     # near-white threshold
@@ -151,7 +633,6 @@ def _background_looks_solid_white(im: Image.Image) -> bool:
         return False
 
     # additionally sample border pixels around the whole image (reject grids/checkerboards)
-    im = im.convert("RGBA")
     w, h = im.size
     px = im.load()
     step = max(8, min(w, h) // 80)  # ~80 samples per side
@@ -177,21 +658,13 @@ def _background_looks_solid_white(im: Image.Image) -> bool:
     return ok / max(1, total) >= 0.98
 
 
-def _remove_background_from_edges(png_bytes: bytes) -> bytes:
-    """Remove solid background by flood-fill from image edges.
-
-This preserves internal white details (e.g. mushroom spots), unlike naive "remove all white".
-"""
+def _clear_edge_background_python(im: Image.Image, bg: tuple[int, int, int]) -> None:
+    """Reference engine: per-pixel BFS from the edges, clears alpha in place."""
     from collections import deque
-    from io import BytesIO
 
-    im = Image.open(BytesIO(png_bytes)).convert("RGBA")
     w, h = im.size
     px = im.load()
 
-    # Estimate background color from corners (median).
-    bg = _median_rgb(_corner_patch_rgb(im, patch=16))
-
     # Mark as background if it's close to bg color OR looks like neutral background.
     # This is intentionally forgiving to handle "grid"/"checkerboard" artifacts.
     dist_thr = 28
@@ -257,149 +730,1312 @@ This preserves internal white details (e.g. mushroom spots), unlike naive "remov
         if y + 1 < h:
             q.append((x, y + 1))
 
-    def keep_largest_alpha_component(image: Image.Image) -> Image.Image:
-        """Remove small disconnected blobs (e.g. dropped shadow / grass) keeping the main object."""
-        image = image.convert("RGBA")
-        w2, h2 = image.size
-        px2 = image.load()
 
-        def alpha_at(x: int, y: int) -> int:
-            return px2[x, y][3]
+# Rows per band when SpriteBuffers.load copies a decoded image into its RGBA buffer.
+LOAD_BAND_ROWS = 64
 
-        from collections import deque
 
-        visited2 = bytearray(w2 * h2)
+class SpriteBuffers:
+    """Decoded RGBA pixels plus the scratch arrays shared by the NumPy post-processing stages.
 
-        def idx2(x: int, y: int) -> int:
-            return y * w2 + x
+Stages read and write `rgba` in place and borrow the scratch arrays instead of allocating
+full-size temporaries. `load()` keeps one set per thread and reuses it while sprites keep
+the same size, so the arrays are allocated once per worker rather than once per stage.
+"""
 
-        comps: list[tuple[int, tuple[int, int]]] = []
+    _local = threading.local()
+
+    def __init__(self, h: int, w: int) -> None:
+        self.shape = (h, w)
+        self.rgba = np.empty((h, w, 4), dtype=np.uint8)
+        self.alpha = self.rgba[..., 3]
+        self.mask = np.empty((h, w), dtype=bool)
+        self.mask2 = np.empty((h, w), dtype=bool)
+        self.u8 = np.empty((2, h, w), dtype=np.uint8)
+        # Two int32 planes, big enough for (h, w) sums and the (h, w + 1) run painting.
+        self.i32 = np.empty((2, h * (w + 1) + 1), dtype=np.int32)
+        self.runs = np.empty((h, w + 2), dtype=np.int8)
+        self.edges = np.empty((h, w + 1), dtype=np.int8)
+        self.edge_mask = np.empty((h, w + 1), dtype=bool)
+
+    @classmethod
+    def load(cls, im: Image.Image) -> SpriteBuffers:
+        """This thread's buffers, holding `im` as RGBA (reallocated only when the size changes).
+
+RGB and RGBA images are copied in bands of LOAD_BAND_ROWS rows, so the only transient copies
+are band-sized; other modes still go through a full RGBA conversion.
+"""
+        w, h = im.size
+        buf: Optional[SpriteBuffers] = getattr(cls._local, "buffers", None)
+        if buf is None or buf.shape != (h, w):
+            buf = cls(h, w)
+            cls._local.buffers = buf
+        if im.mode not in ("RGB", "RGBA"):
+            np.copyto(buf.rgba, np.asarray(im.convert("RGBA")))
+            return buf
+        channels = len(im.mode)
+        for y in range(0, h, LOAD_BAND_ROWS):
+            band = np.asarray(im.crop((0, y, w, min(h, y + LOAD_BAND_ROWS))))
+            buf.rgba[y : y + band.shape[0], :, :channels] = band
+        if channels == 3:
+            buf.alpha.fill(255)
+        return buf
+
+
+def _label_components(mask: np.ndarray, buf: SpriteBuffers) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Label 4-connected components of a boolean mask in a single pass over its row runs.
+
+Runs overlapping a run in the previous row are merged with union-find, so the work is
+proportional to the number of runs rather than pixels. Full-size intermediates live in
+`buf`'s scratch arrays.
+
+Returns (labels, sizes, bboxes): `labels` is an int32 image with 0 for unset pixels and
+1..n for components numbered in raster order of their first pixel (a view into `buf`,
+valid until the next stage uses the scratch); `sizes[k]` and `bboxes[k]` = (x0, y0, x1, y1),
+end-exclusive, describe label k + 1.
+"""
+    h, w = mask.shape
+    padded = buf.runs
+    padded[:, 0] = 0
+    padded[:, -1] = 0
+    padded[:, 1:-1] = mask
+    edges = np.subtract(padded[:, 1:], padded[:, :-1], out=buf.edges)
+    ys, xs0 = np.nonzero(np.equal(edges, 1, out=buf.edge_mask))
+    _, xs1 = np.nonzero(np.equal(edges, -1, out=buf.edge_mask))
+    n = len(ys)
+    if n == 0:
+        labels = buf.i32[1][: h * w].reshape(h, w)
+        labels.fill(0)
+        return labels, np.zeros(0, dtype=np.int64), np.zeros((0, 4), dtype=np.int64)
+
+    # Row-major keys; stride w + 1 keeps run ends of one row below the next row's starts.
+    stride = w + 1
+    start_key = ys * stride + xs0
+    end_key = ys * stride + xs1
+
+    # For each run, the runs of the previous row that overlap it form a contiguous range.
+    prev_row = (ys - 1) * stride
+    lo = np.searchsorted(end_key, prev_row + xs0, side="right")
+    hi = np.searchsorted(start_key, prev_row + xs1, side="left")
+    counts = np.maximum(hi - lo, 0)
+    counts[ys == 0] = 0
+    cur = np.repeat(np.arange(n), counts)
+    prev = np.repeat(lo, counts) + (np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts))
+
+    # Union-find over runs; the root is always the smallest run index in the set.
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in zip(prev.tolist(), cur.tolist()):
+        ra = find(a)
+        rb = find(b)
+        if ra < rb:
+            parent[rb] = ra
+        elif rb < ra:
+            parent[ra] = rb
+    for i in range(n):
+        parent[i] = parent[parent[i]]
+
+    _, run_label = np.unique(np.asarray(parent), return_inverse=True)
+    run_label = run_label.astype(np.int32) + 1
+    n_labels = int(run_label.max())
+
+    sizes = np.bincount(run_label - 1, weights=xs1 - xs0, minlength=n_labels).astype(np.int64)
+    bboxes = np.empty((n_labels, 4), dtype=np.int64)
+    bboxes[:, 0] = w
+    bboxes[:, 1] = h
+    bboxes[:, 2] = 0
+    bboxes[:, 3] = 0
+    np.minimum.at(bboxes[:, 0], run_label - 1, xs0)
+    np.minimum.at(bboxes[:, 1], run_label - 1, ys)
+    np.maximum.at(bboxes[:, 2], run_label - 1, xs1)
+    np.maximum.at(bboxes[:, 3], run_label - 1, ys + 1)
+
+    # Paint runs: +label at each start, -label at each end, then a running sum.
+    flat = buf.i32[0][: h * stride + 1]
+    flat.fill(0)
+    flat[start_key] = run_label
+    flat[end_key] = -run_label
+    labels = np.cumsum(flat[:-1], out=buf.i32[1][: h * stride]).reshape(h, stride)[:, :w]
+    return labels, sizes, bboxes
+
+
+def _background_mask(buf: SpriteBuffers, bg: tuple[int, int, int]) -> np.ndarray:
+    """Vectorized `is_bg` predicate over `buf.rgba`, written into `buf.mask`."""
+    r, g, b = buf.rgba[..., 0], buf.rgba[..., 1], buf.rgba[..., 2]
+    mask, tmp = buf.mask, buf.mask2
+    hi, lo = buf.u8
+    acc = buf.i32[0][: mask.size].reshape(mask.shape)
+    term = buf.i32[1][: mask.size].reshape(mask.shape)
+
+    # Keep in sync with `is_bg` in _clear_edge_background_python.
+    dist_thr = 28
+    acc.fill(0)
+    for channel, ref in zip((r, g, b), bg):
+        np.subtract(channel, ref, out=term, dtype=np.int32)
+        acc += np.abs(term, out=term)
+    np.less_equal(acc, dist_thr, out=mask)
+
+    # lum = (299r + 587g + 114b) // 1000, so lum >= t exactly when the weighted sum >= 1000t.
+    np.multiply(r, 299, out=acc, dtype=np.int32)
+    acc += np.multiply(g, 587, out=term, dtype=np.int32)
+    acc += np.multiply(b, 114, out=term, dtype=np.int32)
+    mask |= np.greater_equal(acc, 235_000, out=tmp)
+
+    # sat = max(r, g, b) - min(r, g, b)
+    np.maximum(np.maximum(r, g, out=hi), b, out=hi)
+    np.minimum(np.minimum(r, g, out=lo), b, out=lo)
+    np.subtract(hi, lo, out=hi)
+    np.less_equal(hi, 18, out=tmp)
+    tmp &= np.greater_equal(acc, 110_000, out=lo.view(np.bool_))
+    mask |= tmp
+
+    mask |= np.equal(buf.alpha, 0, out=tmp)
+    return mask
+
+
+def _edge_connected(mask: np.ndarray, buf: SpriteBuffers, out: np.ndarray) -> np.ndarray:
+    """Pixels of `mask` 4-connected to a `mask` pixel on the image border, written into `out`.
+
+Equivalent to the BFS flood fill: the components of `mask` that touch the border, found
+with one _label_components pass over the row runs.
+"""
+    labels, sizes, _ = _label_components(mask, buf)
+    touching = np.zeros(len(sizes) + 1, dtype=bool)
+    for edge in (labels[0], labels[-1], labels[:, 0], labels[:, -1]):
+        touching[edge] = True
+    touching[0] = False
+    return np.take(touching, labels, out=out)
 
-        for yy in range(h2):
-            for xx in range(w2):
-                if alpha_at(xx, yy) == 0:
-                    continue
-                ii = idx2(xx, yy)
-                if visited2[ii]:
-                    continue
-                # BFS to count component size
-                q2: deque[tuple[int, int]] = deque([(xx, yy)])
-                visited2[ii] = 1
-                size = 0
-                while q2:
-                    x, y = q2.popleft()
-                    if alpha_at(x, y) == 0:
-                        continue
-                    size += 1
-                    if x > 0:
-                        ni = idx2(x - 1, y)
-                        if not visited2[ni]:
-                            visited2[ni] = 1
-                            q2.append((x - 1, y))
-                    if x + 1 < w2:
-                        ni = idx2(x + 1, y)
-                        if not visited2[ni]:
-                            visited2[ni] = 1
-                            q2.append((x + 1, y))
-                    if y > 0:
-                        ni = idx2(x, y - 1)
-                        if not visited2[ni]:
-                            visited2[ni] = 1
-                            q2.append((x, y - 1))
-                    if y + 1 < h2:
-                        ni = idx2(x, y + 1)
-                        if not visited2[ni]:
-                            visited2[ni] = 1
-                            q2.append((x, y + 1))
-                comps.append((size, (xx, yy)))
-
-        if not comps:
-            return image
-
-        comps.sort(key=lambda t: t[0], reverse=True)
-        _, seed = comps[0]
-
-        # Mark pixels to keep (largest component)
-        keep = bytearray(w2 * h2)
-        qk: deque[tuple[int, int]] = deque([seed])
-
-        while qk:
-            x, y = qk.popleft()
-            if alpha_at(x, y) == 0:
+
+def _clear_edge_background_numpy(buf: SpriteBuffers, bg: tuple[int, int, int]) -> None:
+    """NumPy engine: same result as _clear_edge_background_python, in place on `buf.rgba`."""
+    reach = _edge_connected(_background_mask(buf, bg), buf, out=buf.mask2)
+    np.copyto(buf.alpha, 0, where=reach)
+
+
+def _keep_largest_alpha_component_python(image: Image.Image) -> Image.Image:
+    """Remove small disconnected blobs (e.g. dropped shadow / grass) keeping the main object.
+
+Works in place on RGBA input."""
+    image = _as_rgba(image)
+    w2, h2 = image.size
+    px2 = image.load()
+
+    def alpha_at(x: int, y: int) -> int:
+        return px2[x, y][3]
+
+    from collections import deque
+
+    visited2 = bytearray(w2 * h2)
+
+    def idx2(x: int, y: int) -> int:
+        return y * w2 + x
+
+    comps: list[tuple[int, tuple[int, int]]] = []
+
+    for yy in range(h2):
+        for xx in range(w2):
+            if alpha_at(xx, yy) == 0:
                 continue
-            ii = idx2(x, y)
-            if keep[ii]:
+            ii = idx2(xx, yy)
+            if visited2[ii]:
                 continue
-            keep[ii] = 1
-            if x > 0:
-                qk.append((x - 1, y))
-            if x + 1 < w2:
-                qk.append((x + 1, y))
-            if y > 0:
-                qk.append((x, y - 1))
-            if y + 1 < h2:
-                qk.append((x, y + 1))
-
-        # Remove everything not in largest component.
-        for yy in range(h2):
-            row_off = yy * w2
-            for xx in range(w2):
-                if alpha_at(xx, yy) == 0:
+            # BFS to count component size
+            q2: deque[tuple[int, int]] = deque([(xx, yy)])
+            visited2[ii] = 1
+            size = 0
+            while q2:
+                x, y = q2.popleft()
+                if alpha_at(x, y) == 0:
                     continue
-                if not keep[row_off + xx]:
-                    r, g, b, a = px2[xx, yy]
-                    px2[xx, yy] = (r, g, b, 0)
-
+                size += 1
+                if x > 0:
+                    ni = idx2(x - 1, y)
+                    if not visited2[ni]:
+                        visited2[ni] = 1
+                        q2.append((x - 1, y))
+                if x + 1 < w2:
+                    ni = idx2(x + 1, y)
+                    if not visited2[ni]:
+                        visited2[ni] = 1
+                        q2.append((x + 1, y))
+                if y > 0:
+                    ni = idx2(x, y - 1)
+                    if not visited2[ni]:
+                        visited2[ni] = 1
+                        q2.append((x, y - 1))
+                if y + 1 < h2:
+                    ni = idx2(x, y + 1)
+                    if not visited2[ni]:
+                        visited2[ni] = 1
+                        q2.append((x, y + 1))
+            comps.append((size, (xx, yy)))
+
+    if not comps:
         return image
 
-    im = keep_largest_alpha_component(im)
-
-    def has_large_base(image: Image.Image) -> bool:
-        """Reject sprites that include a wide 'ground/shadow' base."""
-        image = image.convert("RGBA")
-        alpha = image.split()[-1]
-        w3, h3 = image.size
-        px3 = alpha.load()
-        # Look at bottom 8% rows
-        start_y = int(h3 * 0.92)
-        thresh_row = int(w3 * 0.38)
-        for y in range(start_y, h3):
-            count = 0
-            for x in range(w3):
-                if px3[x, y] > 0:
-                    count += 1
-            if count >= thresh_row:
-                return True
+    comps.sort(key=lambda t: t[0], reverse=True)
+    _, seed = comps[0]
+
+    # Mark pixels to keep (largest component)
+    keep = bytearray(w2 * h2)
+    qk: deque[tuple[int, int]] = deque([seed])
+
+    while qk:
+        x, y = qk.popleft()
+        if alpha_at(x, y) == 0:
+            continue
+        ii = idx2(x, y)
+        if keep[ii]:
+            continue
+        keep[ii] = 1
+        if x > 0:
+            qk.append((x - 1, y))
+        if x + 1 < w2:
+            qk.append((x + 1, y))
+        if y > 0:
+            qk.append((x, y - 1))
+        if y + 1 < h2:
+            qk.append((x, y + 1))
+
+    # Remove everything not in largest component.
+    for yy in range(h2):
+        row_off = yy * w2
+        for xx in range(w2):
+            if alpha_at(xx, yy) == 0:
+                continue
+            if not keep[row_off + xx]:
+                r, g, b, a = px2[xx, yy]
+                px2[xx, yy] = (r, g, b, 0)
+
+    return image
+
+
+def _has_large_base(image: Image.Image) -> bool:
+    """Reject sprites that include a wide 'ground/shadow' base."""
+    image = _as_rgba(image)
+    w3, h3 = image.size
+    px3 = image.load()
+    # Look at bottom 8% rows
+    start_y = int(h3 * 0.92)
+    thresh_row = int(w3 * 0.38)
+    for y in range(start_y, h3):
+        count = 0
+        for x in range(w3):
+            if px3[x, y][3] > 0:
+                count += 1
+        if count >= thresh_row:
+            return True
+    return False
+
+
+def _keep_largest_alpha_component_numpy(buf: SpriteBuffers) -> None:
+    """NumPy counterpart of _keep_largest_alpha_component_python, in place on `buf.rgba`
+(ties go to the first component in raster order)."""
+    labels, sizes, _ = _label_components(np.not_equal(buf.alpha, 0, out=buf.mask), buf)
+    if len(sizes) == 0:
+        return
+    drop = np.ones(len(sizes) + 1, dtype=bool)
+    drop[int(np.argmax(sizes)) + 1] = False
+    np.copyto(buf.alpha, 0, where=np.take(drop, labels, out=buf.mask2))
+
+
+def _corner_median_rgb(rgba: np.ndarray, patch: int) -> tuple[int, int, int]:
+    """_median_rgb(_corner_patch_rgb(im, patch)) computed on views of an (h, w, 4) array."""
+    h, w = rgba.shape[:2]
+    corners = ((0, 0), (w - patch, 0), (0, h - patch), (w - patch, h - patch))
+    samples = np.concatenate(
+        [rgba[max(0, y0) : min(h, y0 + patch), max(0, x0) : min(w, x0 + patch)].reshape(-1, 4) for x0, y0 in corners]
+    )
+    if len(samples) == 0:
+        return (255, 255, 255)
+    rgb = samples[:, :3].copy()
+    # treat fully transparent as white-ish for sampling purposes
+    rgb[samples[:, 3] == 0] = 255
+    rgb.sort(axis=0)
+    mid = rgb[len(rgb) // 2]
+    return (int(mid[0]), int(mid[1]), int(mid[2]))
+
+
+def _border_cleanliness(rgba: np.ndarray, bg: tuple[int, int, int]) -> float:
+    """Share of border pixels within a small distance of the background color (1.0 = solid background)."""
+    rgb = rgba[..., :3]
+    border = np.concatenate([rgb[0], rgb[-1], rgb[1:-1, 0], rgb[1:-1, -1]]).astype(np.int16)
+    dist = np.abs(border - np.array(bg, dtype=np.int16)).sum(axis=1)
+    return float((dist <= 18).mean())
+
+
+def _widest_bottom_row(alpha: np.ndarray, scratch: np.ndarray) -> int:
+    """Opaque pixels in the widest of the bottom 8% rows; `scratch` is a bool array of alpha's shape."""
+    start = int(alpha.shape[0] * 0.92)
+    band = np.not_equal(alpha[start:], 0, out=scratch[start:])
+    return int(band.sum(axis=1).max()) if band.size else 0
+
+
+def _bottom_coverage(alpha: np.ndarray, scratch: np.ndarray) -> float:
+    """Widest opaque row in the bottom 8% relative to the width; _has_large_base rejects >= 0.38."""
+    return _widest_bottom_row(alpha, scratch) / alpha.shape[1]
+
+
+def _has_large_base_numpy(buf: SpriteBuffers) -> bool:
+    """NumPy counterpart of _has_large_base."""
+    return _widest_bottom_row(buf.alpha, buf.mask) >= int(buf.shape[1] * 0.38)
+
+
+def _trim_box(alpha: np.ndarray, scratch: np.ndarray, margin: int = 3) -> Optional[tuple[int, int, int, int]]:
+    """Bounding box of the opaque pixels grown by `margin`, or None if there are none."""
+    h, w = alpha.shape
+    opaque = np.not_equal(alpha, 0, out=scratch)
+    rows = np.flatnonzero(opaque.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(opaque.any(axis=0))
+    return (
+        max(0, int(cols[0]) - margin),
+        max(0, int(rows[0]) - margin),
+        min(w, int(cols[-1]) + 1 + margin),
+        min(h, int(rows[-1]) + 1 + margin),
+    )
+
+
+# Coarse pre-check: background removal at 1/PRECHECK_FACTOR resolution rejects sprites with a
+# wide base before the full-resolution pass. The full pass rejects at a bottom coverage of 0.38;
+# the coarse mask is a little wider (box-filtered edges), so it only rejects above
+# PRECHECK_REJECT_COVERAGE. Calibrated with `bench_postprocess.py --calibrate`, which checks that
+# the pre-check never rejects a sprite the full pass keeps.
+PRECHECK_FACTOR = 4
+PRECHECK_REJECT_COVERAGE = 0.42
+# Smaller inputs are cheap enough at full resolution.
+PRECHECK_MIN_SIZE = 256
+_LARGE_BASE_ERROR = "Sprite contains a wide ground/shadow base; retrying generation."
+
+
+def _coarse_bottom_coverage(im: Image.Image, factor: int = PRECHECK_FACTOR) -> Optional[float]:
+    """_bottom_coverage after flood fill and component filtering of `im` reduced by `factor`,
+or None if the reduced image doesn't have a solid white background to segment reliably."""
+    # Nearest-neighbour sampling costs well under a millisecond even at 2048 px, unlike a box filter.
+    w, h = max(1, im.width // factor), max(1, im.height // factor)
+    small = _as_rgba(im).resize((w, h), Image.Resampling.NEAREST)
+    if not _background_looks_solid_white(small):
+        return None
+    # Own buffers: SpriteBuffers.load would evict this thread's full-size ones.
+    buf = SpriteBuffers(h, w)
+    np.copyto(buf.rgba, np.asarray(small))
+    _clear_edge_background_numpy(buf, _corner_median_rgb(buf.rgba, patch=max(2, 16 // factor)))
+    _keep_largest_alpha_component_numpy(buf)
+    return _bottom_coverage(buf.alpha, buf.mask)
+
+
+def _precheck_rejects(im: Image.Image) -> bool:
+    """Whether the coarse pass is sure the full pass would reject `im` for a wide base."""
+    if min(im.size) < PRECHECK_MIN_SIZE:
         return False
+    coverage = _coarse_bottom_coverage(im)
+    return coverage is not None and coverage >= PRECHECK_REJECT_COVERAGE
+
+
+def _remove_background_python(im: Image.Image, quality: Optional[dict[str, float]]) -> Image.Image:
+    """Reference engine for _remove_background_from_edges; modifies the RGBA `im` in place."""
+    w, h = im.size
+    with stage("bg_estimate"):
+        bg = _median_rgb(_corner_patch_rgb(im, patch=16))
+    if quality is not None:
+        with stage("score"):
+            quality["border_clean"] = _border_cleanliness(np.asarray(im), bg)
+
+    with stage("flood_fill"):
+        _clear_edge_background_python(im, bg)
+    if quality is not None:
+        opaque_before = int(np.count_nonzero(np.asarray(im)[..., 3]))
+
+    with stage("components"):
+        im = _keep_largest_alpha_component_python(im)
+    if quality is not None:
+        with stage("score"):
+            alpha = np.asarray(im)[..., 3]
+            quality["largest_share"] = int(np.count_nonzero(alpha)) / max(1, opaque_before)
+            quality["bottom_coverage"] = _bottom_coverage(alpha, np.empty(alpha.shape, dtype=bool))
 
     # If model still draws a ground/shadow base, reject so caller can retry.
-    if has_large_base(im):
-        raise RuntimeError("Sprite contains a wide ground/shadow base; retrying generation.")
+    with stage("large_base"):
+        large_base = _has_large_base(im)
+    if large_base:
+        raise RuntimeError(_LARGE_BASE_ERROR)
 
     # Trim transparent borders to keep sprites tight.
-    alpha = im.split()[-1]
-    bbox = alpha.getbbox()
-    if bbox:
-        margin = 3
-        x0, y0, x1, y1 = bbox
-        x0 = max(0, x0 - margin)
-        y0 = max(0, y0 - margin)
-        x1 = min(w, x1 + margin)
-        y1 = min(h, y1 + margin)
-        im = im.crop((x0, y0, x1, y1))
-
-    out = BytesIO()
-    im.save(out, format="PNG")
-    return out.getvalue()
-
-
-def write_png(path: Path, data: bytes) -> None:
+    with stage("trim"):
+        bbox = im.getchannel("A").getbbox()
+        if bbox:
+            margin = 3
+            x0, y0, x1, y1 = bbox
+            x0, y0 = max(0, x0 - margin), max(0, y0 - margin)
+            im = im.crop((x0, y0, min(w, x1 + margin), min(h, y1 + margin)))
+            im.info[TRIM_KEY] = trim_text(x0, y0, w, h)
+    return im
+
+
+def _remove_background_numpy(buf: SpriteBuffers, quality: Optional[dict[str, float]]) -> Image.Image:
+    """NumPy engine for _remove_background_from_edges: every stage works in place on `buf`."""
+    with stage("bg_estimate"):
+        bg = _corner_median_rgb(buf.rgba, patch=16)
+    if quality is not None:
+        with stage("score"):
+            quality["border_clean"] = _border_cleanliness(buf.rgba, bg)
+
+    with stage("flood_fill"):
+        _clear_edge_background_numpy(buf, bg)
+    if quality is not None:
+        opaque_before = int(np.count_nonzero(np.not_equal(buf.alpha, 0, out=buf.mask)))
+
+    with stage("components"):
+        _keep_largest_alpha_component_numpy(buf)
+    if quality is not None:
+        with stage("score"):
+            opaque_after = int(np.count_nonzero(np.not_equal(buf.alpha, 0, out=buf.mask)))
+            quality["largest_share"] = opaque_after / max(1, opaque_before)
+            quality["bottom_coverage"] = _bottom_coverage(buf.alpha, buf.mask)
+
+    with stage("large_base"):
+        large_base = _has_large_base_numpy(buf)
+    if large_base:
+        raise RuntimeError(_LARGE_BASE_ERROR)
+
+    with stage("trim"):
+        box = _trim_box(buf.alpha, buf.mask)
+        # The only copy out of the shared buffer, which the next sprite on this thread reuses.
+        if box is None:
+            # Nothing opaque: untrimmed and without trim metadata, like the python engine.
+            return Image.fromarray(buf.rgba.copy())
+        x0, y0, x1, y1 = box
+        im = Image.fromarray(buf.rgba[y0:y1, x0:x1].copy())
+    # Saved as a PNG text chunk, for assetinfo.json.
+    im.info[TRIM_KEY] = trim_text(x0, y0, buf.alpha.shape[1], buf.alpha.shape[0])
+    return im
+
+
+def _remove_background_from_edges(
+    src: ImageSource, engine: str = "numpy", quality: Optional[dict[str, float]] = None, precheck: bool = True
+) -> Image.Image:
+    """Remove solid background by flood-fill from image edges.
+
+This preserves internal white details (e.g. mushroom spots), unlike naive "remove all white".
+`engine` selects the NumPy implementation ("numpy") or the original per-pixel one ("python");
+both produce identical pixels. The NumPy engine decodes into one RGBA buffer per thread
+(SpriteBuffers) that every stage reads and writes in place.
+`src` is encoded bytes, a readable binary file or an already decoded image; the trimmed
+RGBA image is returned without re-encoding, so callers can save it once at its destination.
+If `quality` is given, it is filled with the measurements used to rank candidates
+(see _candidate_score): "border_clean", "largest_share" and "bottom_coverage".
+With `precheck`, sprites with an obvious wide base are rejected from a 1/PRECHECK_FACTOR
+downsample before any full-resolution work (see PRECHECK_REJECT_COVERAGE).
+"""
+    with stage("decode"):
+        im = _open_image(src)
+        im.load()
+    if precheck:
+        with stage("precheck"):
+            rejected = _precheck_rejects(im)
+        if rejected:
+            raise RuntimeError(_LARGE_BASE_ERROR)
+    with stage("decode"):
+        if engine == "python":
+            decoded = im.convert("RGBA")
+        else:
+            buf = SpriteBuffers.load(im)
+    if engine == "python":
+        return _remove_background_python(decoded, quality)
+    return _remove_background_numpy(buf, quality)
+
+
+def _display_path(path: Path) -> Path:
+    try:
+        return path.relative_to(ROOT)
+    except ValueError:
+        return path
+
+
+def write_png(path: Path, data: ImageSource, log: Callable[[str], None] = print, note: str = "") -> None:
+    """Write encoded bytes, a raw binary stream (copied in chunks) or an image (encoded straight to `path`).
+
+The "Wrote" line gives the final size on disk, followed by `note` (e.g. how it was optimized).
+"""
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_bytes(data)
-    print(f"Wrote {path.relative_to(ROOT)} ({len(data)/1024:.1f} KB)")
+    with stage("write"):
+        if isinstance(data, Image.Image):
+            data.save(path, format="PNG", pnginfo=png_text(data))
+        elif isinstance(data, (bytes, bytearray)):
+            path.write_bytes(data)
+        else:
+            data.seek(0)
+            with path.open("wb") as f:
+                shutil.copyfileobj(data, f, _COPY_CHUNK)
+    size = path.stat().st_size
+    count_bytes("written", size)
+    log(f"Wrote {_display_path(path)} ({size/1024:.1f} KB{f', {note}' if note else ''})")
+
+
+def _save_final(path: Path, im: Image.Image, spec: ImageSpec, args: argparse.Namespace, log: Callable[[str], None]) -> None:
+    """Optimize (unless --no-optimize) and write one output image, plus WebP with --webp."""
+    if args.no_optimize:
+        write_png(path, im, log=log)
+    else:
+        with stage("encode"):
+            data, err = optimize_png(im, spec.max_quant_error)
+        note = f"palette-quantized, error {err:.2f} <= {spec.max_quant_error}" if err is not None else "truecolor"
+        write_png(path, data, log=log, note=note)
+    if args.webp:
+        webp_path = path.with_suffix(".webp")
+        with stage("webp"):
+            written = save_webp_lossless(im, webp_path)
+        if written:
+            count_bytes("written", webp_path.stat().st_size)
+            log(f"Wrote {_display_path(webp_path)} ({webp_path.stat().st_size/1024:.1f} KB)")
+        else:
+            log("  WebP not supported by this Pillow build; skipped")
+
+
+def _resize_premultiplied(im: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """Lanczos downscale in premultiplied alpha, so transparent pixels don't fringe the edges."""
+    if im.mode != "RGBA":
+        return im.resize(size, Image.Resampling.LANCZOS)
+    return im.convert("RGBa").resize(size, Image.Resampling.LANCZOS).convert("RGBA")
+
+
+def _scaled_size(src: tuple[int, int], display: tuple[int, int], scale: int) -> tuple[int, int]:
+    """Pixel size covering `display` points at `scale`, keeping aspect ratio and never upscaling."""
+    w, h = src
+    factor = min(1.0, max(display[0] * scale / w, display[1] * scale / h))
+    return max(1, round(w * factor)), max(1, round(h * factor))
+
+
+def _export_scaled_variants(spec: ImageSpec, im: Image.Image, args: argparse.Namespace, log: Callable[[str], None]) -> None:
+    """Write Generated/scaled/<name>@Nx.png sized for spec.display_size at each screen scale."""
+    assert spec.display_size is not None
+    stem = Path(spec.filename).stem
+    for scale in DISPLAY_SCALES:
+        size = _scaled_size(im.size, spec.display_size, scale)
+        with stage("resize"):
+            variant = im if size == im.size else _resize_premultiplied(im, size)
+        _save_final(args.out_dir / "scaled" / f"{stem}@{scale}x.png", variant, spec, args, log)
+
+
+def _tiled(spec: ImageSpec, args: argparse.Namespace) -> bool:
+    """Whether --tile-size applies to `spec` (backgrounds, i.e. non-transparent specs)."""
+    return args.tile_size > 0 and not spec.transparent
+
+
+def _export_background_tiles(spec: ImageSpec, im: Image.Image, args: argparse.Namespace, log: Callable[[str], None]) -> None:
+    """Write Generated/tiles/<name>/: --tile-size tiles of every mip level plus tiles.json."""
+    stem = Path(spec.filename).stem
+
+    def save(path: Path, tile: Image.Image) -> None:
+        _save_final(path, tile, spec, args, lambda msg: None)
+
+    def resize(src: Image.Image, size: tuple[int, int]) -> Image.Image:
+        with stage("resize"):
+            return _resize_premultiplied(src, size)
+
+    manifest = export_tiles(im, args.out_dir, stem, args.tile_size, save, resize)
+    count = len(tile_paths(args.out_dir, stem, im.width, im.height, args.tile_size))
+    log(f"Wrote {count} tiles + {_display_path(manifest)}")
+
+
+def _write_asset(spec: ImageSpec, src: ImageSource, args: argparse.Namespace, log: Callable[[str], None]) -> None:
+    """Final stage: write the full-size asset and, if the spec has a display size, its @1x/@2x/@3x variants;
+with --tile-size, backgrounds are also written as tiles."""
+    out_path = args.out_dir / spec.filename
+    if args.no_optimize and not args.webp and spec.display_size is None and not _tiled(spec, args):
+        write_png(out_path, src, log=log)
+        return
+    with stage("decode"):
+        im = _open_image(src)
+        im.load()
+    _save_final(out_path, im, spec, args, log)
+    if spec.display_size is not None:
+        _export_scaled_variants(spec, im, args, log)
+    if _tiled(spec, args):
+        _export_background_tiles(spec, im, args, log)
+
+
+def _output_paths(spec: ImageSpec, args: argparse.Namespace) -> list[Path]:
+    """Every file _write_asset produces for `spec` with these CLI settings.
+
+Tile paths assume the API returns images of the requested `spec.size`.
+"""
+    paths = [args.out_dir / spec.filename]
+    stem = Path(spec.filename).stem
+    if spec.display_size is not None:
+        paths += [args.out_dir / "scaled" / f"{stem}@{scale}x.png" for scale in DISPLAY_SCALES]
+    if _tiled(spec, args):
+        width, height = (int(v) for v in spec.size.lower().split("x"))
+        paths += tile_paths(args.out_dir, stem, width, height, args.tile_size)
+    if args.webp and features.check("webp"):
+        paths += [p.with_suffix(".webp") for p in list(paths)]
+    if _tiled(spec, args):
+        paths.append(tiles_dir(args.out_dir, stem) / TILES_MANIFEST_NAME)
+    return paths
+
+
+@functools.lru_cache(maxsize=None)
+def _processing_fingerprint() -> str:
+    """Hash of the post-processing source, so editing it marks every output for reprocessing."""
+    code = (
+        _as_rgba,
+        _corner_patch_rgb,
+        _median_rgb,
+        _clear_edge_background_python,
+        SpriteBuffers,
+        _label_components,
+        _background_mask,
+        _edge_connected,
+        _clear_edge_background_numpy,
+        _keep_largest_alpha_component_python,
+        _has_large_base,
+        _keep_largest_alpha_component_numpy,
+        _corner_median_rgb,
+        _border_cleanliness,
+        _widest_bottom_row,
+        _bottom_coverage,
+        _has_large_base_numpy,
+        _trim_box,
+        _coarse_bottom_coverage,
+        _precheck_rejects,
+        _remove_background_python,
+        _remove_background_numpy,
+        _remove_background_from_edges,
+        _candidate_score,
+        _save_final,
+        _resize_premultiplied,
+        _scaled_size,
+        _export_scaled_variants,
+        _export_background_tiles,
+        _write_asset,
+        _derive_variant,
+    )
+    modules = [inspect.getmodule(fn) for fn in (optimize_png, export_tiles, recolor)]
+    assert all(m is not None for m in modules)
+    return source_fingerprint(*(inspect.getsource(fn) for fn in code), *(inspect.getsource(m) for m in modules))
+
+
+def _request_hash(spec: ImageSpec, args: argparse.Namespace) -> str:
+    """Inputs that need new API images when they change (for variants: a new base or remap)."""
+    if spec.base is not None:
+        return hash_json(["variant", _request_hash(spec.base, args), [astuple(m) for m in spec.recolor], spec.keep])
+    candidates = args.candidates if spec.transparent else 1
+    return hash_json([_image_model(), spec.prompt, spec.size, candidates])
+
+
+def _processing_hash(spec: ImageSpec, args: argparse.Namespace) -> str:
+    """Inputs that only need post-processing rerun when they change (the engines are pixel-identical)."""
+    settings = [
+        spec.filename,
+        spec.transparent,
+        spec.max_quant_error,
+        spec.display_size,
+        list(DISPLAY_SCALES),
+        args.no_optimize,
+        args.webp,
+    ]
+    if _tiled(spec, args):
+        # Only backgrounds depend on it, so changing it doesn't reprocess sprites.
+        settings.append(args.tile_size)
+    return hash_json([_processing_fingerprint(), settings])
+
+
+def _record_build(manifest: Optional[BuildManifest], spec: ImageSpec, args: argparse.Namespace) -> None:
+    if manifest is not None:
+        manifest.record(spec.name, _request_hash(spec, args), _processing_hash(spec, args), _output_paths(spec, args))
+
+
+def _update_asset_manifests(spec: ImageSpec, args: argparse.Namespace) -> None:
+    """Refresh the asset's entry in assetinfo.json and, for sprites, its tap mask/outline in
+hitshapes.json (main process only: the files are shared)."""
+    path = args.out_dir / spec.filename
+    if path.suffix != ".png" or not path.exists():
+        return
+    update_asset_info(args.out_dir, {path.stem: path})
+    if spec.transparent:
+        update_hit_shapes(args.out_dir, {path.stem: path})
+
+
+class AssetLog:
+    """Progress output for one asset.
+
+Unbuffered logs print immediately (sequential runs). Buffered logs collect lines until
+`flush()`, so concurrent jobs print each asset's lines together and in order.
+"""
+
+    _print_lock = threading.Lock()
+
+    def __init__(self, name: str, buffered: bool = False) -> None:
+        self.name = name
+        self.buffered = buffered
+        self._lines: list[str] = []
+
+    def __call__(self, msg: str) -> None:
+        if self.buffered:
+            self._lines.append(msg)
+        else:
+            print(msg, flush=True)
+
+    def flush(self) -> None:
+        with self._print_lock:
+            for line in self._lines:
+                print(line)
+            sys.stdout.flush()
+        self._lines.clear()
+
+
+def _fetch_raw(
+    spec: ImageSpec,
+    slot: int,
+    args: argparse.Namespace,
+    limiter: Optional[RateLimiter],
+    cache: Optional[RawImageCache],
+    log: Callable[[str], None],
+) -> BinaryIO:
+    """Raw API image for one attempt as an open binary file, from the cache when this slot was fetched before."""
+    return _fetch_raw_batch(spec, [slot], args, limiter, cache, log)[0]
+
+
+def _fetch_raw_batch(
+    spec: ImageSpec,
+    slots: list[int],
+    args: argparse.Namespace,
+    limiter: Optional[RateLimiter],
+    cache: Optional[RawImageCache],
+    log: Callable[[str], None],
+) -> list[BinaryIO]:
+    """Raw API images for several slots; cached slots are reused, the rest come from one API round.
+
+Missing images are requested with `n` in a single call where the model supports it, and as
+parallel single-image calls otherwise. The result may be shorter than `slots` if the API
+returns fewer images than asked for. Assets in `args.cached_only` (see _plan_builds) never
+call the API: a missing slot raises RawNotCachedError.
+"""
+    model = _image_model()
+    found: dict[int, BinaryIO] = {}
+    if cache is not None:
+        for slot in slots:
+            with stage("cache_lookup"):
+                path = cache.locate(request_key(model, spec.prompt, spec.size, slot))
+            if path is not None:
+                log(f"  Using cached raw image (slot {slot})")
+                count_bytes("cache_hit", path.stat().st_size)
+                found[slot] = path.open("rb")
+
+    missing = [slot for slot in slots if slot not in found]
+    if missing and spec.name in getattr(args, "cached_only", ()):
+        for data in found.values():
+            data.close()
+        raise RawNotCachedError(
+            f"raw image for slot(s) {', '.join(map(str, missing))} is not cached; "
+            "pass --force to regenerate through the API"
+        )
+    fetched: list[BinaryIO] = []
+    if len(missing) == 1 or (missing and _supports_n(model)):
+        fetched = openai_images_generate_many(
+            spec.prompt,
+            spec.size,
+            spec.transparent,
+            len(missing),
+            limiter=limiter,
+            retries=args.net_retries,
+            log=log,
+        )
+    elif missing:
+        call = bind(openai_images_generate)
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            futures = [
+                pool.submit(call, spec.prompt, spec.size, spec.transparent, limiter, args.net_retries, log)
+                for _ in missing
+            ]
+            try:
+                fetched = [f.result() for f in futures]
+            except Exception:
+                for f in futures:
+                    if f.exception() is None:
+                        f.result().close()
+                raise
+
+    for slot, data in zip(missing, fetched):
+        if cache is not None:
+            with stage("cache_store"):
+                cache.put(request_key(model, spec.prompt, spec.size, slot), data)
+            data.seek(0)
+        found[slot] = data
+    return [found[slot] for slot in slots if slot in found]
+
+
+def _candidate_score(quality: dict[str, float]) -> float:
+    """Rank post-processed candidates: clean solid background, one dominant component, no base."""
+    base_margin = 1.0 - min(1.0, quality["bottom_coverage"] / 0.38)
+    return 0.5 * quality["border_clean"] + 0.4 * quality["largest_share"] + 0.1 * base_margin
+
+
+def _process_candidate(raw: BinaryIO, engine: str) -> tuple[Image.Image, float, dict[str, float]]:
+    quality: dict[str, float] = {}
+    with raw:
+        im = _remove_background_from_edges(raw, engine=engine, quality=quality)
+    return im, _candidate_score(quality), quality
+
+
+def _generate_candidates(
+    spec: ImageSpec,
+    round_index: int,
+    args: argparse.Namespace,
+    limiter: Optional[RateLimiter],
+    cache: Optional[RawImageCache],
+    log: Callable[[str], None],
+) -> Image.Image:
+    """One --candidates round: fetch `args.candidates` images, post-process them in parallel, keep the best.
+
+Candidate k of round r uses cache slot r*N + k, so a rerun reuses the same candidates.
+Raises RuntimeError if every candidate is rejected.
+"""
+    n = args.candidates
+    raws = _fetch_raw_batch(spec, list(range(round_index * n, (round_index + 1) * n)), args, limiter, cache, log)
+    return _best_candidate(raws, args.engine, log, parallel=True)
+
+
+def _best_candidate(
+    raws: list[BinaryIO], engine: str, log: Callable[[str], None], parallel: bool = False
+) -> Image.Image:
+    """Post-process candidates (on threads if `parallel`) and return the best-scoring one; closes `raws`."""
+    if parallel:
+        process = bind(_process_candidate)
+        with ThreadPoolExecutor(max_workers=len(raws)) as pool:
+            futures = [pool.submit(process, raw, engine) for raw in raws]
+        results = [fut.exception() or fut.result() for fut in futures]
+    else:
+        results = []
+        for raw in raws:
+            try:
+                results.append(_process_candidate(raw, engine))
+            except Exception as e:
+                results.append(e)
+    best: Optional[tuple[float, int, Image.Image]] = None
+    errors: list[str] = []
+    for i, result in enumerate(results):
+        try:
+            if isinstance(result, BaseException):
+                raise result
+            im, score, quality = result
+        except Exception as e:
+            log(f"  Candidate {i + 1}/{len(raws)} rejected: {e}")
+            note_retry("candidate", str(e))
+            errors.append(str(e))
+            continue
+        details = ", ".join(f"{k} {v:.2f}" for k, v in quality.items())
+        log(f"  Candidate {i + 1}/{len(raws)}: score {score:.3f} ({details})")
+        if best is None or score > best[0]:
+            best = (score, i, im)
+    if best is None:
+        raise RuntimeError(f"all {len(raws)} candidates rejected: " + "; ".join(sorted(set(errors))))
+    log(f"  Keeping candidate {best[1] + 1} (score {best[0]:.3f})")
+    return best[2]
+
+
+def _generate_spec(
+    spec: ImageSpec,
+    args: argparse.Namespace,
+    limiter: Optional[RateLimiter],
+    cache: Optional[RawImageCache],
+    log: Callable[[str], None],
+    asset: Optional[AssetMetrics] = None,
+) -> Optional[Exception]:
+    """Generate one asset with up to `args.max_retries` attempts; return the last error, if any.
+
+Attempts are spent on unusable sprites only; network retries happen inside the API client.
+Stage timings, bytes and retries are recorded into `asset` when given (--metrics).
+"""
+    log(f"Generating {spec.name} ({spec.size})...")
+    last_err: Optional[Exception] = None
+    with recording(asset):
+        for attempt in range(1, max(1, args.max_retries) + 1):
+            if asset is not None:
+                asset.attempts = attempt
+            try:
+                if spec.transparent and args.candidates > 1:
+                    _write_asset(spec, _generate_candidates(spec, attempt - 1, args, limiter, cache, log), args, log)
+                    last_err = None
+                    break
+                with _fetch_raw(spec, attempt - 1, args, limiter, cache, log) as raw:
+                    # For sprites: validate background and convert it to transparency.
+                    if spec.transparent:
+                        # Convert background to transparency by edge flood-fill. This preserves internal whites.
+                        # We *try* to request solid white in prompts, but still post-process robustly.
+                        _write_asset(spec, _remove_background_from_edges(raw, engine=args.engine), args, log)
+                    else:
+                        _write_asset(spec, raw, args, log)
+                last_err = None
+                break
+            except ImagesAPIError as e:
+                # Transient HTTP errors were already retried with backoff; attempts here are for bad sprites.
+                last_err = e
+                break
+            except Exception as e:
+                last_err = e
+                if attempt < args.max_retries:
+                    log(f"  Attempt {attempt}/{args.max_retries} failed: {e}")
+                    note_retry("attempt", str(e))
+                    continue
+                break
+    if asset is not None and last_err is not None:
+        asset.status = "failed"
+        asset.error = str(last_err)
+    return last_err
+
+
+def _derive_variant(
+    spec: ImageSpec,
+    args: argparse.Namespace,
+    log: Callable[[str], None],
+    asset: Optional[AssetMetrics] = None,
+    base_failed: bool = False,
+) -> Optional[Exception]:
+    """Write a color variant by recoloring its base's final image; return the error, if any."""
+    assert spec.base is not None
+    log(f"Deriving {spec.name} from {spec.base.name}...")
+    err: Optional[Exception] = None
+    with recording(asset):
+        if asset is not None:
+            asset.attempts = 1
+        try:
+            if base_failed:
+                raise RuntimeError(f"base {spec.base.name} failed")
+            with Image.open(args.out_dir / spec.base.filename) as base_im:
+                with stage("decode"):
+                    base_im.load()
+                with stage("recolor"):
+                    im = recolor(base_im, spec.recolor, spec.keep)
+                if TRIM_KEY in base_im.info:
+                    im.info[TRIM_KEY] = base_im.info[TRIM_KEY]
+            _write_asset(spec, im, args, log)
+        except Exception as e:
+            err = e
+    if asset is not None and err is not None:
+        asset.status = "failed"
+        asset.error = str(err)
+    return err
+
+
+# --pipeline: API fetch threads, post-processing processes and writer threads, joined by queues.
+PIPELINE_FETCHERS = 4
+PIPELINE_WRITERS = 2
+
+
+@dataclass
+class _PipelineItem:
+    """One attempt at one asset as it moves through the --pipeline stages."""
+
+    spec: ImageSpec
+    attempt: int = 1
+    raws: list[bytes] = field(default_factory=list)
+    image: Optional[ImageSource] = None
+
 
+def _postprocess_attempt(
+    name: str, raws: list[bytes], engine: str, record: bool
+) -> tuple[Optional[Image.Image], list[str], Optional[AssetMetrics], Optional[Exception]]:
+    """Process-pool worker for --pipeline: background removal (best of several with --candidates).
 
-def _parse_args() -> argparse.Namespace:
+Returns the image (None if rejected), the log lines, the stage metrics to merge into the
+asset if `record`, and the rejection. Rejections are returned rather than raised so their
+metrics aren't lost.
+"""
+    lines: list[str] = []
+    asset = AssetMetrics(name) if record else None
+    im: Optional[Image.Image] = None
+    err: Optional[Exception] = None
+    with recording(asset):
+        try:
+            if len(raws) == 1:
+                im = _remove_background_from_edges(raws[0], engine=engine)
+            else:
+                im = _best_candidate([io.BytesIO(raw) for raw in raws], engine, lines.append)
+        except Exception as e:
+            err = e
+    return im, lines, asset, err
+
+
+def _generate_pipelined(
+    specs: list[ImageSpec],
+    args: argparse.Namespace,
+    limiter: Optional[RateLimiter],
+    cache: Optional[RawImageCache],
+    assets: dict[str, Optional[AssetMetrics]],
+    record: Callable[[ImageSpec, Optional[Exception]], None],
+    cancel: Optional[threading.Event] = None,
+) -> list[tuple[ImageSpec, Exception]]:
+    """--pipeline: generate `specs` in three stages and return the failures.
+
+fetch (--jobs threads) -> post-process (--cpu-workers processes) -> write (PIPELINE_WRITERS threads).
+The queues into the post-processing and writer stages hold --queue-depth items, so a slow stage
+blocks the one before it instead of piling up raw images in memory. A rejected sprite (or a
+failed write) goes back to the fetch queue as the next attempt, ahead of assets not started yet.
+`record` is called on this thread as each asset finishes.
+"""
+    fetchers = args.jobs or PIPELINE_FETCHERS
+    cpu_workers = args.cpu_workers or os.cpu_count() or 1
+    depth = max(1, args.queue_depth)
+    logs = {spec.name: AssetLog(spec.name, buffered=True) for spec in specs}
+    order = itertools.count()
+
+    # Retries sort first; otherwise catalog order.
+    fetch_q: queue.PriorityQueue[tuple[int, int, Optional[_PipelineItem]]] = queue.PriorityQueue()
+    cpu_q: queue.Queue[Optional[_PipelineItem]] = queue.Queue(maxsize=depth)
+    write_q: queue.Queue[Optional[_PipelineItem]] = queue.Queue(maxsize=depth)
+    # (spec, error, started): assets dropped by `cancel` before their first fetch aren't recorded.
+    done_q: queue.Queue[tuple[ImageSpec, Optional[Exception], bool]] = queue.Queue()
+
+    def retry_or_fail(item: _PipelineItem, err: Exception) -> None:
+        log = logs[item.spec.name]
+        if item.attempt < args.max_retries:
+            log(f"  Attempt {item.attempt}/{args.max_retries} failed: {err}")
+            with recording(assets[item.spec.name]):
+                note_retry("attempt", str(err))
+            fetch_q.put((0, next(order), _PipelineItem(item.spec, item.attempt + 1)))
+        else:
+            done_q.put((item.spec, err, True))
+
+    def fetch_stage() -> None:
+        while True:
+            _, _, item = fetch_q.get()
+            if item is None:
+                return
+            spec, log, asset = item.spec, logs[item.spec.name], assets[item.spec.name]
+            if item.attempt == 1 and cancel is not None and cancel.is_set():
+                done_q.put((spec, None, False))
+                continue
+            with recording(asset):
+                if asset is not None:
+                    asset.attempts = item.attempt
+                if item.attempt == 1:
+                    log(f"Generating {spec.name} ({spec.size})...")
+                n = args.candidates if spec.transparent else 1
+                slots = list(range((item.attempt - 1) * n, item.attempt * n))
+                try:
+                    raws = _fetch_raw_batch(spec, slots, args, limiter, cache, log)
+                    if not raws:
+                        raise RuntimeError("the API returned no image")
+                    if spec.transparent:
+                        for raw in raws:
+                            with raw:
+                                item.raws.append(raw.read())
+                    else:
+                        item.image = raws[0]
+                except ImagesAPIError as e:
+                    # Transient HTTP errors were already retried with backoff.
+                    done_q.put((spec, e, True))
+                    continue
+                except Exception as e:
+                    retry_or_fail(item, e)
+                    continue
+            # Blocks while the next stage is --queue-depth items behind.
+            (cpu_q if spec.transparent else write_q).put(item)
+
+    def cpu_stage(pool: ProcessPoolExecutor) -> None:
+        while True:
+            item = cpu_q.get()
+            if item is None:
+                return
+            asset = assets[item.spec.name]
+            try:
+                with recording(asset):
+                    future = pool.submit(_postprocess_attempt, item.spec.name, item.raws, args.engine, asset is not None)
+                    item.image, lines, child, err = future.result()
+                for line in lines:
+                    logs[item.spec.name](line)
+                if asset is not None and child is not None:
+                    asset.merge(child)
+                if err is not None:
+                    raise err
+            except Exception as e:
+                retry_or_fail(item, e)
+                continue
+            finally:
+                item.raws = []
+            write_q.put(item)
+
+    def write_stage() -> None:
+        while True:
+            item = write_q.get()
+            if item is None:
+                return
+            assert item.image is not None
+            try:
+                with recording(assets[item.spec.name]):
+                    _write_asset(item.spec, item.image, args, logs[item.spec.name])
+            except Exception as e:
+                retry_or_fail(item, e)
+                continue
+            finally:
+                if not isinstance(item.image, (bytes, Image.Image)):
+                    item.image.close()
+                item.image = None
+            done_q.put((item.spec, None, True))
+
+    print(f"Pipeline: {fetchers} fetch thread(s), {cpu_workers} post-processing process(es), queue depth {depth}")
+    for spec in specs:
+        fetch_q.put((1, next(order), _PipelineItem(spec)))
+
+    failures: list[tuple[ImageSpec, Exception]] = []
+    # spawn: the pool starts while the stage threads are running, which fork doesn't mix well with.
+    with ProcessPoolExecutor(max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        stages = [
+            *(threading.Thread(target=fetch_stage, name=f"fetch-{i}", daemon=True) for i in range(fetchers)),
+            *(threading.Thread(target=cpu_stage, args=(pool,), name=f"cpu-{i}", daemon=True) for i in range(cpu_workers)),
+            *(threading.Thread(target=write_stage, name=f"write-{i}", daemon=True) for i in range(PIPELINE_WRITERS)),
+        ]
+        for thread in stages:
+            thread.start()
+        for _ in specs:
+            spec, err, started = done_q.get()
+            logs[spec.name].flush()
+            if not started:
+                continue
+            record(spec, err)
+            if err is not None:
+                failures.append((spec, err))
+        # Every asset is finished, so all queues are empty and the stop markers can't block.
+        for _ in range(fetchers):
+            fetch_q.put((2, next(order), None))
+        for _ in range(cpu_workers):
+            cpu_q.put(None)
+        for _ in range(PIPELINE_WRITERS):
+            write_q.put(None)
+        for thread in stages:
+            thread.join()
+    return failures
+
+
+def _reprocess_one(
+    spec: ImageSpec, sources: list[tuple[str, Path]], args: argparse.Namespace
+) -> tuple[list[str], dict[str, Any]]:
+    """Process-pool worker: post-process the first raw source that passes and write it.
+
+Returns the log lines and the metrics of this asset; if every source is rejected, the
+metrics status is "failed" with the rejection reasons as the error.
+"""
+    lines: list[str] = []
+    errors: list[str] = []
+    asset = AssetMetrics(spec.name)
+    with recording(asset):
+        for label, path in sources:
+            asset.attempts += 1
+            try:
+                with path.open("rb") as raw:
+                    if spec.transparent:
+                        _write_asset(spec, _remove_background_from_edges(raw, engine=args.engine), args, lines.append)
+                    else:
+                        _write_asset(spec, raw, args, lines.append)
+            except Exception as e:
+                errors.append(f"{label}: {e}")
+                lines.append(f"{label} rejected: {e}")
+                note_retry("attempt", str(e))
+                continue
+            return lines, asset.to_dict()
+    asset.status = "failed"
+    asset.error = "; ".join(errors) or "no raw source"
+    return lines, asset.to_dict()
+
+
+def _reprocess(
+    specs: list[ImageSpec],
+    args: argparse.Namespace,
+    cache: Optional[RawImageCache],
+    run_metrics: Optional[RunMetrics] = None,
+    manifest: Optional[BuildManifest] = None,
+) -> None:
+    """--reprocess: rerun post-processing on stored raw originals across all cores.
+
+Every asset is attempted; failures are collected and reported at the end instead of
+stopping the run.
+"""
+    jobs = args.jobs or os.cpu_count() or 1
+    model = _image_model()
+    work: dict[str, tuple[ImageSpec, list[tuple[str, Path]]]] = {}
+    missing: list[str] = []
+    for spec in specs:
+        if spec.base is not None:
+            continue
+        sources: list[tuple[str, Path]] = []
+        if args.raw_dir is not None:
+            path = args.raw_dir / spec.filename
+            if path.exists():
+                sources.append((str(path), path))
+        elif cache is not None:
+            for slot in range(max(1, args.max_retries) * max(1, args.candidates)):
+                path = cache.locate(request_key(model, spec.prompt, spec.size, slot))
+                if path is not None:
+                    sources.append((f"slot {slot}", path))
+        if sources:
+            work[spec.name] = (spec, sources)
+        else:
+            missing.append(spec.name)
+
+    print(f"Reprocessing {len(work)} asset(s) on {jobs} process(es)...")
+    results: dict[str, str] = {name: "no raw image" for name in missing}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(_reprocess_one, spec, sources, args): name for name, (spec, sources) in work.items()
+        }
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                lines, asset = fut.result()
+            except Exception as e:
+                results[name] = f"FAILED: {e}"
+                print(f"{name}: FAILED: {e}")
+                continue
+            if run_metrics is not None:
+                run_metrics.add(asset)
+            if asset["status"] != "ok":
+                results[name] = f"FAILED: {asset['error']}"
+                print(f"{name}: FAILED: {asset['error']}")
+                continue
+            results[name] = "ok"
+            _record_build(manifest, work[name][0], args)
+            _update_asset_manifests(work[name][0], args)
+            print(f"{name}:")
+            for line in lines:
+                print(f"  {line}")
+
+    for spec in specs:
+        if spec.base is None:
+            continue
+        lines: list[str] = []
+        asset = AssetMetrics(spec.name)
+        err = _derive_variant(spec, args, lines.append, asset, base_failed=results.get(spec.base.name, "ok") != "ok")
+        if run_metrics is not None:
+            run_metrics.add(asset)
+        if err is not None:
+            results[spec.name] = f"FAILED: {err}"
+            print(f"{spec.name}: FAILED: {err}")
+            continue
+        results[spec.name] = "ok"
+        _record_build(manifest, spec, args)
+        _update_asset_manifests(spec, args)
+        print(f"{spec.name}:")
+        for line in lines:
+            print(f"  {line}")
+
+    failed = [name for name, status in results.items() if status != "ok"]
+    print(f"\nReprocessed {len(results) - len(failed)}/{len(results)} asset(s).")
+    for name in failed:
+        print(f"  {name}: {results[name]}")
+    if failed:
+        raise SystemExit(1)
+
+
+def _parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Generate SearchGame assets via OpenAI Images API.")
     p.add_argument(
         "--only",
@@ -408,270 +2044,360 @@ def _parse_args() -> argparse.Namespace:
     )
     p.add_argument("--max-retries", type=int, default=3, help="Max retries per asset.")
     p.add_argument(
-        "--skip-existing",
+        "--base-url",
+        default=None,
+        help="Images API root (default: $OPENAI_BASE_URL or https://api.openai.com/v1), "
+        "e.g. http://127.0.0.1:8089/v1 for scripts/mock_images_api.py.",
+    )
+    p.add_argument(
+        "--net-retries",
+        type=int,
+        default=None,
+        help="Max HTTP retries (with backoff) for 429/5xx/connection errors per API call "
+        "(default: $OPENAI_HTTP_RETRIES or 5).",
+    )
+    p.add_argument(
+        "--force",
         action="store_true",
-        help="Skip assets that already exist in output directory.",
+        help="Rebuild the selected assets even if the build manifest says they are up to date.",
     )
-    return p.parse_args()
-
+    p.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help="Build manifest used to skip up-to-date assets and to reprocess without API calls "
+        f"(default: scripts/{MANIFEST_PATH.name}, or <out-dir>/{MANIFEST_PATH.name} with --out-dir).",
+    )
+    p.add_argument(
+        "--catalog",
+        type=Path,
+        default=CATALOG_PATH,
+        help="Asset spec catalog (.json or .toml).",
+    )
+    p.add_argument(
+        "--shard",
+        type=_parse_shard,
+        default=None,
+        metavar="i/N",
+        help="Only build the assets of shard i of N (1-based, stable by asset name); use with --out-dir.",
+    )
+    p.add_argument(
+        "--out-dir",
+        type=Path,
+        default=OUT_DIR,
+        help="Output directory (default: SearchGame/Resources/Generated). Merge shard outputs with scripts/merge_shards.py.",
+    )
+    p.add_argument(
+        "--adopt-existing",
+        action="store_true",
+        help="Record assets whose outputs already exist as up to date (no generation), e.g. for a new manifest.",
+    )
+    p.add_argument(
+        "--candidates",
+        type=int,
+        default=1,
+        help="Sprites: request N images per attempt (one call with n=N where the model allows it), "
+        "post-process them in parallel and keep the best-scoring one.",
+    )
+    p.add_argument(
+        "--engine",
+        choices=("numpy", "python"),
+        default="numpy",
+        help="Background removal engine. 'python' is the original per-pixel path, kept for comparison.",
+    )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=0,
+        help="Number of assets to process concurrently (default: 1; with --pipeline, 4 fetch threads; "
+        "with --reprocess, all cores).",
+    )
+    p.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Run fetching (--jobs threads, default 4), post-processing (--cpu-workers processes) and writing "
+        "as separate stages joined by bounded queues.",
+    )
+    p.add_argument(
+        "--cpu-workers",
+        type=int,
+        default=0,
+        help="With --pipeline: post-processing processes (default: all cores).",
+    )
+    p.add_argument(
+        "--queue-depth",
+        type=int,
+        default=4,
+        help="With --pipeline: assets buffered between stages before the earlier stage waits.",
+    )
+    p.add_argument(
+        "--rpm",
+        type=float,
+        default=float(os.getenv("OPENAI_IMAGES_RPM", "0")),
+        help="Max API requests per minute across all jobs (0 = unlimited).",
+    )
+    p.add_argument(
+        "--ipm",
+        type=float,
+        default=float(os.getenv("OPENAI_IMAGES_IPM", "0")),
+        help="Max images per minute across all jobs (0 = unlimited).",
+    )
+    p.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=ROOT / ".cache" / "raw_images",
+        help="Cache of raw API images, reused before calling the network.",
+    )
+    p.add_argument("--cache-max-mb", type=float, default=2048, help="Raw image cache size limit (LRU eviction).")
+    p.add_argument("--no-cache", action="store_true", help="Always call the API and don't store raw images.")
+    p.add_argument(
+        "--reprocess",
+        action="store_true",
+        help="Offline: rerun post-processing on already-downloaded raw images (cache or --raw-dir); no API calls.",
+    )
+    p.add_argument(
+        "--raw-dir",
+        type=Path,
+        default=None,
+        help="With --reprocess: read raw originals from DIR/<filename> instead of the cache.",
+    )
+    p.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Skip palette quantization and max-compression encoding of the final PNGs.",
+    )
+    p.add_argument("--webp", action="store_true", help="Also write a lossless .webp next to each PNG.")
+    p.add_argument(
+        "--tile-size",
+        type=int,
+        default=0,
+        help="Also export backgrounds as tiles of this size with a mip chain under Generated/tiles/ (0 = off).",
+    )
+    p.add_argument(
+        "--atlas",
+        action="store_true",
+        help="Afterwards, pack sprites into Generated/atlas (see scripts/pack_atlas.py for options). "
+        "An atlas that already exists is repacked after every run anyway.",
+    )
+    p.add_argument(
+        "--metrics",
+        type=Path,
+        default=None,
+        metavar="OUT.json",
+        help="Write per-asset and aggregate stage timings, bytes, retries and peak memory to this JSON file.",
+    )
+    args = p.parse_args(argv)
+    if args.net_retries is None:
+        # Resolved here rather than at import, after main() (or asset_worker) has loaded .env.
+        args.net_retries = _http_retries()
+    return args
+
+
+def _generate_all(
+    todo: list[ImageSpec],
+    args: argparse.Namespace,
+    cache: Optional[RawImageCache],
+    run_metrics: Optional[RunMetrics] = None,
+    manifest: Optional[BuildManifest] = None,
+    on_done: Optional[Callable[[ImageSpec, Optional[Exception]], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> None:
+    """Generate `todo`, calling `on_done` as each asset finishes.
+
+Color variants are derived after the API assets, since they read their base's output.
+Setting `cancel` stops starting new assets; the ones in flight still finish and are recorded.
+"""
+    jobs = args.jobs or (PIPELINE_FETCHERS if args.pipeline else 1)
+    limiter = RateLimiter(args.rpm, args.ipm, burst=jobs)
+    assets = {spec.name: AssetMetrics(spec.name) if run_metrics is not None else None for spec in todo}
+
+    def record(spec: ImageSpec, last_err: Optional[Exception]) -> None:
+        asset = assets[spec.name]
+        if run_metrics is not None and asset is not None:
+            run_metrics.add(asset)
+        if last_err is None:
+            _record_build(manifest, spec, args)
+            _update_asset_manifests(spec, args)
+        if on_done is not None:
+            on_done(spec, last_err)
+
+    generated = [spec for spec in todo if spec.base is None]
+    failed: set[str] = set()
+    failures: list[str] = []
+    if args.pipeline:
+        for spec, err in _generate_pipelined(generated, args, limiter, cache, assets, record, cancel):
+            failed.add(spec.name)
+            failures.append(f"{spec.name}: {err}")
+    elif jobs <= 1:
+        for spec in generated:
+            if cancel is not None and cancel.is_set():
+                return
+            last_err = _generate_spec(spec, args, limiter, cache, AssetLog(spec.name), assets[spec.name])
+            record(spec, last_err)
+            if last_err is not None:
+                raise SystemExit(f"Failed to generate {spec.name}: {last_err}")
+    else:
+        # Concurrent mode: each asset logs into its own buffer, printed as one block when it finishes.
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            logs = {spec.name: AssetLog(spec.name, buffered=True) for spec in generated}
+            futures = {
+                pool.submit(_generate_spec, spec, args, limiter, cache, logs[spec.name], assets[spec.name]): spec
+                for spec in generated
+            }
+            for fut in as_completed(futures):
+                if fut.cancelled():
+                    continue
+                if cancel is not None and cancel.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                spec = futures[fut]
+                logs[spec.name].flush()
+                last_err = fut.result()
+                record(spec, last_err)
+                if last_err is not None:
+                    failed.add(spec.name)
+                    failures.append(f"{spec.name}: {last_err}")
+
+    # Variants are a local recolor of the base's output: quick, so they run in order here.
+    for spec in todo:
+        if spec.base is None:
+            continue
+        if cancel is not None and cancel.is_set():
+            break
+        last_err = _derive_variant(spec, args, AssetLog(spec.name), assets[spec.name], base_failed=spec.base.name in failed)
+        record(spec, last_err)
+        if last_err is not None:
+            failures.append(f"{spec.name}: {last_err}")
 
-def main() -> None:
-    load_dotenv(ROOT / ".env")
-    args = _parse_args()
-    only = {s.strip() for s in args.only.split(",") if s.strip()}
+    if failures:
+        raise SystemExit("Failed to generate:\n  " + "\n  ".join(failures))
 
-    default_bg_size = os.getenv("OPENAI_IMAGE_SIZE", "1792x1024")
-
-    specs = [
-        ImageSpec(
-            name="bg_farm_day",
-            filename="bg_farm_day.png",
-            size=default_bg_size,
-            transparent=False,
-            prompt=(
-                "Cute kawaii village scene panoramic illustration in simple cartoon style, "
-                "pastel colors (soft pink, mint green, baby blue, pale yellow), "
-                "many small details filling entire frame: tiny houses, cats in profile, "
-                "pandas, puppies, flowers, trees, all drawn with thick black outlines, "
-                "flat colors without gradients or shading, 2D schematic style, "
-                "densely packed with cute characters and tiny scenes everywhere, "
-                "simple shapes, children's book illustration style, "
-                "no text, no watermark"
-            ),
-        ),
-        ImageSpec(
-            name="bg_forest_evening",
-            filename="bg_forest_evening.png",
-            size=default_bg_size,
-            transparent=False,
-            prompt=(
-                "Cute kawaii forest evening scene panoramic illustration in simple cartoon style, "
-                "soft pastel colors (lavender, peach, mint, pale pink), "
-                "many small details: tiny mushrooms, cats, pandas, trees, flowers, houses, "
-                "all drawn with thick black outlines, flat colors no gradients, "
-                "2D schematic style, densely packed scene, warm sunset lighting, "
-                "children's book style, no text, no watermark"
-            ),
-        ),
-        # === WORLD OBJECTS (buildings, nature) ===
-        ImageSpec(
-            name="house_pink",
-            filename="house_pink.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single cute small house, simple kawaii style, "
-                "thick black outline, pastel pink walls, brown roof, small windows, "
-                "2D front view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="house_yellow",
-            filename="house_yellow.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single cute small house, simple kawaii style, "
-                "thick black outline, pastel yellow walls, brown roof, small windows, "
-                "2D front view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="tree_green",
-            filename="tree_green.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single cute round tree, simple kawaii style, "
-                "thick black outline, pastel green round foliage, brown trunk, "
-                "2D front view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="tree_pink",
-            filename="tree_pink.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single cute cherry blossom tree, simple kawaii style, "
-                "thick black outline, pastel pink round foliage, brown trunk, "
-                "2D front view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="fence",
-            filename="fence.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single section of cute wooden fence, simple kawaii style, "
-                "thick black outline, light brown wood, "
-                "2D front view, horizontal, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="bush",
-            filename="bush.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single cute small round bush, simple kawaii style, "
-                "thick black outline, pastel green color, "
-                "2D front view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        # === ANIMATED CHARACTERS ===
-        ImageSpec(
-            name="cat_white",
-            filename="cat_white.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single tiny cute white cat, simple kawaii style, "
-                "thick black outline, flat white body, pink cheeks, dot eyes, "
-                "2D side profile, walking pose, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="cat_gray",
-            filename="cat_gray.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single tiny cute gray cat, simple kawaii style, "
-                "thick black outline, flat gray body, pink cheeks, dot eyes, "
-                "2D side profile, sitting, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="panda",
-            filename="panda.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single tiny cute panda, simple kawaii style, "
-                "thick black outline, flat white and black, pink cheeks, "
-                "2D front view, sitting, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="person",
-            filename="person.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single tiny cute person character, simple kawaii style, "
-                "thick black outline, simple clothes, pink cheeks, "
-                "2D side view, walking pose, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        # === DECORATIONS ===
-        ImageSpec(
-            name="cloud",
-            filename="cloud.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single simple white fluffy cloud, kawaii style, "
-                "thick black outline, flat white color, "
-                "2D view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow"
-            ),
-        ),
-        ImageSpec(
-            name="sun",
-            filename="sun.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single cute smiling sun, kawaii style, "
-                "thick black outline, pastel yellow, simple face, "
-                "2D view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow"
-            ),
-        ),
-        ImageSpec(
-            name="flower_pink",
-            filename="flower_pink.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single tiny cute pink flower, simple kawaii style, "
-                "thick black outline, pastel pink petals, yellow center, "
-                "2D front view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="flower_yellow",
-            filename="flower_yellow.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single tiny cute yellow flower, simple kawaii style, "
-                "thick black outline, pastel yellow petals, orange center, "
-                "2D front view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-        ImageSpec(
-            name="basket",
-            filename="basket.png",
-            size="1024x1024",
-            transparent=True,
-            prompt=(
-                "Single cute woven basket with apples, simple kawaii style, "
-                "thick black outline, brown basket, red apples, "
-                "2D front view, centered, FLOATING, "
-                "SOLID PURE WHITE BACKGROUND ONLY, NO shadow, NO ground"
-            ),
-        ),
-    ]
 
-    for spec in specs:
-        if only and spec.name not in only:
-            continue
-        out_path = OUT_DIR / spec.filename
-        if args.skip_existing and out_path.exists():
-            print(f"Skipping {spec.name} (already exists)")
+def _select_specs(args: argparse.Namespace) -> list[ImageSpec]:
+    """Catalog specs picked by --shard and --only, in catalog order."""
+    only = {s.strip() for s in args.only.split(",") if s.strip()}
+    specs = load_catalog(args.catalog)
+    if args.shard is not None:
+        index, count = args.shard
+        # Variants go with their base, so each base is generated in one shard only.
+        specs = [spec for spec in specs if _shard_of((spec.base or spec).name, count) == index]
+        print(f"Shard {index + 1}/{count}: {len(specs)} asset(s)")
+    selected = {spec.name for spec in specs if not only or spec.name in only}
+    # A variant needs its base's output; the plan skips the base if that is up to date.
+    selected |= {spec.base.name for spec in specs if spec.name in selected and spec.base is not None}
+    return [spec for spec in specs if spec.name in selected]
+
+
+def _raw_cached(spec: ImageSpec, args: argparse.Namespace, cache: Optional[RawImageCache]) -> bool:
+    """Whether the raw images of the first attempt at `spec` are in the cache."""
+    if cache is None:
+        return False
+    model = _image_model()
+    n = max(1, args.candidates) if spec.transparent else 1
+    return all(cache.locate(request_key(model, spec.prompt, spec.size, slot)) is not None for slot in range(n))
+
+
+def _plan_builds(
+    selected: list[ImageSpec],
+    args: argparse.Namespace,
+    manifest: BuildManifest,
+    on_skip: Optional[Callable[[ImageSpec, str], None]] = None,
+    cache: Optional[RawImageCache] = None,
+) -> list[ImageSpec]:
+    """The specs that need work (all of them with --force); up-to-date ones are reported and dropped.
+
+Variants come last, and are rebuilt whenever their base is. Specs whose request is unchanged
+only need post-processing again: they are added to `args.cached_only`, so generation reads
+them from `cache` without calling the API, and skipped if their raw images are not cached.
+"""
+    todo: list[ImageSpec] = []
+    args.cached_only = set()
+    for spec in sorted(selected, key=lambda spec: spec.base is not None):
+        if spec.base is not None and spec.base in todo and not args.force:
+            print(f"Rebuilding {spec.name} (base {spec.base.name} is rebuilt)")
+            todo.append(spec)
             continue
+        if not args.force:
+            action, reason = manifest.plan(
+                spec.name, _request_hash(spec, args), _processing_hash(spec, args), _output_paths(spec, args)
+            )
+            if action == "reprocess" and not args.reprocess and spec.base is None:
+                if _raw_cached(spec, args, cache):
+                    args.cached_only.add(spec.name)
+                else:
+                    # Regenerating would be a paid API call nobody asked for.
+                    action = "skip"
+                    reason += "; raw images are not cached, pass --force to regenerate through the API"
+            if action == "skip":
+                print(f"Skipping {spec.name} ({reason})")
+                if on_skip is not None:
+                    on_skip(spec, reason)
+                continue
+            if action == "reprocess" and not args.reprocess:
+                # Raw images for the same request are cached, so only post-processing runs again.
+                reason += "; reprocessing cached raw images"
+            print(f"Rebuilding {spec.name} ({reason})")
+        todo.append(spec)
+    return todo
 
-        print(f"Generating {spec.name} ({spec.size})...")
-        last_err: Optional[Exception] = None
-        for attempt in range(1, max(1, args.max_retries) + 1):
-            try:
-                png = openai_images_generate(spec.prompt, spec.size, transparent=spec.transparent)
 
-                # For sprites: validate background and convert it to transparency.
-                if spec.transparent:
-                    from io import BytesIO
+def _build_atlases(args: argparse.Namespace, run_metrics: Optional[RunMetrics] = None) -> None:
+    """--atlas: pack full-size sprites and every scaled variant into Generated/atlas."""
+    with recording(run_metrics.run if run_metrics else None), stage("atlas"):
+        build_atlas(args.out_dir)
+        if (args.out_dir / "scaled").exists():
+            for scale in DISPLAY_SCALES:
+                build_atlas(args.out_dir / "scaled", args.out_dir / "atlas", variant=f"@{scale}x")
 
-                    # Convert background to transparency by edge flood-fill. This preserves internal whites.
-                    # We *try* to request solid white in prompts, but still post-process robustly.
-                    png = _remove_background_from_edges(png)
 
-                write_png(out_path, png)
-                last_err = None
-                break
-            except Exception as e:
-                last_err = e
-                if attempt < args.max_retries:
-                    print(f"  Attempt {attempt}/{args.max_retries} failed: {e}")
-                    continue
-                break
+def _default_manifest(out_dir: Path) -> Path:
+    """The repo lock file for Resources/Generated; other output dirs (shards) keep theirs inside."""
+    return MANIFEST_PATH if out_dir.resolve() == OUT_DIR.resolve() else out_dir / MANIFEST_PATH.name
 
-        if last_err is not None:
-            raise SystemExit(f"Failed to generate {spec.name}: {last_err}")
+
+def main() -> None:
+    load_dotenv(ROOT / ".env")
+    args = _parse_args()
+    if args.base_url:
+        # Through the environment, so --reprocess workers and helper threads see it too.
+        os.environ["OPENAI_BASE_URL"] = args.base_url
+
+    selected = _select_specs(args)
+    manifest = BuildManifest(args.manifest or _default_manifest(args.out_dir), args.out_dir)
+
+    if args.adopt_existing:
+        for spec in selected:
+            if all(p.exists() for p in _output_paths(spec, args)):
+                _record_build(manifest, spec, args)
+                _update_asset_manifests(spec, args)
+                print(f"Recorded {spec.name} as up to date")
+            else:
+                print(f"Not adopting {spec.name} (outputs missing)")
+        return
+
+    cache = None if args.no_cache else RawImageCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+    todo = _plan_builds(selected, args, manifest, cache=cache)
+    run_metrics = RunMetrics("reprocess" if args.reprocess else "generate") if args.metrics else None
+
+    try:
+        try:
+            if args.reprocess:
+                _reprocess(todo, args, cache, run_metrics, manifest)
+            else:
+                _generate_all(todo, args, cache, run_metrics, manifest)
+        finally:
+            # Stale frames would shadow rewritten sprites in the game, even after a failed run.
+            if atlas_exists(args.out_dir):
+                _build_atlases(args, run_metrics)
+        if args.atlas and not atlas_exists(args.out_dir):
+            _build_atlases(args, run_metrics)
+    finally:
+        if cache is not None:
+            cache.flush()
+        # Failed runs are the interesting ones too, so the report is written either way.
+        if run_metrics is not None:
+            run_metrics.write(args.metrics)
+            print(f"Wrote metrics to {args.metrics}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Precompute tap-test masks and outline polygons for transparent sprites.
+
+Output: SearchGame/Resources/Generated/hitshapes.json, loaded by AssetLoader.hitShape(named:).
+  {
+    "version": 1,
+    "sprites": {
+      "<name>": {
+        "w": 512, "h": 600,              # source pixels
+        "cols": 28, "rows": 32,          # mask grid
+        "mask": "<base64>",              # rows*cols bits, row-major, top row first, MSB first
+        "polygon": [[x, y], ...]         # convex outline, normalized 0..1, bottom-left origin, CCW
+      }
+    }
+  }
+
+generate_assets.py updates entries as sprites are written; to rebuild from existing files:
+  python scripts/hit_shapes.py [--grid 32]
+
+Notes:
+- A mask cell is set if any pixel in it has alpha >= ALPHA_THRESHOLD, so taps on thin
+  outlines still count.
+- The polygon is the convex hull of the opaque pixels, simplified to at most MAX_VERTICES
+  points (SKPhysicsBody(polygonFrom:) wants a convex path).
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from PIL import Image
+
+
+ROOT = Path(__file__).resolve().parents[1]
+GENERATED_DIR = ROOT / "SearchGame" / "Resources" / "Generated"
+HIT_SHAPES_NAME = "hitshapes.json"
+FORMAT_VERSION = 1
+DEFAULT_GRID = 32
+ALPHA_THRESHOLD = 32
+MAX_VERTICES = 12
+
+_lock = threading.Lock()
+
+
+def hit_mask(alpha: np.ndarray, grid: int = DEFAULT_GRID) -> tuple[int, int, bytes]:
+    """Downsample an alpha channel to a (rows, cols) occupancy grid; the longer side gets `grid` cells."""
+    h, w = alpha.shape
+    scale = grid / max(w, h)
+    cols = max(1, round(w * scale))
+    rows = max(1, round(h * scale))
+    solid = alpha >= ALPHA_THRESHOLD
+    # Start pixel of every cell; each pixel belongs to exactly one cell.
+    ys = np.linspace(0, h, rows + 1).astype(int)[:-1]
+    xs = np.linspace(0, w, cols + 1).astype(int)[:-1]
+    cells = np.logical_or.reduceat(np.logical_or.reduceat(solid, ys, axis=0), xs, axis=1)
+    return rows, cols, np.packbits(cells.astype(np.uint8), bitorder="big").tobytes()
+
+
+def _cross(o: tuple[float, float], a: tuple[float, float], b: tuple[float, float]) -> float:
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def _convex_hull(points: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    """Andrew's monotone chain; counterclockwise, no repeated first point."""
+    pts = sorted(set(points))
+    if len(pts) <= 2:
+        return pts
+    lower: list[tuple[float, float]] = []
+    for p in pts:
+        while len(lower) >= 2 and _cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper: list[tuple[float, float]] = []
+    for p in reversed(pts):
+        while len(upper) >= 2 and _cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+
+def _simplify_hull(hull: list[tuple[float, float]], max_vertices: int) -> list[tuple[float, float]]:
+    """Drop the vertex whose removal loses the least area until at most `max_vertices` remain."""
+    hull = list(hull)
+    while len(hull) > max(3, max_vertices):
+        n = len(hull)
+        areas = [abs(_cross(hull[i - 1], hull[i], hull[(i + 1) % n])) for i in range(n)]
+        del hull[int(np.argmin(areas))]
+    return hull
+
+
+def outline_polygon(alpha: np.ndarray, max_vertices: int = MAX_VERTICES) -> list[list[float]]:
+    """Convex outline of the opaque pixels, normalized to 0..1 with a bottom-left origin (SpriteKit)."""
+    h, w = alpha.shape
+    solid = alpha >= ALPHA_THRESHOLD
+    rows = np.flatnonzero(solid.any(axis=1))
+    if len(rows) == 0:
+        return []
+    # Per row, the outer corners of the leftmost and rightmost opaque pixels are enough for the hull.
+    first = solid[rows].argmax(axis=1)
+    last = w - 1 - solid[rows, ::-1].argmax(axis=1)
+    points: list[tuple[float, float]] = []
+    for y, x0, x1 in zip(rows.tolist(), first.tolist(), last.tolist()):
+        points += [(x0, y), (x0, y + 1), (x1 + 1, y), (x1 + 1, y + 1)]
+    hull = _simplify_hull(_convex_hull(points), max_vertices)
+    # Flip y for the bottom-left origin; that mirrors the winding, so reverse to stay CCW.
+    return [[round(x / w, 4), round(1 - y / h, 4)] for x, y in reversed(hull)]
+
+
+def hit_shape(im: Image.Image, grid: int = DEFAULT_GRID) -> Optional[dict[str, Any]]:
+    """Hit data for one sprite, or None if it is fully opaque (the texture rect is the hit area)."""
+    if im.mode not in ("RGBA", "LA", "P", "PA"):
+        return None
+    alpha = np.asarray(im.convert("RGBA"))[..., 3]
+    if alpha.min() == 255:
+        return None
+    rows, cols, bits = hit_mask(alpha, grid)
+    return {
+        "w": int(alpha.shape[1]),
+        "h": int(alpha.shape[0]),
+        "cols": cols,
+        "rows": rows,
+        "mask": base64.b64encode(bits).decode("ascii"),
+        "polygon": outline_polygon(alpha),
+    }
+
+
+def update_hit_shapes(out_dir: Path, sprites: dict[str, Path], grid: int = DEFAULT_GRID) -> None:
+    """Recompute entries for `sprites` (name -> PNG) in <out_dir>/hitshapes.json, keeping the others."""
+    shapes = {}
+    for name, path in sprites.items():
+        with Image.open(path) as im:
+            shape = hit_shape(im, grid)
+        if shape is not None:
+            shapes[name] = shape
+    if not shapes:
+        return
+    path = out_dir / HIT_SHAPES_NAME
+    with _lock:
+        data: dict[str, Any] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text())
+            except ValueError:
+                data = {}
+        if data.get("version") != FORMAT_VERSION:
+            data = {"version": FORMAT_VERSION, "sprites": {}}
+        data["sprites"].update(shapes)
+        data["sprites"] = dict(sorted(data["sprites"].items()))
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(data, indent=1) + "\n")
+        tmp.replace(path)
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Rebuild hitshapes.json from existing sprites.")
+    p.add_argument("--src", type=Path, default=GENERATED_DIR, help="Directory with trimmed sprite PNGs.")
+    p.add_argument("--grid", type=int, default=DEFAULT_GRID, help="Mask cells along the longer sprite side.")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    sprites = {p.stem: p for p in sorted(args.src.glob("*.png")) if not p.stem.startswith("bg_")}
+    update_hit_shapes(args.src, sprites, args.grid)
+    print(f"Wrote {args.src / HIT_SHAPES_NAME} ({len(sprites)} sprite(s) checked)")
+
+
+if __name__ == "__main__":
+    main()
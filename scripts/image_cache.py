@@ -0,0 +1,140 @@
+"""Content-addressed cache of raw Images API output.
+
+Used by scripts/generate_assets.py so that re-running the pipeline after a post-processing
+change doesn't call the API again.
+
+Layout:
+- <root>/objects/ab/abcdef...  raw image bytes, named by their SHA-256
+- <root>/index.json            request key -> {"sha256", "bytes", "used"}
+
+A request key is the hash of (model, prompt, size, slot); `slot` distinguishes retries of
+the same spec, so attempt 2 of a run reuses attempt 2 of the previous run.
+Total blob size is bounded; the least recently used entries are evicted first.
+Lookups only touch the in-memory index; it is written on `put` and on `flush()`, which
+callers run once at the end of a build.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Optional
+
+
+def request_key(model: str, prompt: str, size: str, slot: int) -> str:
+    raw = json.dumps([model, prompt, size, slot], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class RawImageCache:
+    """Size-bounded LRU cache of raw image bytes. Safe to share between threads."""
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index_path = root / "index.json"
+        self._index: dict[str, dict[str, Any]] = {}
+        # In-memory changes (lookup times, dropped stale entries) not yet in index.json.
+        self._dirty = False
+        if self._index_path.exists():
+            try:
+                self._index = json.loads(self._index_path.read_text())
+            except (OSError, ValueError):
+                # A corrupt index only costs us cache hits; blobs are re-downloaded.
+                self._index = {}
+        if self._evict():
+            self._save_index()
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.root / "objects" / sha[:2] / sha
+
+    def _save_index(self) -> None:
+        _atomic_write(self._index_path, json.dumps(self._index, indent=1, sort_keys=True).encode("utf-8"))
+        self._dirty = False
+
+    def flush(self) -> None:
+        """Write index changes made by lookups since the last save."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def locate(self, key: str) -> Optional[Path]:
+        """Path of the cached blob for `key` (for readers in other processes), or None."""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            path = self._blob_path(entry["sha256"])
+            if not path.exists():
+                del self._index[key]
+                self._dirty = True
+                return None
+            entry["used"] = time.time()
+            self._dirty = True
+            return path
+
+    def put(self, key: str, data: BinaryIO) -> None:
+        """Store the contents of a binary file (read from its start) under `key`."""
+        # Stream into a temp file while hashing; the blob is renamed to its hash afterwards.
+        objects = self.root / "objects"
+        objects.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        data.seek(0)
+        fd, tmp = tempfile.mkstemp(dir=objects, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: data.read(1 << 16), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            sha = digest.hexdigest()
+            with self._lock:
+                path = self._blob_path(sha)
+                if path.exists():
+                    Path(tmp).unlink()
+                else:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tmp, path)
+                self._index[key] = {"sha256": sha, "bytes": size, "used": time.time()}
+                self._evict()
+                self._save_index()
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _evict(self) -> bool:
+        """Drop least recently used entries until blobs fit in max_bytes. Returns True if any were dropped."""
+        # Blobs can be shared by several keys; count each blob once.
+        blob_sizes = {e["sha256"]: e["bytes"] for e in self._index.values()}
+        total = sum(blob_sizes.values())
+        evicted = False
+        for key, entry in sorted(self._index.items(), key=lambda kv: kv[1]["used"]):
+            if total <= self.max_bytes:
+                break
+            del self._index[key]
+            evicted = True
+            sha = entry["sha256"]
+            if any(e["sha256"] == sha for e in self._index.values()):
+                continue
+            self._blob_path(sha).unlink(missing_ok=True)
+            total -= blob_sizes[sha]
+        return evicted
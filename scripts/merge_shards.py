@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Merge the outputs of sharded generate_assets.py runs into Resources/Generated.
+
+Each shard is a directory produced by
+  python scripts/generate_assets.py --shard 2/4 --out-dir build/shard2
+and contains the asset files plus its own build manifest (generated_assets.lock.json).
+
+Usage:
+  python scripts/merge_shards.py build/shard1 build/shard2 build/shard3 build/shard4 [--atlas]
+
+Notes:
+- Every output listed in a shard manifest is verified against its recorded SHA-256 before it
+  is copied, so a half-finished shard can't overwrite good assets.
+- Manifest entries are merged into scripts/generated_assets.lock.json; the same asset built
+  differently by two shards is an error.
+- Tap masks/outlines in <out>/hitshapes.json and asset metadata in <out>/assetinfo.json are
+  recomputed for the merged assets.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Optional
+
+from asset_info import update_asset_info
+from build_manifest import BuildManifest, file_sha256
+from hit_shapes import update_hit_shapes
+from pack_atlas import GENERATED_DIR, atlas_exists, build_atlas
+
+
+ROOT = Path(__file__).resolve().parents[1]
+MANIFEST_NAME = "generated_assets.lock.json"
+DISPLAY_SCALES = (1, 2, 3)
+
+
+def _copy_atomic(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def merge_shards(shards: list[Path], out_dir: Path = GENERATED_DIR, manifest_path: Optional[Path] = None) -> int:
+    """Copy verified shard outputs into `out_dir` and merge their manifests; returns the number of assets."""
+    if manifest_path is None:
+        default_dir = ROOT / "scripts" if out_dir.resolve() == GENERATED_DIR.resolve() else out_dir
+        manifest_path = default_dir / MANIFEST_NAME
+    target = BuildManifest(manifest_path, out_dir)
+    merged: dict[str, tuple[Path, dict[str, Any]]] = {}
+
+    # Validate everything first, then copy.
+    for shard in shards:
+        lock = shard / MANIFEST_NAME
+        if not lock.exists():
+            raise SystemExit(f"{shard}: no {MANIFEST_NAME}")
+        for name, entry in BuildManifest(lock, shard).entries().items():
+            if name in merged and merged[name][1] != entry:
+                raise SystemExit(f"Asset {name} was built differently by {merged[name][0]} and {shard}")
+            for rel, sha in entry["outputs"].items():
+                path = shard / rel
+                if Path(rel).is_absolute() or not path.exists():
+                    raise SystemExit(f"{shard}: output {rel} of {name} is missing")
+                if file_sha256(path) != sha:
+                    raise SystemExit(f"{shard}: output {rel} of {name} does not match its manifest")
+            merged[name] = (shard, entry)
+
+    sprites: dict[str, Path] = {}
+    for name, (shard, entry) in sorted(merged.items()):
+        copied = 0
+        for rel, sha in entry["outputs"].items():
+            dst = out_dir / rel
+            if dst.exists() and file_sha256(dst) == sha:
+                continue
+            _copy_atomic(shard / rel, dst)
+            copied += 1
+        target.set_entry(name, entry)
+        # Full-size PNGs sit at the top level; scaled/ variants and WebP copies don't need hit data or metadata.
+        sprites.update((Path(rel).stem, out_dir / rel) for rel in entry["outputs"] if "/" not in rel and rel.endswith(".png"))
+        print(f"{name}: {copied}/{len(entry['outputs'])} file(s) updated from {shard}")
+    update_hit_shapes(out_dir, sprites)
+    update_asset_info(out_dir, sprites)
+    return len(merged)
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Merge sharded generate_assets.py outputs.")
+    p.add_argument("shards", nargs="+", type=Path, help="Shard output directories (--out-dir of each run).")
+    p.add_argument("--out", type=Path, default=GENERATED_DIR, help="Destination (default: Resources/Generated).")
+    p.add_argument(
+        "--manifest",
+        type=Path,
+        default=None,
+        help=f"Destination manifest (default: scripts/{MANIFEST_NAME}, or <out>/{MANIFEST_NAME}).",
+    )
+    p.add_argument(
+        "--atlas", action="store_true", help="Pack sprite atlases after merging (an existing atlas is always repacked)."
+    )
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    count = merge_shards(args.shards, args.out, args.manifest)
+    print(f"Merged {count} asset(s) from {len(args.shards)} shard(s) into {args.out}")
+    # Frames of an existing atlas would shadow the merged sprites in the game.
+    if args.atlas or atlas_exists(args.out):
+        build_atlas(args.out)
+        if (args.out / "scaled").exists():
+            for scale in DISPLAY_SCALES:
+                build_atlas(args.out / "scaled", args.out / "atlas", variant=f"@{scale}x")
+
+
+if __name__ == "__main__":
+    main()
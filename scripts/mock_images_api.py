@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Local stand-in for the OpenAI Images API, for offline load and throughput testing.
+
+Serves POST /v1/images/generations with synthetic sprite-like PNGs (see bench_postprocess.py),
+in the `b64_json` or `url` form (`url_null_b64`: a URL next to `"b64_json": null`), with configurable latency, 429/5xx injection, `Retry-After`
+headers and an optional requests-per-minute limit.
+
+Usage:
+  python scripts/mock_images_api.py --port 8089 --latency uniform:0.5,3 --rate-429 0.1 --rate-5xx 0.05
+  OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=test \\
+      python scripts/generate_assets.py --jobs 8 --no-cache --out-dir /tmp/mock-out --metrics /tmp/mock.json
+
+Notes:
+- Latency specs: "fixed:S", "uniform:LO,HI", "normal:MEAN,STD", "lognormal:MU,SIGMA" (seconds).
+- `--bad-rate` makes that share of sprites unusable (ground base, checkerboard background)
+  to exercise attempt retries and --candidates.
+- GET /stats returns request/response counters as JSON; they are also printed on exit.
+- Like the real API, dall-e-3 rejects n > 1 with 400.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Any, Callable, Optional
+
+from PIL import Image
+
+from bench_postprocess import make_sprite
+
+
+GOOD_CASES = ("plain", "blobs")
+BAD_CASES = ("base", "checker")
+# Images kept for the `url` form (oldest dropped first).
+MAX_STORED_IMAGES = 256
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal" and len(values) == 2:
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise argparse.ArgumentTypeError(f"bad latency spec {spec!r}")
+
+
+def synthetic_png(size: str, transparent_hint: bool, bad: bool, seed: int) -> bytes:
+    """PNG of the requested "WxH": a sprite on white for square sizes, a busy scene otherwise."""
+    w, h = (int(v) for v in size.lower().split("x"))
+    rng = random.Random(seed)
+    if w == h or transparent_hint:
+        case = rng.choice(BAD_CASES if bad else GOOD_CASES)
+        side = min(w, h)
+        im = Image.new("RGB", (w, h), (254, 254, 253))
+        im.paste(make_sprite(case, side, seed=seed), ((w - side) // 2, (h - side) // 2))
+    else:
+        im = Image.new("RGB", (w, h))
+        sprite = make_sprite("grid", 256, seed=seed)
+        for y in range(0, h, 256):
+            for x in range(0, w, 256):
+                im.paste(sprite, (x, y))
+    buf = BytesIO()
+    im.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+
+class MockState:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.latency = parse_latency(args.latency)
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.stats: Counter[str] = Counter()
+        self.images: OrderedDict[str, bytes] = OrderedDict()
+        self.recent: deque[float] = deque()
+        self.counter = 0
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    def roll(self) -> tuple[float, float, int]:
+        with self.lock:
+            self.counter += 1
+            return self.rng.random(), self.latency(self.rng), self.counter
+
+    def rate_limited(self) -> Optional[float]:
+        """Seconds until a request slot frees up under --rpm, or None if this request may proceed."""
+        if self.args.rpm <= 0:
+            return None
+        now = time.monotonic()
+        with self.lock:
+            while self.recent and now - self.recent[0] >= 60.0:
+                self.recent.popleft()
+            if len(self.recent) >= self.args.rpm:
+                return 60.0 - (now - self.recent[0])
+            self.recent.append(now)
+        return None
+
+    def store(self, data: bytes) -> str:
+        image_id = hashlib.sha256(data).hexdigest()[:24]
+        with self.lock:
+            self.images[image_id] = data
+            while len(self.images) > MAX_STORED_IMAGES:
+                self.images.popitem(last=False)
+        return image_id
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: MockServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.state.args.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.state.count(f"status_{status}")
+
+    def _error(self, status: int, message: str, headers: Optional[dict[str, str]] = None) -> None:
+        body = json.dumps({"error": {"message": message, "type": "mock_error", "code": status}}).encode()
+        self._send(status, body, "application/json", headers)
+
+    def _retry_after(self, seconds: float) -> dict[str, str]:
+        if self.server.state.args.retry_after_format == "date":
+            return {"Retry-After": formatdate(time.time() + seconds, usegmt=True)}
+        return {"Retry-After": str(max(0, round(seconds)))}
+
+    def do_GET(self) -> None:
+        state = self.server.state
+        if self.path == "/stats":
+            with state.lock:
+                body = json.dumps(dict(state.stats), indent=2).encode()
+            self._send(200, body, "application/json")
+            return
+        prefix = "/images/"
+        if self.path.startswith(prefix) and self.path.endswith(".png"):
+            with state.lock:
+                data = state.images.get(self.path[len(prefix) : -len(".png")])
+            if data is not None:
+                state.count("downloads")
+                self._send(200, data, "image/png")
+                return
+        self._error(404, f"no such resource: {self.path}")
+
+    def do_POST(self) -> None:
+        state = self.server.state
+        args = state.args
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        state.count("requests")
+        if self.path.rstrip("/") != "/v1/images/generations":
+            self._error(404, f"no such endpoint: {self.path}")
+            return
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._error(401, "missing bearer token")
+            return
+        try:
+            req = json.loads(raw)
+            prompt, size, n = str(req["prompt"]), str(req.get("size", "1024x1024")), int(req.get("n", 1))
+        except (ValueError, KeyError, TypeError):
+            self._error(400, "invalid JSON body")
+            return
+        model = str(req.get("model", ""))
+        if model.startswith("dall-e-3") and n != 1:
+            self._error(400, "n must be 1 for dall-e-3")
+            return
+
+        wait = state.rate_limited()
+        if wait is not None:
+            self._error(429, "rate limit reached (--rpm)", self._retry_after(wait))
+            return
+
+        roll, latency, counter = state.roll()
+        time.sleep(latency)
+        if roll < args.rate_429:
+            self._error(429, "injected rate limit", self._retry_after(args.retry_after))
+            return
+        if roll < args.rate_429 + args.rate_5xx:
+            status = state.rng.choice((500, 502, 503))
+            self._error(status, "injected server error", self._retry_after(args.retry_after) if status == 503 else None)
+            return
+
+        form = req.get("response_format") or args.response_format
+        items = []
+        for i in range(n):
+            seed = int.from_bytes(hashlib.sha256(f"{args.seed}:{prompt}:{counter}:{i}".encode()).digest()[:4], "big")
+            bad = random.Random(seed).random() < args.bad_rate
+            data = synthetic_png(size, "WHITE BACKGROUND" in prompt.upper(), bad, seed)
+            state.count("images")
+            if form in ("url", "url_null_b64"):
+                host = self.headers.get("Host", f"127.0.0.1:{self.server.server_port}")
+                item: dict[str, Any] = {"url": f"http://{host}/images/{state.store(data)}.png"}
+                if form == "url_null_b64":
+                    item = {"b64_json": None, **item}
+                items.append(item)
+            else:
+                items.append({"b64_json": base64.b64encode(data).decode("ascii")})
+        body = json.dumps({"created": int(time.time()), "data": items}).encode()
+        self._send(200, body, "application/json")
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], state: MockState) -> None:
+        super().__init__(address, Handler)
+        self.state = state
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Local mock of the OpenAI Images API.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8089)
+    p.add_argument("--latency", default="fixed:0", help="Response latency distribution (see module docstring).")
+    p.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered with 429.")
+    p.add_argument("--rate-5xx", type=float, default=0.0, help="Share of requests answered with 500/502/503.")
+    p.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with injected 429/503 (seconds).")
+    p.add_argument("--retry-after-format", choices=("seconds", "date"), default="seconds")
+    p.add_argument("--rpm", type=float, default=0, help="Enforce this many requests per minute with real 429s (0 = off).")
+    p.add_argument("--response-format", choices=("b64_json", "url", "url_null_b64"), default="b64_json")
+    p.add_argument("--bad-rate", type=float, default=0.0, help="Share of sprites drawn with a ground base/checkerboard.")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--verbose", action="store_true", help="Log every request.")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    server = MockServer((args.host, args.port), MockState(args))
+    print(f"Mock Images API on http://{args.host}:{server.server_port}/v1 (Ctrl+C to stop)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(dict(server.state.stats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
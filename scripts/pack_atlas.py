@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Pack generated sprites into texture atlas pages.
+
+Outputs (under SearchGame/Resources/Generated/atlas/):
+- sprites_0.png, sprites_1.png, ...  atlas pages
+- sprites.json                       frame table read by AssetLoader
+- sprites@2x.json, sprites@2x_0.png  same for Generated/scaled/*@2x.png (with --variant @2x)
+
+Usage:
+  python scripts/pack_atlas.py [--padding 2] [--extrude 1] [--max-size 2048]
+  python scripts/pack_atlas.py --src SearchGame/Resources/Generated/scaled \
+      --out SearchGame/Resources/Generated/atlas --variant @2x
+
+Notes:
+- Placement is MaxRects with the best-short-side-fit heuristic; sprites are never rotated.
+- Each sprite is extruded by `--extrude` pixels (edge pixels repeated outward) so linear
+  filtering doesn't bleed neighbours in, and `--padding` transparent pixels separate slots.
+- Builds are incremental: unchanged inputs are a no-op, and sprites that changed without
+  changing size are repainted in place without repacking.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+
+ROOT = Path(__file__).resolve().parents[1]
+GENERATED_DIR = ROOT / "SearchGame" / "Resources" / "Generated"
+ATLAS_NAME = "sprites"
+FORMAT_VERSION = 1
+
+
+@dataclass
+class Rect:
+    x: int
+    y: int
+    w: int
+    h: int
+
+    def contains(self, other: Rect) -> bool:
+        return (
+            other.x >= self.x
+            and other.y >= self.y
+            and other.x + other.w <= self.x + self.w
+            and other.y + other.h <= self.y + self.h
+        )
+
+    def intersects(self, other: Rect) -> bool:
+        return not (
+            other.x >= self.x + self.w
+            or other.x + other.w <= self.x
+            or other.y >= self.y + self.h
+            or other.y + other.h <= self.y
+        )
+
+
+class MaxRectsBin:
+    """MaxRects bin packer (Jukka Jylänki's algorithm), best-short-side-fit, no rotation."""
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.free: list[Rect] = [Rect(0, 0, width, height)]
+
+    def insert(self, w: int, h: int) -> Optional[Rect]:
+        best: Optional[Rect] = None
+        best_score = (0, 0)
+        for fr in self.free:
+            if w <= fr.w and h <= fr.h:
+                leftover_w = fr.w - w
+                leftover_h = fr.h - h
+                score = (min(leftover_w, leftover_h), max(leftover_w, leftover_h))
+                if best is None or score < best_score:
+                    best = Rect(fr.x, fr.y, w, h)
+                    best_score = score
+        if best is None:
+            return None
+        self._place(best)
+        return best
+
+    def _place(self, node: Rect) -> None:
+        new_free: list[Rect] = []
+        for fr in self.free:
+            if not fr.intersects(node):
+                new_free.append(fr)
+                continue
+            # Split the free rect into the (up to four) maximal pieces around `node`.
+            if node.x > fr.x:
+                new_free.append(Rect(fr.x, fr.y, node.x - fr.x, fr.h))
+            if node.x + node.w < fr.x + fr.w:
+                new_free.append(Rect(node.x + node.w, fr.y, fr.x + fr.w - node.x - node.w, fr.h))
+            if node.y > fr.y:
+                new_free.append(Rect(fr.x, fr.y, fr.w, node.y - fr.y))
+            if node.y + node.h < fr.y + fr.h:
+                new_free.append(Rect(fr.x, node.y + node.h, fr.w, fr.y + fr.h - node.y - node.h))
+        # Prune free rects fully contained in another one.
+        pruned: list[Rect] = []
+        for i, a in enumerate(new_free):
+            if any(j != i and b.contains(a) and (b != a or j < i) for j, b in enumerate(new_free)):
+                continue
+            pruned.append(a)
+        self.free = pruned
+
+
+def _file_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _sprite_paths(src_dir: Path, variant: str = "") -> dict[str, Path]:
+    """Sprites to pack: every `*<variant>.png` in `src_dir` except full-screen backgrounds.
+
+Frame names drop the variant suffix, so "duck@2x.png" is frame "duck" of atlas "sprites@2x".
+"""
+    paths = {}
+    for p in sorted(src_dir.glob(f"*{variant}.png")):
+        name = p.stem[: len(p.stem) - len(variant)] if variant else p.stem
+        if variant == "" and "@" in name:
+            continue
+        if not name.startswith("bg_"):
+            paths[name] = p
+    return paths
+
+
+def _blit(page: np.ndarray, sprite: Image.Image, x: int, y: int, extrude: int) -> None:
+    arr = np.asarray(sprite.convert("RGBA"))
+    if extrude:
+        arr = np.pad(arr, ((extrude, extrude), (extrude, extrude), (0, 0)), mode="edge")
+    page[y : y + arr.shape[0], x : x + arr.shape[1]] = arr
+
+
+def _pack(sizes: dict[str, tuple[int, int]], max_size: int, padding: int, extrude: int) -> dict[str, tuple[int, Rect]]:
+    """Assign each sprite a page index and slot (slot includes extrusion, not padding)."""
+    grow = 2 * extrude + padding
+    order = sorted(sizes, key=lambda n: (max(sizes[n]), sizes[n][0] * sizes[n][1], n), reverse=True)
+    bins: list[MaxRectsBin] = []
+    placed: dict[str, tuple[int, Rect]] = {}
+    for name in order:
+        w, h = sizes[name]
+        if w + grow > max_size or h + grow > max_size:
+            raise SystemExit(f"Sprite {name} ({w}x{h}) does not fit a {max_size}px atlas page")
+        for i, b in enumerate(bins):
+            rect = b.insert(w + grow, h + grow)
+            if rect is not None:
+                placed[name] = (i, rect)
+                break
+        else:
+            b = MaxRectsBin(max_size, max_size)
+            bins.append(b)
+            rect = b.insert(w + grow, h + grow)
+            assert rect is not None
+            placed[name] = (len(bins) - 1, rect)
+    return placed
+
+
+def atlas_exists(src_dir: Path = GENERATED_DIR) -> bool:
+    """Whether `src_dir` has a packed atlas, whose frames AssetLoader prefers over the loose PNGs."""
+    return (src_dir / "atlas" / f"{ATLAS_NAME}.json").exists()
+
+
+def build_atlas(
+    src_dir: Path = GENERATED_DIR,
+    out_dir: Optional[Path] = None,
+    padding: int = 2,
+    extrude: int = 1,
+    max_size: int = 2048,
+    force: bool = False,
+    variant: str = "",
+) -> Path:
+    """Pack sprites from `src_dir` into atlas pages; returns the path of the frame JSON."""
+    out_dir = out_dir or (src_dir / "atlas")
+    atlas_name = ATLAS_NAME + variant
+    manifest_path = out_dir / f"{atlas_name}.json"
+    sprites = _sprite_paths(src_dir, variant)
+    hashes = {name: _file_hash(p) for name, p in sprites.items()}
+    settings = {"padding": padding, "extrude": extrude, "maxSize": max_size}
+
+    old: Optional[dict] = None
+    if manifest_path.exists() and not force:
+        try:
+            old = json.loads(manifest_path.read_text())
+        except ValueError:
+            old = None
+    if old is not None and (old.get("version") != FORMAT_VERSION or old.get("settings") != settings):
+        old = None
+    if old is not None and not all((out_dir / p["file"]).exists() for p in old["pages"]):
+        old = None
+
+    if old is not None and set(old["frames"]) == set(sprites):
+        changed = [n for n in sprites if old["frames"][n]["hash"] != hashes[n]]
+        if not changed:
+            print(f"Atlas {atlas_name} up to date ({len(sprites)} sprites)")
+            return manifest_path
+        images = {n: Image.open(sprites[n]) for n in changed}
+        if all(images[n].size == (old["frames"][n]["w"], old["frames"][n]["h"]) for n in changed):
+            # Same sizes: repaint changed frames in place, keep the layout.
+            pages: dict[int, np.ndarray] = {}
+            for n in changed:
+                fr = old["frames"][n]
+                if fr["page"] not in pages:
+                    page_file = out_dir / old["pages"][fr["page"]]["file"]
+                    pages[fr["page"]] = np.array(Image.open(page_file).convert("RGBA"))
+                _blit(pages[fr["page"]], images[n], fr["x"] - extrude, fr["y"] - extrude, extrude)
+                fr["hash"] = hashes[n]
+            for i, arr in pages.items():
+                Image.fromarray(arr, "RGBA").save(out_dir / old["pages"][i]["file"], optimize=True)
+            manifest_path.write_text(json.dumps(old, indent=2, sort_keys=True) + "\n")
+            print(f"Atlas {atlas_name} updated in place: {', '.join(sorted(changed))}")
+            return manifest_path
+
+    images = {n: Image.open(p) for n, p in sprites.items()}
+    placed = _pack({n: im.size for n, im in images.items()}, max_size, padding, extrude)
+
+    n_pages = 1 + max((page for page, _ in placed.values()), default=-1)
+    extents = [[0, 0] for _ in range(n_pages)]
+    for page, rect in placed.values():
+        extents[page][0] = max(extents[page][0], rect.x + rect.w)
+        extents[page][1] = max(extents[page][1], rect.y + rect.h)
+    arrays = [np.zeros((h, w, 4), dtype=np.uint8) for w, h in extents]
+
+    frames: dict[str, dict] = {}
+    for name, (page, rect) in placed.items():
+        _blit(arrays[page], images[name], rect.x, rect.y, extrude)
+        w, h = images[name].size
+        frames[name] = {
+            "page": page,
+            "x": rect.x + extrude,
+            "y": rect.y + extrude,
+            "w": w,
+            "h": h,
+            "hash": hashes[name],
+        }
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for stale in out_dir.glob(f"{atlas_name}_*.png"):
+        stale.unlink()
+    pages_meta = []
+    for i, arr in enumerate(arrays):
+        file = f"{atlas_name}_{i}.png"
+        Image.fromarray(arr, "RGBA").save(out_dir / file, optimize=True)
+        pages_meta.append({"file": file, "width": arr.shape[1], "height": arr.shape[0]})
+
+    manifest = {"version": FORMAT_VERSION, "settings": settings, "pages": pages_meta, "frames": frames}
+    manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    print(f"Packed {len(frames)} sprites into {len(pages_meta)} page(s) of {atlas_name} in {out_dir}")
+    return manifest_path
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Pack generated sprites into texture atlas pages.")
+    p.add_argument("--src", type=Path, default=GENERATED_DIR, help="Directory with trimmed sprite PNGs.")
+    p.add_argument("--out", type=Path, default=None, help="Output directory (default: <src>/atlas).")
+    p.add_argument("--padding", type=int, default=2, help="Transparent pixels between slots.")
+    p.add_argument("--extrude", type=int, default=1, help="Edge pixels repeated around each sprite.")
+    p.add_argument("--max-size", type=int, default=2048, help="Max atlas page width/height.")
+    p.add_argument("--force", action="store_true", help="Repack from scratch even if inputs are unchanged.")
+    p.add_argument("--variant", default="", help="Scale suffix to pack, e.g. @2x (reads *@2x.png).")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    build_atlas(args.src, args.out, args.padding, args.extrude, args.max_size, args.force, args.variant)
+
+
+if __name__ == "__main__":
+    main()
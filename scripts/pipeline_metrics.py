@@ -0,0 +1,210 @@
+"""Per-stage timing, byte and retry counters for scripts/generate_assets.py (`--metrics out.json`).
+
+Instrumented code calls the module-level hooks (`stage`, `count_bytes`, `note_retry`).
+They record into the AssetMetrics bound to the current thread by `recording()`, and do
+nothing when no asset is being recorded, so the hooks cost nothing without --metrics.
+
+Stage names used by the pipeline:
+- rate_limit_wait, backoff_wait   time spent waiting before (re)sending a request
+- api                             the Images API request, up to response headers
+- download                        streaming the response body / image URL into a spool file
+- cache_lookup, cache_store       raw image cache
+- decode, precheck, bg_estimate, flood_fill, components, large_base, trim   background removal
+- score                           candidate measurements (--candidates)
+- recolor                         deriving a color variant from its base
+- resize, encode, write, webp     output stage
+"""
+
+from __future__ import annotations
+
+import json
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class AssetMetrics:
+    """Timings and counters for one asset. Only touched by the thread that processes it."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.stages: dict[str, dict[str, float]] = {}
+        self.bytes: dict[str, int] = {}
+        self.retries: list[dict[str, Any]] = []
+        self.attempts = 0
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.seconds = 0.0
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        entry = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+
+    def merge(self, other: AssetMetrics) -> None:
+        """Add stages, bytes and retries recorded by a helper thread (see `bind`)."""
+        for stage_name, entry in other.stages.items():
+            mine = self.stages.setdefault(stage_name, {"seconds": 0.0, "calls": 0})
+            mine["seconds"] += entry["seconds"]
+            mine["calls"] += entry["calls"]
+        for kind, n in other.bytes.items():
+            self.bytes[kind] = self.bytes.get(kind, 0) + n
+        self.retries.extend(other.retries)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "error": self.error,
+            "seconds": round(self.seconds, 6),
+            "attempts": self.attempts,
+            "stages": {k: {"seconds": round(v["seconds"], 6), "calls": int(v["calls"])} for k, v in self.stages.items()},
+            "bytes": dict(self.bytes),
+            "retries": list(self.retries),
+        }
+
+
+_local = threading.local()
+_merge_lock = threading.Lock()
+
+
+def current() -> Optional[AssetMetrics]:
+    return getattr(_local, "asset", None)
+
+
+@contextmanager
+def recording(asset: Optional[AssetMetrics]) -> Iterator[Optional[AssetMetrics]]:
+    """Bind `asset` to this thread while the block runs and time the whole block; None disables recording."""
+    prev = current()
+    _local.asset = asset
+    t0 = time.perf_counter()
+    try:
+        yield asset
+    finally:
+        if asset is not None:
+            asset.seconds += time.perf_counter() - t0
+        _local.asset = prev
+
+
+def bind(fn: Callable[..., T]) -> Callable[..., T]:
+    """Wrap `fn` to run on another thread (e.g. a pool) while still recording into the current asset.
+
+Each call records into its own AssetMetrics, merged into the caller's asset when it returns.
+"""
+    parent = current()
+    if parent is None:
+        return fn
+
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        child = AssetMetrics(parent.name)
+        try:
+            with recording(child):
+                return fn(*args, **kwargs)
+        finally:
+            with _merge_lock:
+                parent.merge(child)
+
+    return wrapper
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    asset = current()
+    if asset is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        asset.add_time(name, time.perf_counter() - t0)
+
+
+def count_bytes(kind: str, n: int) -> None:
+    asset = current()
+    if asset is not None:
+        asset.bytes[kind] = asset.bytes.get(kind, 0) + n
+
+
+def note_retry(kind: str, reason: str, delay: float = 0.0) -> None:
+    """Record a retry: `kind` is "http" (transient HTTP/network error), "attempt" (rejected sprite)
+or "candidate" (one rejected candidate of a --candidates batch)."""
+    asset = current()
+    if asset is not None:
+        asset.retries.append({"kind": kind, "reason": reason, "delay": round(delay, 3)})
+
+
+def peak_rss_bytes(children: bool = False) -> int:
+    """Peak resident set size of this process (or of its waited-for children)."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return int(usage.ru_maxrss) if sys.platform == "darwin" else int(usage.ru_maxrss) * 1024
+
+
+class RunMetrics:
+    """All assets of one run plus run-level stages; written as JSON by `write()`."""
+
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.assets: list[dict[str, Any]] = []
+        self.run = AssetMetrics("run")
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._t0 = time.perf_counter()
+
+    def add(self, asset: AssetMetrics | dict[str, Any]) -> None:
+        with self._lock:
+            self.assets.append(asset.to_dict() if isinstance(asset, AssetMetrics) else asset)
+
+    def _aggregate(self) -> dict[str, Any]:
+        stages: dict[str, dict[str, float]] = {}
+        for a in self.assets:
+            for name, s in a["stages"].items():
+                agg = stages.setdefault(name, {"seconds": 0.0, "calls": 0, "assets": 0, "max_seconds": 0.0})
+                agg["seconds"] += s["seconds"]
+                agg["calls"] += s["calls"]
+                agg["assets"] += 1
+                agg["max_seconds"] = max(agg["max_seconds"], s["seconds"])
+        for agg in stages.values():
+            agg["mean_seconds"] = agg["seconds"] / agg["assets"]
+            for k in ("seconds", "max_seconds", "mean_seconds"):
+                agg[k] = round(agg[k], 6)
+
+        byte_totals: dict[str, int] = {}
+        reasons: dict[str, int] = {}
+        for a in self.assets:
+            for kind, n in a["bytes"].items():
+                byte_totals[kind] = byte_totals.get(kind, 0) + n
+            for r in a["retries"]:
+                key = f"{r['kind']}: {r['reason']}"
+                reasons[key] = reasons.get(key, 0) + 1
+        return {
+            "assets": len(self.assets),
+            "failed": sum(1 for a in self.assets if a["status"] != "ok"),
+            "asset_seconds": round(sum(a["seconds"] for a in self.assets), 6),
+            "stages": dict(sorted(stages.items(), key=lambda kv: -kv[1]["seconds"])),
+            "bytes": byte_totals,
+            "retries": sum(reasons.values()),
+            "retry_reasons": reasons,
+        }
+
+    def write(self, path: Path) -> None:
+        report = {
+            "version": 1,
+            "mode": self.mode,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self._started)),
+            "wall_seconds": round(time.perf_counter() - self._t0, 6),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "peak_rss_children_bytes": peak_rss_bytes(children=True),
+            "run_stages": self.run.to_dict()["stages"],
+            "aggregate": self._aggregate(),
+            "assets": sorted(self.assets, key=lambda a: a["name"]),
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + "\n")
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Place searchable items in level JSON files offline, so the game does no placement on device.
+
+Reads SearchGame/Resources/Levels/<level>.json and the trimmed sprites in Resources/Generated,
+and writes `positions` for every entry of `searchItems` back into the level file, marking the
+entry with "placedBy": "place_items". WorldBuilder only uses positions carrying that marker.
+
+Usage:
+  python scripts/place_items.py                      # fill in missing/short position lists
+  python scripts/place_items.py level1 --all --seed 7
+  python scripts/place_items.py --check              # exit 1 if any level has overlaps or gaps
+
+Notes:
+- Candidate points come from Poisson-disk sampling (Bridson) over the level's `spawnZones`
+  (default: the band WorldBuilder used for random placement), so no two items are closer than
+  --min-distance. The background grid holds at most one point per cell, so the distance test
+  looks at a fixed 5x5 neighbourhood.
+- Each item's footprint is its sprite's aspect ratio fitted into ITEM_SIZE (what
+  SearchableItemNode draws). Footprints are kept --margin apart through a spatial hash, so the
+  overlap test only visits boxes in the cells the new box covers.
+- Without --all, positions this tool wrote earlier are kept and act as obstacles; entries
+  without the marker (hand-written positions) are re-placed.
+- The seed defaults to a hash of the level id, so reruns give the same layout.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from PIL import Image
+
+
+ROOT = Path(__file__).resolve().parents[1]
+LEVELS_DIR = ROOT / "SearchGame" / "Resources" / "Levels"
+GENERATED_DIR = ROOT / "SearchGame" / "Resources" / "Generated"
+# GameScene.worldSize and SearchableItemNode's size.
+WORLD_SIZE = (2400, 1400)
+ITEM_SIZE = 48
+# WorldBuilder.generateSearchablePositions: x in 10..90% of the width, y in 15..45% of the height.
+DEFAULT_SPAWN_ZONE = (WORLD_SIZE[0] * 0.1, WORLD_SIZE[1] * 0.15, WORLD_SIZE[0] * 0.9, WORLD_SIZE[1] * 0.45)
+DEFAULT_MIN_DISTANCE = 72.0
+DEFAULT_MARGIN = 8.0
+# Value of a search item's "placedBy" once this tool has laid it out (SearchItemConfig.placedByTool).
+PLACED_BY = "place_items"
+
+Box = tuple[float, float, float, float]  # min x, min y, max x, max y
+Zone = tuple[float, float, float, float]
+
+
+class SpatialHash:
+    """Boxes bucketed by the grid cells they cover; queries only visit the covered cells."""
+
+    def __init__(self, cell: float) -> None:
+        self.cell = cell
+        self._cells: defaultdict[tuple[int, int], list[Box]] = defaultdict(list)
+
+    def _keys(self, box: Box) -> Iterator[tuple[int, int]]:
+        x0, y0, x1, y1 = (math.floor(v / self.cell) for v in box)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield cx, cy
+
+    def insert(self, box: Box) -> None:
+        for key in self._keys(box):
+            self._cells[key].append(box)
+
+    def overlaps(self, box: Box) -> bool:
+        for key in self._keys(box):
+            for other in self._cells.get(key, ()):
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    return True
+        return False
+
+
+def poisson_disk(zones: list[Zone], radius: float, rng: random.Random, k: int = 30) -> list[tuple[float, float]]:
+    """Bridson's algorithm over a union of rectangles: points at least `radius` apart, in generation order."""
+    min_x, min_y = min(z[0] for z in zones), min(z[1] for z in zones)
+    max_x, max_y = max(z[2] for z in zones), max(z[3] for z in zones)
+    cell = radius / math.sqrt(2)  # a cell's diagonal is `radius`, so it holds at most one point
+    cols = int((max_x - min_x) / cell) + 1
+    rows = int((max_y - min_y) / cell) + 1
+    grid: list[Optional[tuple[float, float]]] = [None] * (cols * rows)
+
+    def inside(x: float, y: float) -> bool:
+        return any(z[0] <= x <= z[2] and z[1] <= y <= z[3] for z in zones)
+
+    def fits(x: float, y: float) -> bool:
+        gx, gy = int((x - min_x) / cell), int((y - min_y) / cell)
+        for cy in range(max(0, gy - 2), min(rows, gy + 3)):
+            for cx in range(max(0, gx - 2), min(cols, gx + 3)):
+                p = grid[cy * cols + cx]
+                if p is not None and (p[0] - x) ** 2 + (p[1] - y) ** 2 < radius * radius:
+                    return False
+        return True
+
+    points: list[tuple[float, float]] = []
+    active: list[tuple[float, float]] = []
+
+    def add(x: float, y: float) -> None:
+        grid[int((y - min_y) / cell) * cols + int((x - min_x) / cell)] = (x, y)
+        points.append((x, y))
+        active.append((x, y))
+
+    # One seed per zone, so disjoint zones all get filled.
+    for z in zones:
+        x, y = rng.uniform(z[0], z[2]), rng.uniform(z[1], z[3])
+        if fits(x, y):
+            add(x, y)
+        while active:
+            i = rng.randrange(len(active))
+            ax, ay = active[i]
+            for _ in range(k):
+                angle = rng.uniform(0, 2 * math.pi)
+                dist = rng.uniform(radius, 2 * radius)
+                x, y = ax + dist * math.cos(angle), ay + dist * math.sin(angle)
+                if inside(x, y) and fits(x, y):
+                    add(x, y)
+                    break
+            else:
+                active[i] = active[-1]
+                active.pop()
+    return points
+
+
+def footprint(item_type: str, sprite_dir: Path, item_size: float = ITEM_SIZE) -> tuple[float, float]:
+    """On-screen size of an item: the trimmed sprite's aspect ratio fitted into `item_size`."""
+    path = sprite_dir / f"{item_type}.png"
+    if not path.exists():
+        return item_size, item_size  # procedural placeholder, drawn square
+    with Image.open(path) as im:
+        w, h = im.size
+    scale = item_size / max(w, h)
+    return w * scale, h * scale
+
+
+def _box(x: float, y: float, size: tuple[float, float], margin: float) -> Box:
+    half_w, half_h = size[0] / 2 + margin / 2, size[1] / 2 + margin / 2
+    return x - half_w, y - half_h, x + half_w, y + half_h
+
+
+def _level_seed(level_id: str) -> int:
+    return int.from_bytes(hashlib.sha256(level_id.encode("utf-8")).digest()[:4], "big")
+
+
+def place_level(
+    level: dict[str, Any],
+    rng: random.Random,
+    sprite_dir: Path = GENERATED_DIR,
+    min_distance: float = DEFAULT_MIN_DISTANCE,
+    margin: float = DEFAULT_MARGIN,
+    replace_all: bool = False,
+) -> list[str]:
+    """Fill in `positions` of every search item in `level` (in place); returns the item types placed."""
+    zones: list[Zone] = [tuple(map(float, z)) for z in level.get("spawnZones") or []] or [DEFAULT_SPAWN_ZONE]
+    sizes = {item["type"]: footprint(item["type"], sprite_dir) for item in level["searchItems"]}
+    index = SpatialHash(cell=max(max(s) for s in sizes.values()) + margin)
+
+    todo: list[dict[str, Any]] = []
+    for item in level["searchItems"]:
+        positions = item.get("positions") or []
+        if not replace_all and item.get("placedBy") == PLACED_BY and len(positions) >= item["count"]:
+            for p in positions:
+                index.insert(_box(p["x"], p["y"], sizes[item["type"]], margin))
+        else:
+            item["positions"] = []
+            item["placedBy"] = PLACED_BY
+            todo.append(item)
+    if not todo:
+        return []
+
+    candidates = poisson_disk(zones, min_distance, rng)
+    # Bridson grows outwards from the seeds; shuffle so items spread over the whole zone.
+    rng.shuffle(candidates)
+    slots = [item for item in todo for _ in range(item["count"])]
+    # Largest footprints first, while there is the most room; ties keep a stable mix of types.
+    slots.sort(key=lambda item: -sizes[item["type"]][0] * sizes[item["type"]][1])
+    it = iter(candidates)
+    for item in slots:
+        size = sizes[item["type"]]
+        for x, y in it:
+            box = _box(x, y, size, margin)
+            if not index.overlaps(box):
+                index.insert(box)
+                item["positions"].append({"x": round(x), "y": round(y)})
+                break
+        else:
+            raise SystemExit(
+                f"{level.get('id', '?')}: ran out of room placing {item['type']}; "
+                f"lower --min-distance/--margin or widen spawnZones"
+            )
+    return [item["type"] for item in todo]
+
+
+def check_level(level: dict[str, Any], sprite_dir: Path = GENERATED_DIR, margin: float = 0.0) -> list[str]:
+    """Problems with a level's current positions: missing or unmarked positions and overlapping footprints."""
+    problems: list[str] = []
+    index = SpatialHash(cell=ITEM_SIZE + margin)
+    for item in level["searchItems"]:
+        positions = item.get("positions") or []
+        if len(positions) < item["count"]:
+            problems.append(f"{item['type']}: {len(positions)}/{item['count']} position(s)")
+        elif item.get("placedBy") != PLACED_BY:
+            problems.append(f"{item['type']}: positions not placed by this tool, the game ignores them")
+        size = footprint(item["type"], sprite_dir)
+        for p in positions:
+            box = _box(p["x"], p["y"], size, margin)
+            if index.overlaps(box):
+                problems.append(f"{item['type']} at ({p['x']}, {p['y']}) overlaps another item")
+            index.insert(box)
+    return problems
+
+
+def _dump_level(level: dict[str, Any], indent: int) -> str:
+    """JSON in the hand-written layout: positions and zones stay on one line each."""
+    text = json.dumps(level, indent=indent, ensure_ascii=False)
+    num = r"-?\d+(?:\.\d+)?"
+    text = re.sub(rf'\{{\s*"x": ({num}),\s*"y": ({num})\s*\}}', r'{"x": \1, "y": \2}', text)
+    text = re.sub(rf"\[\s*({num}),\s*({num}),\s*({num}),\s*({num})\s*\]", r"[\1, \2, \3, \4]", text)
+    return text + "\n"
+
+
+def _indent_of(text: str) -> int:
+    match = re.search(r"\n( +)\S", text)
+    return len(match.group(1)) if match else 2
+
+
+def _level_paths(names: list[str]) -> list[Path]:
+    if not names:
+        return sorted(LEVELS_DIR.glob("*.json"))
+    return [Path(n) if n.endswith(".json") else LEVELS_DIR / f"{n}.json" for n in names]
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Place searchable items in level JSON files.")
+    p.add_argument("levels", nargs="*", help="Level ids or JSON paths (default: every file in Resources/Levels).")
+    p.add_argument("--all", action="store_true", help="Re-place every item, not only those without positions.")
+    p.add_argument("--seed", type=int, default=None, help="RNG seed (default: derived from the level id).")
+    p.add_argument("--min-distance", type=float, default=DEFAULT_MIN_DISTANCE, help="Minimum distance between item centres.")
+    p.add_argument("--margin", type=float, default=DEFAULT_MARGIN, help="Minimum gap between item footprints.")
+    p.add_argument("--sprites", type=Path, default=GENERATED_DIR, help="Directory with the trimmed sprite PNGs.")
+    p.add_argument("--check", action="store_true", help="Only report missing positions and overlaps.")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    failed = False
+    for path in _level_paths(args.levels):
+        text = path.read_text()
+        level = json.loads(text)
+        if args.check:
+            problems = check_level(level, args.sprites)
+            failed |= bool(problems)
+            print(f"{path.name}: {'ok' if not problems else f'{len(problems)} problem(s)'}")
+            for problem in problems:
+                print(f"  {problem}")
+            continue
+        seed = args.seed if args.seed is not None else _level_seed(level.get("id", path.stem))
+        placed = place_level(level, random.Random(seed), args.sprites, args.min_distance, args.margin, args.all)
+        if not placed:
+            print(f"{path.name}: all positions set (use --all to re-place)")
+            continue
+        path.write_text(_dump_level(level, _indent_of(text)))
+        print(f"{path.name}: placed {', '.join(placed)} (seed {seed})")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Shrink generated assets: palette quantization under an error budget + max PNG compression.
+
+Used as the last stage of scripts/generate_assets.py, or standalone on existing files:
+  python scripts/png_optimize.py SearchGame/Resources/Generated/*.png [--max-error 1.5] [--webp]
+
+Notes:
+- Quantization keeps alpha (RGBA images are quantized with their alpha channel).
+- The error is the mean CIE76 delta-E between original and quantized pixels, weighted by
+  alpha, plus alpha drift; quantization is only kept if it stays within `max_error`.
+- Lossless WebP is an optional extra output next to the PNG.
+- PNG text chunks named in KEPT_TEXT (the sprite trim, see asset_info.py) survive re-encoding.
+"""
+
+from __future__ import annotations
+
+import argparse
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image, features
+from PIL.PngImagePlugin import PngInfo
+
+
+# Palette sizes tried in order; the first one within budget wins (fewer colors = smaller file).
+PALETTE_SIZES = (64, 128, 256)
+DEFAULT_MAX_ERROR = 1.5
+KEPT_TEXT = ("trim",)
+
+
+def _srgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """(..., 3) uint8 sRGB -> CIE Lab (D65)."""
+    c = rgb.astype(np.float32) / 255.0
+    lin = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    m = np.array(
+        [[0.4124, 0.3576, 0.1805], [0.2126, 0.7152, 0.0722], [0.0193, 0.1192, 0.9505]],
+        dtype=np.float32,
+    )
+    xyz = lin @ m.T / np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16.0 / 116.0)
+    lab = np.empty_like(f)
+    lab[..., 0] = 116.0 * f[..., 1] - 16.0
+    lab[..., 1] = 500.0 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200.0 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def perceptual_error(original: Image.Image, candidate: Image.Image) -> float:
+    """Mean alpha-weighted delta-E between two same-sized images, plus alpha drift (0-100 scale)."""
+    a = np.asarray(original.convert("RGBA"))
+    b = np.asarray(candidate.convert("RGBA"))
+    alpha_a = a[..., 3].astype(np.float32) / 255.0
+    alpha_b = b[..., 3].astype(np.float32) / 255.0
+    weight = np.maximum(alpha_a, alpha_b)
+    delta_e = np.linalg.norm(_srgb_to_lab(a[..., :3]) - _srgb_to_lab(b[..., :3]), axis=-1)
+    color = float((delta_e * weight).sum() / max(1.0, float(weight.sum())))
+    alpha = float(np.abs(alpha_a - alpha_b).mean() * 100.0)
+    return color + alpha
+
+
+def png_text(im: Image.Image) -> Optional[PngInfo]:
+    """The KEPT_TEXT entries of `im.info` as PNG text chunks, or None if there are none."""
+    kept = [(key, im.info[key]) for key in KEPT_TEXT if isinstance(im.info.get(key), str)]
+    if not kept:
+        return None
+    info = PngInfo()
+    for key, value in kept:
+        info.add_text(key, value)
+    return info
+
+
+def encode_png(im: Image.Image, text: Optional[PngInfo] = None) -> bytes:
+    """Encode with maximum zlib compression and PNG filter selection; `text` defaults to png_text(im)."""
+    buf = BytesIO()
+    im.save(buf, format="PNG", optimize=True, pnginfo=text or png_text(im))
+    return buf.getvalue()
+
+
+def optimize_png(im: Image.Image, max_error: float) -> tuple[bytes, Optional[float]]:
+    """Encode `im` as small as its error budget allows.
+
+Returns (png_bytes, error); `error` is None when quantization was rejected (over budget or
+not smaller) and the truecolor encoding won.
+"""
+    text = png_text(im)
+    if im.mode not in ("RGB", "RGBA"):
+        im = im.convert("RGBA")
+    base = encode_png(im, text)
+    # Median cut gives better palettes for opaque art; only fast octree handles alpha.
+    method = Image.Quantize.FASTOCTREE if im.mode == "RGBA" else Image.Quantize.MEDIANCUT
+    for colors in PALETTE_SIZES:
+        q = im.quantize(colors=colors, method=method, dither=Image.Dither.NONE)
+        err = perceptual_error(im, q)
+        if err <= max_error:
+            data = encode_png(q, text)
+            if len(data) < len(base):
+                return data, err
+            break
+    return base, None
+
+
+def save_webp_lossless(im: Image.Image, path: Path) -> bool:
+    """Write a lossless WebP copy; returns False if this Pillow build has no WebP support."""
+    if not features.check("webp"):
+        return False
+    im.convert("RGBA" if im.mode in ("RGBA", "P", "LA") else "RGB").save(
+        path, format="WEBP", lossless=True, quality=100, method=6
+    )
+    return True
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Optimize PNG assets in place.")
+    p.add_argument("files", nargs="+", type=Path)
+    p.add_argument("--max-error", type=float, default=DEFAULT_MAX_ERROR, help="Perceptual error budget (mean delta-E).")
+    p.add_argument("--webp", action="store_true", help="Also write a lossless .webp next to each PNG.")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    for path in args.files:
+        before = path.stat().st_size
+        im = Image.open(path)
+        im.load()
+        data, err = optimize_png(im, args.max_error)
+        if len(data) < before:
+            path.write_bytes(data)
+        note = f"palette, error {err:.2f}" if err is not None else "truecolor"
+        print(f"{path.name}: {before/1024:.1f} KB -> {min(before, len(data))/1024:.1f} KB ({note})")
+        # WebP stays lossless relative to the original pixels.
+        if args.webp and not save_webp_lossless(im, path.with_suffix(".webp")):
+            print("  WebP not supported by this Pillow build; skipped")
+
+
+if __name__ == "__main__":
+    main()
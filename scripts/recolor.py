@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Derive color variants of a sprite by remapping its palette (no API call).
+
+generate_assets.py uses this for catalog entries with "variant_of": the base sprite is
+generated once and each variant is recolored from its final PNG.
+
+  {"name": "house_yellow", "variant_of": "house_pink", "recolor": {"to": "#f8e8a0"}}
+
+Every pixel is split into a brightness along the source color plus a residual
+(px = t * source + residual); mapped pixels become t * target + residual. Antialiased edges
+(source mixed with the black outline) and flat shading keep their relative brightness, so the
+variant has exactly the base's shape and line work.
+
+Notes:
+- A pixel is mapped when its chroma distance to the source (|residual| / |t * source|) is
+  within the tolerance, fading out over the upper half of it.
+- Pixels darker than MIN_LEVEL along the source (the outline) are never touched.
+- "keep" colors (default: the pink of the cheeks) are protected: a pixel closer to a keep
+  color than to the source stays as it is.
+- Without "from", the source is the sprite's dominant non-outline color.
+
+Preview a remap (--map [FROM=]TO, repeatable; the first may omit FROM):
+  python scripts/recolor.py SearchGame/Resources/Generated/house_pink.png \
+      --map '#f8e8a0' --map '#d88888=#d8b860' -o /tmp/house.png
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+
+RGB = tuple[int, int, int]
+
+CHEEK_PINK: RGB = (248, 184, 200)
+DEFAULT_KEEP: tuple[RGB, ...] = (CHEEK_PINK,)
+DEFAULT_TOLERANCE = 0.08
+# Brightness along the source below which a pixel counts as outline.
+MIN_LEVEL = 0.25
+# Luma below which a pixel is ignored when looking for the dominant color.
+OUTLINE_LUMA = 64
+
+
+@dataclass(frozen=True)
+class ColorMap:
+    target: RGB
+    # None: the sprite's dominant color.
+    source: Optional[RGB] = None
+    tolerance: float = DEFAULT_TOLERANCE
+
+
+def parse_color(value: Any) -> RGB:
+    """"#rrggbb" or [r, g, b] -> (r, g, b)."""
+    if isinstance(value, str):
+        text = value.lstrip("#")
+        if len(text) != 6:
+            raise ValueError(f"expected #rrggbb, got {value!r}")
+        return int(text[0:2], 16), int(text[2:4], 16), int(text[4:6], 16)
+    r, g, b = (int(v) for v in value)
+    return r, g, b
+
+
+def parse_color_map(entry: dict[str, Any]) -> ColorMap:
+    """A catalog "recolor" entry: {"to": color, "from": color, "tolerance": float}."""
+    unknown = set(entry) - {"to", "from", "tolerance"}
+    if unknown or "to" not in entry:
+        raise ValueError(f"recolor entries need 'to' (and optionally 'from', 'tolerance'), got {sorted(entry)}")
+    return ColorMap(
+        target=parse_color(entry["to"]),
+        source=parse_color(entry["from"]) if "from" in entry else None,
+        tolerance=float(entry.get("tolerance", DEFAULT_TOLERANCE)),
+    )
+
+
+def dominant_color(rgba: np.ndarray) -> RGB:
+    """Mean of the most common 16-level color bucket among opaque, non-outline pixels."""
+    rgb = rgba[..., :3][rgba[..., 3] >= 128].astype(np.int32)
+    luma = (rgb * (299, 587, 114)).sum(axis=1) // 1000
+    rgb = rgb[luma >= OUTLINE_LUMA]
+    if len(rgb) == 0:
+        raise ValueError("no opaque non-outline pixels to take a dominant color from")
+    buckets = (rgb[:, 0] >> 4) << 8 | (rgb[:, 1] >> 4) << 4 | rgb[:, 2] >> 4
+    top = np.bincount(buckets).argmax()
+    r, g, b = (int(round(v)) for v in rgb[buckets == top].mean(axis=0))
+    return r, g, b
+
+
+def _project(px: np.ndarray, color: RGB) -> tuple[np.ndarray, np.ndarray]:
+    """Brightness `t` of every pixel along `color` and its relative chroma distance from it."""
+    c = np.asarray(color, dtype=np.float32)
+    norm = max(float(c @ c), 1.0)
+    t = px @ c / norm
+    residual = px - t[:, None] * c
+    dist = np.sqrt((residual * residual).sum(axis=1)) / np.maximum(t * np.sqrt(norm), 1.0)
+    return t, dist
+
+
+def recolor(im: Image.Image, maps: Sequence[ColorMap], keep: Sequence[RGB] = DEFAULT_KEEP) -> Image.Image:
+    """Apply `maps` to an image (converted to RGBA); alpha is left as is."""
+    rgba = np.array(im.convert("RGBA"))
+    h, w = rgba.shape[:2]
+    px = rgba[..., :3].reshape(-1, 3).astype(np.float32)
+    sources = [m.source or dominant_color(rgba) for m in maps]
+
+    projections = [_project(px, s) for s in sources]
+    protected = np.full(len(px), np.inf, dtype=np.float32)
+    for color in keep:
+        protected = np.minimum(protected, _project(px, color)[1])
+    nearest = np.min([dist for _, dist in projections], axis=0) if projections else protected
+
+    out = px.copy()
+    for m, source, (t, dist) in zip(maps, sources, projections):
+        weight = np.clip((m.tolerance - dist) / (m.tolerance / 2), 0.0, 1.0)
+        weight[(t < MIN_LEVEL) | (dist > nearest) | (dist >= protected)] = 0.0
+        mapped = px + t[:, None] * (np.asarray(m.target, np.float32) - np.asarray(source, np.float32))
+        out += weight[:, None] * (mapped - px)
+
+    rgba[..., :3] = np.clip(np.rint(out), 0, 255).astype(np.uint8).reshape(h, w, 3)
+    return Image.fromarray(rgba)
+
+
+def _parse_map(value: str) -> dict[str, str]:
+    source, _, target = value.rpartition("=")
+    return {"from": source, "to": target} if source else {"to": target}
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Preview a palette remap of a sprite.")
+    p.add_argument("image", type=Path, help="Base sprite PNG.")
+    p.add_argument("--map", type=_parse_map, action="append", required=True, help="[FROM=]TO, colors as #rrggbb.")
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Max relative chroma distance.")
+    p.add_argument("--keep", type=parse_color, action="append", default=None, help="Protected color (repeatable).")
+    p.add_argument("-o", "--out", type=Path, required=True, help="Output PNG.")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    maps = [parse_color_map({**entry, "tolerance": args.tolerance}) for entry in args.map]
+    keep = DEFAULT_KEEP if args.keep is None else tuple(args.keep)
+    with Image.open(args.image) as im:
+        recolor(im, maps, keep).save(args.out)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Split large scene backgrounds into fixed-size tiles with a mip chain, for streaming in the game.
+
+Output for a background `bg_farm_day` (1792x1024, --tile-size 512):
+  Generated/tiles/bg_farm_day/tiles.json   manifest, read by AssetLoader.tiledImage(named:)
+  Generated/tiles/bg_farm_day/0/0_0.png     level 0 (full size), column 0, row 0 (top-left)
+  ...
+  Generated/tiles/bg_farm_day/2/0_0.png     level 2 (448x256), a single tile
+
+tiles.json:
+  {
+    "version": 1, "name": "bg_farm_day", "width": 1792, "height": 1024, "tile": 512,
+    "levels": [{"width": 1792, "height": 1024, "cols": 4, "rows": 2}, ...]
+  }
+
+Each level halves the previous one (rounding up) until it fits in one tile; every level is
+resampled from the full image. Edge tiles are cropped, not padded.
+
+generate_assets.py writes tiles for non-transparent specs with --tile-size; to tile the
+backgrounds already in Resources/Generated:
+  python scripts/tile_backgrounds.py [--tile-size 512]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from pathlib import Path
+from typing import Callable
+
+from PIL import Image
+
+from png_optimize import DEFAULT_MAX_ERROR, optimize_png
+
+
+ROOT = Path(__file__).resolve().parents[1]
+GENERATED_DIR = ROOT / "SearchGame" / "Resources" / "Generated"
+TILES_DIR_NAME = "tiles"
+MANIFEST_NAME = "tiles.json"
+FORMAT_VERSION = 1
+DEFAULT_TILE_SIZE = 512
+
+
+def mip_sizes(width: int, height: int, tile: int) -> list[tuple[int, int]]:
+    """Level sizes from full resolution down to the first one that fits in a single tile."""
+    sizes = [(width, height)]
+    while sizes[-1][0] > tile or sizes[-1][1] > tile:
+        w, h = sizes[-1]
+        sizes.append((max(1, math.ceil(w / 2)), max(1, math.ceil(h / 2))))
+    return sizes
+
+
+def tile_grid(width: int, height: int, tile: int) -> tuple[int, int]:
+    """(cols, rows) of tiles covering a level."""
+    return math.ceil(width / tile), math.ceil(height / tile)
+
+
+def tiles_dir(out_dir: Path, name: str) -> Path:
+    return out_dir / TILES_DIR_NAME / name
+
+
+def tile_paths(out_dir: Path, name: str, width: int, height: int, tile: int) -> list[Path]:
+    """Every tile PNG export_tiles writes for an image of this size, without the manifest."""
+    base = tiles_dir(out_dir, name)
+    paths = []
+    for level, (w, h) in enumerate(mip_sizes(width, height, tile)):
+        cols, rows = tile_grid(w, h, tile)
+        paths += [base / str(level) / f"{col}_{row}.png" for row in range(rows) for col in range(cols)]
+    return paths
+
+
+def export_tiles(
+    im: Image.Image,
+    out_dir: Path,
+    name: str,
+    tile: int,
+    save: Callable[[Path, Image.Image], None],
+    resize: Callable[[Image.Image, tuple[int, int]], Image.Image],
+) -> Path:
+    """Write the tiles of every mip level through `save`, then the manifest; returns the manifest path.
+
+`resize` does the downscaling (generate_assets passes its premultiplied Lanczos resize).
+"""
+    base = tiles_dir(out_dir, name)
+    levels = []
+    for level, size in enumerate(mip_sizes(im.width, im.height, tile)):
+        scaled = im if size == im.size else resize(im, size)
+        cols, rows = tile_grid(size[0], size[1], tile)
+        for row in range(rows):
+            for col in range(cols):
+                box = (col * tile, row * tile, min(size[0], (col + 1) * tile), min(size[1], (row + 1) * tile))
+                save(base / str(level) / f"{col}_{row}.png", scaled.crop(box))
+        levels.append({"width": size[0], "height": size[1], "cols": cols, "rows": rows})
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "name": name,
+        "width": im.width,
+        "height": im.height,
+        "tile": tile,
+        "levels": levels,
+    }
+    path = base / MANIFEST_NAME
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2) + "\n")
+    tmp.replace(path)
+    return path
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Tile existing backgrounds in Resources/Generated.")
+    p.add_argument("images", nargs="*", type=Path, help="Background PNGs (default: Generated/bg_*.png).")
+    p.add_argument("--tile-size", type=int, default=DEFAULT_TILE_SIZE, help="Tile edge in pixels.")
+    p.add_argument("--out", type=Path, default=GENERATED_DIR, help="Directory that receives tiles/<name>/.")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    images = args.images or sorted(GENERATED_DIR.glob("bg_*.png"))
+
+    def save(path: Path, tile_im: Image.Image) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data, _ = optimize_png(tile_im, DEFAULT_MAX_ERROR)
+        path.write_bytes(data)
+
+    for src in images:
+        with Image.open(src) as im:
+            im.load()
+            manifest = export_tiles(
+                im, args.out, src.stem, args.tile_size, save, lambda i, s: i.resize(s, Image.Resampling.LANCZOS)
+            )
+        print(f"Wrote {manifest.parent} ({len(tile_paths(args.out, src.stem, im.width, im.height, args.tile_size))} tiles)")
+
+
+if __name__ == "__main__":
+    main()